@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class BlogengineConfig(AppConfig):
+	name = 'blogengine'
+
+	def ready(self):
+		# Connect the signal receivers that keep derived data in sync
+		import blogengine.archive
+		import blogengine.autocomplete
+		import blogengine.cache
+		import blogengine.feeds
+		import blogengine.related
+		import blogengine.search
+		import blogengine.taxonomy
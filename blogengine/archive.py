@@ -0,0 +1,88 @@
+"""
+Per-site month summary behind the Archives sidebar.
+
+``ArchiveMonth`` holds one row per (site, year, month) with its post count,
+adjusted incrementally by the receivers below as posts are created, deleted
+or re-dated, so the sidebar never has to group the post table.
+"""
+
+from collections import OrderedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dates import MONTHS
+
+from blogengine.cache import ARCHIVES_TAG, bump
+from blogengine.models import ArchiveMonth, Post
+
+
+def post_month(post):
+	"""The (site id, year, month) a post is archived under."""
+	pub_date = post.pub_date
+	if timezone.is_aware(pub_date):
+		pub_date = timezone.localtime(pub_date)
+	return post.site_id, pub_date.year, pub_date.month
+
+
+def add_to_month(site_id, year, month, delta):
+	months = ArchiveMonth.objects.filter(site_id=site_id, year=year, month=month)
+	if months.update(post_count=F('post_count') + delta):
+		if delta < 0 and months.filter(post_count__lte=0).delete():
+			bump([ARCHIVES_TAG])
+		return
+	if delta > 0:
+		try:
+			with transaction.atomic():
+				ArchiveMonth.objects.create(site_id=site_id, year=year, month=month, post_count=delta)
+		except IntegrityError:
+			# Created concurrently
+			months.update(post_count=F('post_count') + delta)
+		else:
+			bump([ARCHIVES_TAG])
+
+
+def rebuild():
+	"""Recompute every row from the post table."""
+	counts = {}
+	for site_id, pub_date in Post.objects.values_list('site_id', 'pub_date').iterator():
+		if timezone.is_aware(pub_date):
+			pub_date = timezone.localtime(pub_date)
+		key = (site_id, pub_date.year, pub_date.month)
+		counts[key] = counts.get(key, 0) + 1
+
+	with transaction.atomic():
+		ArchiveMonth.objects.all().delete()
+		ArchiveMonth.objects.bulk_create([
+			ArchiveMonth(site_id=site_id, year=year, month=month, post_count=count)
+			for (site_id, year, month), count in counts.items()])
+	bump([ARCHIVES_TAG])
+
+
+def month_archives(site_id):
+	"""
+	Years, newest first, mapped to ``(month name, month number)`` pairs in
+	the shape the base template expects.
+	"""
+	archives = OrderedDict()
+	for year, month in ArchiveMonth.objects.filter(site_id=site_id).values_list('year', 'month'):
+		archives.setdefault(year, []).append((MONTHS[month], month))
+	return archives
+
+
+@receiver(post_save, sender=Post)
+def archive_saved_post(sender, instance, created, raw=False, **kwargs):
+	new = post_month(instance)
+	original = getattr(instance, '_original', None)
+	old = post_month(original) if original else None
+	if old != new:
+		if old:
+			add_to_month(*old, delta=-1)
+		add_to_month(*new, delta=1)
+
+
+@receiver(post_delete, sender=Post)
+def archive_deleted_post(sender, instance, **kwargs):
+	add_to_month(*post_month(instance), delta=-1)
@@ -0,0 +1,162 @@
+"""
+Static asset pipeline.
+
+``collectstatic`` with ``BundledManifestStaticFilesStorage`` concatenates
+and minifies the stylesheets and scripts listed in ``BUNDLES``, gives every
+file a content-hashed name and writes gzip (and, when the ``brotli`` module
+is installed, brotli) variants next to the hashed text files.  Templates
+pull bundles in with the ``{% bundle %}`` tag, and
+``blogengine.staticserve`` serves the precompressed variants.
+"""
+
+import gzip
+import os
+import re
+from collections import OrderedDict
+from cStringIO import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+# Bundle name -> source files, in the order they are loaded
+BUNDLES = OrderedDict([
+	('css/site.css', (
+		'css/normalize.css',
+		'css/main.css',
+		'css/bootstrap.min.css',
+		'css/bootstrap-theme.min.css',
+		'css/code.css',
+		'css/blog.css',
+	)),
+	('js/site.js', (
+		'js/plugins.js',
+		'js/main.js',
+	)),
+])
+
+# Extensions worth storing compressed copies of
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.xml', '.json', '.eot', '.ttf')
+
+# Variants written next to each compressible file, by content encoding
+ENCODINGS = OrderedDict([('br', '.br'), ('gzip', '.gz')])
+
+_css_comment = re.compile(r'/\*(?!!).*?\*/', re.S)
+_css_space = re.compile(r'\s+')
+_css_punctuation = re.compile(r'\s*([{};,>])\s*')
+_css_colon = re.compile(r':\s+')
+
+
+def minify_css(css):
+	"""Strip comments (except ``/*! ... */`` licences) and redundant whitespace."""
+	css = _css_comment.sub('', css)
+	css = _css_space.sub(' ', css)
+	css = _css_punctuation.sub(r'\1', css)
+	css = _css_colon.sub(':', css)
+	return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+	"""
+	Conservatively shrink a script: drop blank lines, indentation and
+	comments at the start of a line.  Line breaks are kept, so automatic
+	semicolon insertion still sees the same program.
+	"""
+	lines = []
+	in_comment = False
+	for line in js.splitlines():
+		line = line.strip()
+		if in_comment:
+			if '*/' not in line:
+				continue
+			in_comment = False
+			line = line.split('*/', 1)[1].strip()
+		# Code after a comment that opens the line stays
+		while line.startswith('/*') and not line.startswith('/*!'):
+			if '*/' not in line[2:]:
+				in_comment, line = True, ''
+			else:
+				line = line[2:].split('*/', 1)[1].strip()
+		if line and not line.startswith('//'):
+			lines.append(line)
+	return '\n'.join(lines)
+
+
+def minify(name, content):
+	if name.endswith('.min.css') or name.endswith('.min.js'):
+		return content
+	if name.endswith('.css'):
+		return minify_css(content)
+	if name.endswith('.js'):
+		return minify_js(content)
+	return content
+
+
+def compressed_variants(content):
+	"""``{file suffix: compressed bytes}`` for every available encoding."""
+	variants = {}
+	buf = StringIO()
+	# A fixed mtime keeps the output identical across builds
+	with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=buf, mtime=0) as compressed:
+		compressed.write(content)
+	variants[ENCODINGS['gzip']] = buf.getvalue()
+	if brotli is not None:
+		variants[ENCODINGS['br']] = brotli.compress(content)
+	return variants
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+	"""
+	``ManifestStaticFilesStorage`` that also builds the ``BUNDLES`` and
+	precompresses the hashed files.  ``url()`` falls back to the plain name
+	when a file is missing from the manifest (for instance before
+	``collectstatic`` has run) instead of failing the page.
+	"""
+
+	def build_bundles(self, paths):
+		for name, sources in BUNDLES.items():
+			parts = []
+			for source in sources:
+				storage, path = paths.get(source, (self, source))
+				with storage.open(path) as original:
+					parts.append(minify(source, original.read().decode(settings.FILE_CHARSET)))
+			separator = '\n' if name.endswith('.css') else ';\n'
+			if self.exists(name):
+				self.delete(name)
+			self._save(name, ContentFile(separator.join(parts).encode('utf-8')))
+			paths[name] = (self, name)
+
+	def compress(self, name):
+		with self.open(name) as original:
+			content = original.read()
+		for suffix, compressed in compressed_variants(content).items():
+			# Not worth a lookup for files that don't shrink
+			if len(compressed) < len(content):
+				if self.exists(name + suffix):
+					self.delete(name + suffix)
+				self._save(name + suffix, ContentFile(compressed))
+
+	def post_process(self, paths, dry_run=False, **options):
+		if dry_run:
+			return
+		self.build_bundles(paths)
+		for processed in super(BundledManifestStaticFilesStorage, self).post_process(paths, dry_run, **options):
+			yield processed
+		for hashed_name in set(self.hashed_files.values()):
+			if os.path.splitext(hashed_name)[1] in COMPRESSIBLE:
+				self.compress(hashed_name)
+
+	def is_collected(self, name):
+		"""Whether ``collectstatic`` has stored a hashed copy of ``name``."""
+		return self.hash_key(name) in self.hashed_files
+
+	def url(self, name, force=False):
+		try:
+			return super(BundledManifestStaticFilesStorage, self).url(name, force)
+		except ValueError:
+			return StaticFilesStorage.url(self, name)
@@ -0,0 +1,198 @@
+"""
+Prefix autocomplete over post titles and tag names.
+
+Each process keeps a sorted list of ``(term, label, url)`` entries, with a
+term for every word of a title onwards (so "dja" finds "Intro to Django")
+and one per tag name, and answers lookups with a bisect.
+
+Saves and deletes patch the list in place.  Each one takes the next number
+from a counter in the shared cache and stores the change under it, so the
+other processes notice on their next lookup that they are behind and replay
+the changes they missed.  The counter belongs to an *epoch*, the version of
+the ``autocomplete`` tag; a process that finds a change missing from the
+cache, is too far behind or sees a new epoch loads the whole list again.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blogengine import replicas
+from blogengine.cache import bump, get_cache, get_versions
+from blogengine.models import Post, Tag
+from blogengine.search import tokenize
+
+AUTOCOMPLETE_TAG = 'autocomplete'
+
+MAX_SUGGESTIONS = 10
+
+# How long a change is kept for other processes to replay, and how many
+# changes they replay before loading the whole list instead
+CHANGE_TIMEOUT = 60 * 60
+MAX_REPLAYED_CHANGES = 100
+
+
+def post_entries(post):
+	words = tokenize(post.title.lower())
+	return [(u' '.join(words[start:]), post.title, post.get_absolute_url())
+		for start in range(len(words))]
+
+
+def tag_entries(tag):
+	return [(u' '.join(tokenize(tag.name.lower())), tag.name, tag.get_absolute_url())]
+
+
+def _counter_key(epoch):
+	return 'blogengine:autocomplete:%s' % epoch
+
+
+def _change_key(epoch, number):
+	return 'blogengine:autocomplete:%s:%d' % (epoch, number)
+
+
+def new_epoch():
+	"""Start counting changes afresh; every process loads the whole list again."""
+	bump([AUTOCOMPLETE_TAG])
+	epoch, = get_versions([AUTOCOMPLETE_TAG])
+	get_cache().add(_counter_key(epoch), 0, None)
+	return epoch
+
+
+def shared_position():
+	"""
+	``(epoch, number)``: the current epoch and how many changes were made in
+	it.  A counter missing from the cache can't say which changes it
+	counted, so that starts a new epoch.
+	"""
+	cache = get_cache()
+	epoch, = get_versions([AUTOCOMPLETE_TAG])
+	number = cache.get(_counter_key(epoch))
+	if number is None:
+		epoch = new_epoch()
+		number = cache.get(_counter_key(epoch), 0)
+	return epoch, number
+
+
+class PrefixIndex(object):
+	def __init__(self):
+		self._lock = threading.Lock()
+		# The shared position the entries are current with
+		self.epoch = None
+		self.number = 0
+		self.entries = []
+		self.sources = {}
+
+	def _add(self, source, entries):
+		for entry in entries:
+			insort(self.entries, entry)
+		self.sources[source] = entries
+
+	def _remove(self, source):
+		for entry in self.sources.pop(source, ()):
+			index = bisect_left(self.entries, entry)
+			if index < len(self.entries) and self.entries[index] == entry:
+				del self.entries[index]
+
+	def _replace(self, source, entries):
+		self._remove(source)
+		self._add(source, entries)
+
+	def load(self, position):
+		"""Load every entry; ``position`` must be read before, so no change is missed."""
+		sources = {}
+		# Kept until the version moves on, so it can't come from a lagging replica
+		with replicas.primary():
+			for post in Post.on_site.only('title', 'slug', 'pub_date'):
+				sources[('post', post.pk)] = post_entries(post)
+			for tag in Tag.objects.only('name', 'slug'):
+				sources[('tag', tag.pk)] = tag_entries(tag)
+		entries = sorted(entry for source_entries in sources.values() for entry in source_entries)
+		with self._lock:
+			(self.epoch, self.number), self.entries, self.sources = position, entries, sources
+
+	def replay(self, epoch, number):
+		"""Apply the changes up to ``number`` this process missed; False if it can't."""
+		if epoch != self.epoch or not self.number <= number <= self.number + MAX_REPLAYED_CHANGES:
+			return False
+		start = self.number + 1
+		keys = [_change_key(epoch, n) for n in range(start, number + 1)]
+		changes = get_cache().get_many(keys)
+		if len(changes) < len(keys):
+			return False
+		with self._lock:
+			if self.epoch != epoch:
+				return False
+			# Another thread may have got some of the way already
+			for n in range(self.number + 1, number + 1):
+				self._replace(*changes[_change_key(epoch, n)])
+			self.number = max(self.number, number)
+		return True
+
+	def ensure_current(self):
+		epoch, number = shared_position()
+		if (epoch, number) != (self.epoch, self.number) and not self.replay(epoch, number):
+			self.load((epoch, number))
+
+	def update(self, source, entries):
+		"""Replace the entries of ``source``, e.g. ``('post', pk)``, with ``entries``."""
+		cache = get_cache()
+		epoch, number = shared_position()
+		try:
+			number = cache.incr(_counter_key(epoch))
+		except ValueError:
+			# The counter was evicted since
+			new_epoch()
+			return
+		cache.set(_change_key(epoch, number), (source, entries), CHANGE_TIMEOUT)
+		with self._lock:
+			# Only apply it if it is the next change; otherwise the next
+			# lookup replays everything up to it in order
+			if (self.epoch, self.number) == (epoch, number - 1):
+				self._replace(source, entries)
+				self.number = number
+
+	def lookup(self, prefix, limit=MAX_SUGGESTIONS):
+		"""Suggestions whose title or tag name has a word starting with ``prefix``."""
+		prefix = u' '.join(tokenize(prefix.lower()))
+		if not prefix:
+			return []
+		self.ensure_current()
+		suggestions, seen = [], set()
+		with self._lock:
+			index = bisect_left(self.entries, (prefix,))
+			while index < len(self.entries) and len(suggestions) < limit:
+				term, label, url = self.entries[index]
+				if not term.startswith(prefix):
+					break
+				if url not in seen:
+					seen.add(url)
+					suggestions.append({'label': label, 'url': url})
+				index += 1
+		return suggestions
+
+
+prefix_index = PrefixIndex()
+
+
+@receiver(post_save, sender=Post)
+def update_post(sender, instance, **kwargs):
+	on_site = instance.site_id == settings.SITE_ID
+	prefix_index.update(('post', instance.pk), post_entries(instance) if on_site else [])
+
+
+@receiver(post_save, sender=Tag)
+def update_tag(sender, instance, **kwargs):
+	prefix_index.update(('tag', instance.pk), tag_entries(instance))
+
+
+@receiver(post_delete, sender=Post)
+def remove_post(sender, instance, **kwargs):
+	prefix_index.update(('post', instance.pk), [])
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag(sender, instance, **kwargs):
+	prefix_index.update(('tag', instance.pk), [])
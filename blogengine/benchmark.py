@@ -0,0 +1,455 @@
+"""
+Throughput and latency benchmarks over a synthetic corpus.
+
+``build_corpus()`` fills the database with posts spread over categories and
+tags (with a realistic, skewed fan-out) using bulk inserts, then rebuilds the
+derived tables the way a real site would have them.  ``run_load()`` sends a
+concurrent mix of requests for every public route straight through the WSGI
+handler and records latency and query counts per route (and, with
+``instrument``, the mean SQL, template and Markdown time of each view).
+Results are plain dicts that serialize to JSON, and ``compare()`` diffs two
+runs.  ``query_plans()`` shows how the listing queries are planned and how
+long they take with and without their composite indexes, and
+``startup_times()`` how long a fresh process takes to import the application
+and answer its first request, with and without warming up.
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from cStringIO import StringIO
+from datetime import timedelta
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.sites.models import Site
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blogengine import metrics
+from blogengine.markup import render_key, render_markdown, render_summary
+from blogengine.models import ArchiveMonth, Category, Post, Tag
+from blogengine.pagination import ORDERING, POSTS_PER_PAGE
+from blogengine.transfer import rebuild_derived
+
+WORDS = ("python django markdown template cache query index database server deploy "
+	"request response render static archive feed search category tag blog post page "
+	"worker process thread memory latency throughput benchmark profile module package").split()
+
+CODE_BLOCK = "```python\ndef handler(request):\n    return render(request, 'index.html', {'n': %d})\n```"
+
+ROUTES = ('index', 'post', 'category', 'tag', 'archive', 'search', 'flatpage')
+
+
+def _paragraph(rng, words):
+	return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _bodies(rng, variants=50):
+	"""
+	A fixed pool of post bodies, rendered once each, so building a large
+	corpus doesn't spend its time in Markdown.
+	"""
+	bodies = []
+	for n in range(variants):
+		parts = ["## %s" % _paragraph(rng, 4)]
+		for _ in range(rng.randint(2, 8)):
+			parts.append(_paragraph(rng, rng.randint(20, 80)))
+		if n % 3 == 0:
+			parts.append(CODE_BLOCK % n)
+		text = "\n\n".join(parts)
+		html = render_markdown(text)
+		excerpt, teaser_html = render_summary(html)
+		bodies.append((text, html, excerpt, teaser_html, render_key(text)))
+	return bodies
+
+
+def build_corpus(posts=1000, categories=20, tags=200, tags_per_post=3, sites=1, seed=0, batch_size=500):
+	"""
+	Bulk-insert a synthetic corpus and rebuild the tables derived from it.
+	With ``sites`` above one, the posts are dealt out between the current
+	site and ``sites - 1`` others.
+	"""
+	rng = random.Random(seed)
+
+	with transaction.atomic():
+		Category.objects.bulk_create([
+			Category(name='Category %d' % n, description=_paragraph(rng, 10), slug='category-%d' % n)
+			for n in range(categories)])
+		Tag.objects.bulk_create([Tag(name='Tag %d' % n, slug='tag-%d' % n) for n in range(tags)])
+		category_ids = list(Category.objects.values_list('pk', flat=True))
+		tag_ids = list(Tag.objects.values_list('pk', flat=True))
+
+		page = FlatPage.objects.create(url='/about/', title='About me', content=_paragraph(rng, 50))
+		page.sites.add(settings.SITE_ID)
+		site_ids = [settings.SITE_ID] + [
+			Site.objects.create(domain='site-%d.example.com' % n, name='Site %d' % n).pk for n in range(1, sites)]
+
+		bodies = _bodies(rng)
+		now = timezone.now()
+		first_pk = (Post.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+		for start in range(0, posts, batch_size):
+			batch = []
+			for n in range(start, min(start + batch_size, posts)):
+				text, html, excerpt, teaser_html, key = rng.choice(bodies)
+				batch.append(Post(
+					title=_paragraph(rng, 5)[:-1],
+					slug='post-%d' % n,
+					pub_date=now - timedelta(hours=n * 7),
+					text=text, text_html=html, text_html_key=key, excerpt=excerpt, teaser_html=teaser_html,
+					site_id=site_ids[n % len(site_ids)],
+					# Popular categories and tags get most of the posts
+					category_id=category_ids[int(rng.paretovariate(1.2)) % len(category_ids)]))
+			Post.objects.bulk_create(batch)
+
+		post_ids = Post.objects.filter(pk__gte=first_pk).values_list('pk', flat=True)
+		through = Post.tags.through
+		links = []
+		for post_id in post_ids.iterator():
+			for tag_id in set(tag_ids[int(rng.paretovariate(1.0)) % len(tag_ids)] for _ in range(tags_per_post)):
+				links.append(through(post_id=post_id, tag_id=tag_id))
+			if len(links) >= batch_size:
+				through.objects.bulk_create(links)
+				links = []
+		through.objects.bulk_create(links)
+
+	rebuild_derived()
+
+
+def route_urls(rng, count=50):
+	"""A sample of request paths for every route."""
+	last = Post.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+	sample = rng.sample(xrange(1, last + 1), min(count, last))
+	posts = list(Post.on_site.filter(pk__in=sample).values_list('slug', 'pub_date'))
+	categories = list(Category.objects.values_list('slug', flat=True)[:count])
+	tags = list(Tag.objects.values_list('slug', flat=True)[:count])
+	months = list(ArchiveMonth.objects.filter(site=settings.SITE_ID).values_list('year', 'month')[:count])
+	pages = list(FlatPage.objects.values_list('url', flat=True)[:count])
+	return {
+		'index': ['/'] + ['/%d/' % n for n in range(2, 6)],
+		'post': [Post(slug=slug, pub_date=pub_date).get_absolute_url() for slug, pub_date in posts],
+		'category': ['/category/%s/' % slug for slug in categories],
+		'tag': ['/tag/%s/' % slug for slug in tags],
+		'archive': ['/%d/%d/' % month for month in months],
+		'search': ['/search?q=%s' % word for word in rng.sample(WORDS, 10)],
+		'flatpage': pages,
+	}
+
+
+def _percentile(ordered, fraction):
+	if not ordered:
+		return None
+	return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class LoadRunner(object):
+	def __init__(self, urls, use_cache=False):
+		self.urls = urls
+		self.use_cache = use_cache
+		self.handler = WSGIHandler()
+		self.lock = threading.Lock()
+		self.samples = dict((route, []) for route in urls)
+		self.errors = dict((route, 0) for route in urls)
+
+	def request(self, path):
+		path, _, query = path.partition('?')
+		environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'REQUEST_METHOD': 'GET',
+			'HTTP_HOST': 'testserver', 'wsgi.input': StringIO()}
+		if not self.use_cache:
+			# Any session cookie makes the page cache step aside
+			environ['HTTP_COOKIE'] = '%s=benchmark' % settings.SESSION_COOKIE_NAME
+		setup_testing_defaults(environ)
+		status = []
+		result = self.handler(environ, lambda s, headers, exc_info=None: status.append(s))
+		try:
+			for chunk in result:
+				pass
+		finally:
+			if hasattr(result, 'close'):
+				result.close()
+		return int(status[0].split()[0])
+
+	def worker(self, jobs):
+		connection.use_debug_cursor = True
+		try:
+			for route, path in jobs:
+				started = time.time()
+				status = self.request(path)
+				elapsed = time.time() - started
+				queries = len(connection.queries)
+				with self.lock:
+					self.samples[route].append((elapsed, queries))
+					if status != 200:
+						self.errors[route] += 1
+		finally:
+			connection.use_debug_cursor = None
+			if threading.current_thread().name != 'MainThread':
+				connection.close()
+
+	def run(self, requests, concurrency, rng):
+		routes = sorted(self.urls)
+		jobs = [(route, rng.choice(self.urls[route]))
+			for route in (routes[n % len(routes)] for n in range(requests))
+			if self.urls[route]]
+		started = time.time()
+		if concurrency == 1:
+			self.worker(jobs)
+		else:
+			threads = [threading.Thread(target=self.worker, args=(jobs[n::concurrency],))
+				for n in range(concurrency)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+		return time.time() - started
+
+
+def summarize(samples, errors, duration):
+	latencies = sorted(elapsed for elapsed, queries in samples)
+	count = len(samples)
+	return {
+		'requests': count,
+		'errors': errors,
+		'requests_per_second': count / duration if duration else None,
+		'p50_ms': _percentile(latencies, 0.50) * 1000 if count else None,
+		'p95_ms': _percentile(latencies, 0.95) * 1000 if count else None,
+		'p99_ms': _percentile(latencies, 0.99) * 1000 if count else None,
+		'queries_per_request': float(sum(queries for elapsed, queries in samples)) / count if count else None,
+	}
+
+
+# Per-view means reported by run_load(instrument=True)
+VIEW_METRICS = ('sql_ms', 'template_ms', 'markdown_ms')
+
+
+def view_means():
+	"""Mean of each of ``VIEW_METRICS`` per view, from ``blogengine.metrics``."""
+	views = {}
+	for view_name, histograms in metrics.snapshot()['views'].items():
+		views[view_name] = dict((name, histograms[name]['sum'] / histograms[name]['count'])
+			for name in VIEW_METRICS if histograms.get(name, {}).get('count'))
+	return views
+
+
+def run_load(requests=1000, concurrency=4, routes=ROUTES, use_cache=False, seed=0, instrument=False):
+	"""
+	Run the request mix and return the per-route and overall results, plus
+	the ``view_means()`` of the run with ``instrument``.
+	"""
+	rng = random.Random(seed)
+	urls = dict((route, paths) for route, paths in route_urls(rng).items() if route in routes)
+	with override_settings(BLOGENGINE_INSTRUMENTATION=instrument, BLOGENGINE_SQL_SAMPLE_RATE=1.0):
+		metrics.reset()
+		runner = LoadRunner(urls, use_cache=use_cache)
+		duration = runner.run(requests, concurrency, rng)
+
+	results = {
+		'posts': Post.objects.count(),
+		'concurrency': concurrency,
+		'use_cache': use_cache,
+		'duration_s': duration,
+		'routes': {},
+	}
+	everything = []
+	for route in sorted(urls):
+		everything.extend(runner.samples[route])
+		results['routes'][route] = summarize(runner.samples[route], runner.errors[route], duration)
+	results['overall'] = summarize(everything, sum(runner.errors.values()), duration)
+	if instrument:
+		results['views'] = view_means()
+	return results
+
+
+def compare(results, baseline, tolerance=0.1):
+	"""
+	Compare ``results`` with a ``baseline`` run.  Returns per-route deltas
+	and the names of the routes whose p95 latency, throughput or query
+	count regressed by more than ``tolerance``.
+	"""
+	deltas, regressions = {}, []
+	for route, current in sorted(results['routes'].items()):
+		previous = baseline.get('routes', {}).get(route)
+		if not previous:
+			continue
+		delta = {}
+		for metric in ('requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+			if current.get(metric) is not None and previous.get(metric):
+				delta[metric] = (current[metric] - previous[metric]) / previous[metric]
+		deltas[route] = delta
+		if (delta.get('p95_ms', 0) > tolerance
+				or delta.get('requests_per_second', 0) < -tolerance
+				or delta.get('queries_per_request', 0) > 0):
+			regressions.append(route)
+	return deltas, regressions
+
+
+# Composite indexes that query_plans() compares the listings with and without
+LISTING_INDEXES = (('site_id', 'pub_date'), ('site_id', 'category_id', 'pub_date'))
+
+
+def plan_queries():
+	"""The listing queries whose plans the composite indexes are for, by name."""
+	posts = Post.on_site.for_listing().order_by(*ORDERING)
+	category = Post.on_site.values('category').annotate(count=Count('pk')).order_by('-count').first()
+	middle = posts.values_list('pub_date', flat=True)[Post.on_site.count() // 2]
+	month = middle.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+	return {
+		'index': posts[:POSTS_PER_PAGE],
+		'index_deep_page': posts.filter(pub_date__lt=middle)[:POSTS_PER_PAGE],
+		'category': posts.filter(category=category and category['category'])[:POSTS_PER_PAGE],
+		'archive': posts.filter(pub_date__gte=month, pub_date__lt=month + timedelta(days=31))[:POSTS_PER_PAGE],
+		'post': posts.filter(slug=posts.values_list('slug', flat=True)[0]),
+	}
+
+
+def explain(sql, params):
+	cursor = connection.cursor()
+	if connection.vendor == 'sqlite':
+		# The sqlite3 module caches statements by their text, and a cached
+		# EXPLAIN isn't prepared again after the indexes change
+		cursor.execute('PRAGMA schema_version')
+		version, = cursor.fetchone()
+		cursor.execute('EXPLAIN QUERY PLAN /* schema %d */ ' % version + sql, params)
+		return [row[-1] for row in cursor.fetchall()]
+	cursor.execute(('EXPLAIN ANALYZE ' if connection.vendor == 'postgresql' else 'EXPLAIN ') + sql, params)
+	return [' '.join(unicode(column) for column in row) for row in cursor.fetchall()]
+
+
+def time_query(sql, params, repeat):
+	cursor = connection.cursor()
+	timings = []
+	for _ in range(repeat):
+		started = time.time()
+		cursor.execute(sql, params)
+		cursor.fetchall()
+		timings.append(time.time() - started)
+	return _percentile(sorted(timings), 0.50) * 1000
+
+
+def listing_indexes():
+	"""``{name: columns}`` of the ``LISTING_INDEXES`` on the post table."""
+	table = Post._meta.db_table
+	cursor = connection.cursor()
+	indexes = {}
+	if connection.vendor == 'sqlite':
+		# Django 1.7's introspection can't read newer SQLite's index_list
+		cursor.execute('PRAGMA index_list(%s)' % connection.ops.quote_name(table))
+		for row in cursor.fetchall():
+			name, unique = row[1], row[2]
+			cursor.execute('PRAGMA index_info(%s)' % connection.ops.quote_name(name))
+			if not unique:
+				indexes[name] = tuple(column for seqno, cid, column in sorted(cursor.fetchall()))
+	else:
+		for name, constraint in connection.introspection.get_constraints(cursor, table).items():
+			if constraint['index'] and not constraint['unique']:
+				indexes[name] = tuple(constraint['columns'])
+	return dict((name, columns) for name, columns in indexes.items() if columns in LISTING_INDEXES)
+
+
+def query_plans(repeat=20):
+	"""
+	Plans and median timings of the ``plan_queries()`` with the composite
+	listing indexes and, after dropping them for the measurement, without.
+	The indexes are recreated before returning.  Only the SQLite path has
+	been run so far; the PostgreSQL one (``EXPLAIN ANALYZE``) has no
+	recorded results yet.
+	"""
+	queries = dict((name, queryset.query.get_compiler(connection.alias).as_sql())
+		for name, queryset in plan_queries().items())
+
+	def measure():
+		return dict((name, {'plan': explain(sql, params), 'median_ms': time_query(sql, params, repeat)})
+			for name, (sql, params) in queries.items())
+
+	results = {'vendor': connection.vendor, 'with_indexes': measure()}
+	indexes = listing_indexes()
+	quote = connection.ops.quote_name
+	table = quote(Post._meta.db_table)
+	editor = connection.schema_editor()
+	cursor = connection.cursor()
+	try:
+		for name in indexes:
+			cursor.execute(editor.sql_delete_index % {'name': quote(name), 'table': table})
+		results['without_indexes'] = measure()
+	finally:
+		for name, columns in indexes.items():
+			cursor.execute(editor.sql_create_index % {'name': quote(name), 'table': table,
+				'columns': ', '.join(quote(column) for column in columns), 'extra': ''})
+	results['dropped_indexes'] = sorted(indexes)
+	return results
+
+
+
+# Run by startup() in a fresh interpreter: import the WSGI application
+# against the benchmark's database, answer one request and report the
+# timings and which of the slow modules got imported, as JSON.
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.time()
+from django.conf import settings
+settings.DATABASES['default'] = json.loads(sys.argv[1])
+from django_blog.wsgi import application
+imported = time.time()
+
+from cStringIO import StringIO
+from wsgiref.util import setup_testing_defaults
+path, _, query = sys.argv[2].partition('?')
+environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': 'testserver',
+	'HTTP_COOKIE': '%s=benchmark' % settings.SESSION_COOKIE_NAME, 'wsgi.input': StringIO()}
+setup_testing_defaults(environ)
+status = []
+result = application(environ, lambda s, headers, exc_info=None: status.append(s))
+''.join(result)
+responded = time.time()
+
+print json.dumps({'import_ms': (imported - started) * 1000, 'first_response_ms': (responded - imported) * 1000,
+	'status': int(status[0].split()[0]), 'loaded': sorted(name for name in json.loads(sys.argv[3]) if name in sys.modules)})
+"""
+
+# Slow imports that startup() reports as loaded or not
+SLOW_MODULES = ('markdown2', 'pygments.lexers', 'pygments.formatters', 'numpy', 'scipy')
+
+
+def startup(urls, warm_up=False, repeat=3):
+	"""
+	For each ``{route: path}`` of ``urls``, the median time ``repeat`` fresh
+	processes take to import the WSGI application and then to answer their
+	first request for ``path``, with or without ``blogengine.warmup``.  Under
+	gunicorn, with the application preloaded, the import (and warm-up)
+	happens once in the master, and a worker's time to first response is
+	just the latter.
+	"""
+	database = dict((key, connection.settings_dict[key])
+		for key in ('ENGINE', 'NAME', 'USER', 'PASSWORD', 'HOST', 'PORT'))
+	env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'django_blog.settings'),
+		DJANGO_WARMUP='1' if warm_up else '0')
+	results = {}
+	for route, path in sorted(urls.items()):
+		runs = [json.loads(subprocess.check_output(
+			[sys.executable, '-c', STARTUP_SCRIPT, json.dumps(database), path, json.dumps(SLOW_MODULES)],
+			cwd=settings.BASE_DIR, env=env)) for _ in range(repeat)]
+		results[route] = {
+			'import_ms': _percentile(sorted(run['import_ms'] for run in runs), 0.50),
+			'first_response_ms': _percentile(sorted(run['first_response_ms'] for run in runs), 0.50),
+			'status': runs[-1]['status'],
+			'loaded': runs[-1]['loaded'],
+		}
+	return results
+
+
+def startup_times(routes=ROUTES, seed=0, repeat=3):
+	"""``startup()`` for one path of each of ``routes``, without and with warming up."""
+	urls = dict((route, paths[0]) for route, paths in route_urls(random.Random(seed), count=1).items()
+		if route in routes and paths)
+	return {
+		'without_warmup': startup(urls, repeat=repeat),
+		'with_warmup': startup(urls, warm_up=True, repeat=repeat),
+	}
@@ -0,0 +1,230 @@
+"""
+Full-page response cache for the blog views.
+
+Every cached page depends on a handful of *tags*, derived from its URL
+before the view runs: ``index``, ``search``, ``post:<slug>``,
+``category:<slug>``, ``tag:<slug>`` and ``archive:<year>-<month>``, plus
+``global`` for everything.  Each tag has a version stored in the cache and
+the page key includes the versions of its tags, so invalidating a tag is a
+single write that orphans every page built from it.  The versions only
+reach every process serving the site if ``BLOGENGINE_CACHE`` is shared
+between them, which ``LocMemCache`` is not.
+
+The receivers at the bottom of this module bump exactly the tags a change
+can affect: editing a post evicts its own page, the index, search results,
+its month archive, its category and tag pages (before and after the edit)
+and the pages listing it as a related post.  Every page also depends on
+``archives``, which is bumped when a month appears in or disappears from
+the Archives sidebar, and on ``taxonomy``, bumped when a category or tag
+appears in or disappears from the Categories and Tags sidebar.  Taxonomy,
+site and flat page edits are rare and show up on most pages, so they bump
+``global``.
+"""
+
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.sites.models import Site
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blogengine import replicas
+from blogengine.models import Category, Post, RelatedPost, Tag
+
+GLOBAL_TAG = 'global'
+
+ARCHIVES_TAG = 'archives'
+
+TAXONOMY_TAG = 'taxonomy'
+
+
+def get_cache():
+	return caches[getattr(settings, 'BLOGENGINE_CACHE', 'default')]
+
+
+# Shown by the commands that change what pages show from outside the server
+PROCESS_LOCAL_WARNING = ("The cache is local to each process: restart the server to stop it serving "
+	"the pages it cached before this command ran")
+
+
+def is_process_local():
+	"""Whether bumps made by this process stay out of sight of the others."""
+	return isinstance(get_cache(), LocMemCache)
+
+
+def _version_key(tag):
+	return 'blogengine:version:%s' % tag
+
+
+def _new_version():
+	# Random rather than incrementing, so a version evicted from the cache
+	# can never come back with a value an old page was keyed on.  The time
+	# of the bump follows, for Last-Modified.
+	return '%s-%d' % (uuid.uuid4().hex[:12], time.time())
+
+
+def get_versions(tags):
+	cache = get_cache()
+	keys = [_version_key(tag) for tag in tags]
+	versions = cache.get_many(keys)
+	for key in keys:
+		if key not in versions:
+			cache.add(key, _new_version(), None)
+			versions[key] = cache.get(key)
+	return [versions[key] for key in keys]
+
+
+def bump(tags):
+	"""Invalidate everything cached under any of ``tags``."""
+	get_cache().set_many(dict((_version_key(tag), _new_version()) for tag in set(tags)), None)
+
+
+def modified(versions):
+	"""When the newest of ``versions`` was made, as an aware datetime."""
+	# Versions made before they carried a time count as brand new
+	return datetime.fromtimestamp(max(int(version.partition('-')[2] or time.time()) for version in versions),
+		timezone.utc)
+
+
+def index_tags(kwargs):
+	return ['index']
+
+
+def post_page_tags(kwargs):
+	return ['post:%s' % kwargs['slug']]
+
+
+def category_tags(kwargs):
+	return ['category:%s' % kwargs['slug']]
+
+
+def tag_tags(kwargs):
+	return ['tag:%s' % kwargs['slug']]
+
+
+def search_tags(kwargs):
+	return ['search']
+
+
+def archive_tags(kwargs):
+	return ['archive:%s-%d' % (kwargs['year'], int(kwargs['month']))]
+
+
+def is_cacheable(request):
+	# Anything with a session may be personalised (and would need a DB hit
+	# to find out), so only cookieless GETs are served from the cache.
+	return (request.method in ('GET', 'HEAD')
+		and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+def page_versions(tags):
+	"""Versions of everything shown on a page that depends on ``tags``."""
+	return get_versions([GLOBAL_TAG, ARCHIVES_TAG, TAXONOMY_TAG] + tags)
+
+
+def page_key(request, tags):
+	versions = page_versions(tags)
+	digest = hashlib.md5(request.get_host())
+	digest.update(request.get_full_path())
+	digest.update(':'.join(versions))
+	return 'blogengine:page:%s' % digest.hexdigest()
+
+
+def cache_page_on(tags_for):
+	"""
+	Cache a view's responses under the tags ``tags_for(kwargs)`` returns
+	for the URL keyword arguments.
+	"""
+	def decorator(view):
+		@wraps(view)
+		def wrapped(request, *args, **kwargs):
+			if not is_cacheable(request):
+				return view(request, *args, **kwargs)
+
+			cache = get_cache()
+			key = page_key(request, tags_for(kwargs))
+			response = cache.get(key)
+			if response is not None:
+				return response
+
+			response = view(request, *args, **kwargs)
+			if request.method == 'GET' and response.status_code == 200 and not response.streaming:
+				timeout = getattr(settings, 'BLOGENGINE_CACHE_TIMEOUT', 60 * 60)
+				if hasattr(response, 'render') and callable(response.render):
+					# Rendering runs the queries, so the timeout is only known after
+					response.add_post_render_callback(
+						lambda r: cache.set(key, r, replicas.cache_timeout(timeout)))
+				else:
+					cache.set(key, response, replicas.cache_timeout(timeout))
+			return response
+		return wrapped
+	return decorator
+
+
+def post_tags(post):
+	"""Tags of every page that shows ``post``, including as a related post."""
+	pub_date = post.pub_date
+	if timezone.is_aware(pub_date):
+		pub_date = timezone.localtime(pub_date)
+	tags = ['index', 'search', 'post:%s' % post.slug,
+		'archive:%d-%d' % (pub_date.year, pub_date.month)]
+	if post.category_id:
+		tags.append('category:%s' % post.category.slug)
+	if post.pk:
+		tags.extend('tag:%s' % slug for slug in post.tags.values_list('slug', flat=True))
+		tags.extend('post:%s' % slug for slug in
+			RelatedPost.objects.filter(related=post.pk).values_list('post__slug', flat=True))
+	return tags
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+	instance._cached_page_tags = post_tags(instance)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, **kwargs):
+	# The old slug, date and category may differ from the new ones, and
+	# the pages built from them need evicting too.
+	tags = post_tags(instance)
+	if getattr(instance, '_original', None):
+		tags += post_tags(instance._original)
+	bump(tags)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+	bump(getattr(instance, '_cached_page_tags', []))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+	if action == 'pre_clear' and not reverse:
+		instance._cached_page_tags = post_tags(instance)
+	elif action in ('post_add', 'post_remove') and not reverse:
+		bump(post_tags(instance) +
+			['tag:%s' % slug for slug in Tag.objects.filter(pk__in=pk_set).values_list('slug', flat=True)])
+	elif action == 'post_clear' and not reverse:
+		bump(getattr(instance, '_cached_page_tags', []))
+	elif action in ('post_add', 'post_remove', 'post_clear'):
+		bump([GLOBAL_TAG])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_save, sender=FlatPage)
+@receiver(post_delete, sender=FlatPage)
+def invalidate_everything(sender, **kwargs):
+	bump([GLOBAL_TAG])
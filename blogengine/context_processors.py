@@ -0,0 +1,24 @@
+from django.conf import settings
+
+from blogengine import replicas
+from blogengine.archive import month_archives as build_month_archives
+from blogengine.cache import ARCHIVES_TAG, get_versions
+from blogengine.taxonomy import summary
+
+# The sidebar only changes when a month is added or removed, so each process
+# keeps the last one it built until the shared archives version moves on.
+# It is read from the primary, which the version is bumped on.
+_month_archives = {}
+
+def month_archives(request):
+	key = (settings.SITE_ID, get_versions([ARCHIVES_TAG])[0])
+	if key not in _month_archives:
+		with replicas.primary():
+			archives = build_month_archives(settings.SITE_ID)
+		_month_archives.clear()
+		_month_archives[key] = archives
+	return {'month_archives': _month_archives[key]}
+
+def taxonomy(request):
+	counts = summary()
+	return {'sidebar_categories': counts['categories'], 'tag_cloud': counts['tag_cloud']}
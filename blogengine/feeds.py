@@ -0,0 +1,232 @@
+"""
+RSS and Atom feeds for the whole blog and for every category and tag.
+
+Feed readers poll constantly, so a feed is serialized once per change to the
+posts in it: the bytes, a gzipped copy and an ETag are stored in the cache
+under the feed's own tag (``feed:site``, ``feed:category:<slug>`` or
+``feed:tag:<slug>``) and served from there with conditional GET support.
+The receivers at the bottom only bump the feeds a changed post is, or was,
+part of.  Items use the post HTML stored at save time, so building a feed
+never runs Markdown.
+"""
+
+import gzip
+import hashlib
+from cStringIO import StringIO
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import parse_http_date_safe
+
+from blogengine import replicas
+from blogengine.cache import GLOBAL_TAG, bump, get_cache, get_versions
+from blogengine.models import Category, Post, Tag
+
+FEED_SIZE = 20
+
+
+class PostFeed(Feed):
+	feed_type = Rss201rev2Feed
+	title = "Jason Shaffer's Blog"
+	link = '/'
+	description = "I'm a Software Developer and Systems Administrator. This is my blog..."
+
+	def get_posts(self, obj):
+		return Post.on_site.all()
+
+	def items(self, obj):
+		return self.get_posts(obj).with_taxonomy()[:FEED_SIZE]
+
+	def item_title(self, item):
+		return item.title
+
+	def item_description(self, item):
+		return item.get_text_html()
+
+	def item_pubdate(self, item):
+		return item.pub_date
+
+	def item_updateddate(self, item):
+		return item.updated_at
+
+	def item_categories(self, item):
+		categories = [tag.name for tag in item.tags.all()]
+		if item.category:
+			categories.insert(0, item.category.name)
+		return categories
+
+
+class CategoryPostFeed(PostFeed):
+	def get_object(self, request, slug):
+		return Category.objects.get(slug=slug)
+
+	def title(self, obj):
+		return "Jason Shaffer's Blog: %s" % obj.name
+
+	def link(self, obj):
+		return obj.get_absolute_url()
+
+	def description(self, obj):
+		return obj.description
+
+	def get_posts(self, obj):
+		return Post.on_site.filter(category=obj)
+
+
+class TagPostFeed(PostFeed):
+	def get_object(self, request, slug):
+		return Tag.objects.get(slug=slug)
+
+	def title(self, obj):
+		return "Jason Shaffer's Blog: %s" % obj.name
+
+	def link(self, obj):
+		return obj.get_absolute_url()
+
+	def description(self, obj):
+		return "Posts tagged %s" % obj.name
+
+	def get_posts(self, obj):
+		return Post.on_site.filter(tags=obj)
+
+
+class AtomPostFeed(PostFeed):
+	feed_type = Atom1Feed
+	subtitle = PostFeed.description
+
+
+class AtomCategoryPostFeed(CategoryPostFeed):
+	feed_type = Atom1Feed
+
+	def subtitle(self, obj):
+		return obj.description
+
+
+class AtomTagPostFeed(TagPostFeed):
+	feed_type = Atom1Feed
+
+	def subtitle(self, obj):
+		return "Posts tagged %s" % obj.name
+
+
+FEEDS = {
+	('site', 'rss'): PostFeed(),
+	('site', 'atom'): AtomPostFeed(),
+	('category', 'rss'): CategoryPostFeed(),
+	('category', 'atom'): AtomCategoryPostFeed(),
+	('tag', 'rss'): TagPostFeed(),
+	('tag', 'atom'): AtomTagPostFeed(),
+}
+
+
+def feed_tag(kind, slug=None):
+	return 'feed:%s:%s' % (kind, slug) if slug else 'feed:%s' % kind
+
+
+def _gzip(data):
+	buf = StringIO()
+	# A fixed mtime keeps the compressed bytes stable between builds
+	with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as compressed:
+		compressed.write(data)
+	return buf.getvalue()
+
+
+def build_feed(request, kind, format, slug=None):
+	args = (slug,) if slug else ()
+	response = FEEDS[kind, format](request, *args)
+	body = response.content
+	return {
+		'content_type': response['Content-Type'],
+		'last_modified': response.get('Last-Modified'),
+		'etag': '"%s"' % hashlib.md5(body).hexdigest(),
+		'body': body,
+		'gzip': _gzip(body),
+	}
+
+
+def _not_modified(request, entry):
+	if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+	if if_none_match:
+		return entry['etag'] in [etag.strip() for etag in if_none_match.split(',')] or if_none_match.strip() == '*'
+	if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+	last_modified = parse_http_date_safe(entry['last_modified'] or '')
+	return bool(if_modified_since and last_modified and last_modified <= if_modified_since)
+
+
+def serve_feed(request, kind, format, slug=None):
+	cache = get_cache()
+	tag = feed_tag(kind, slug)
+	key = 'blogengine:feed:%s:%s:%s:%s' % (settings.SITE_ID, tag, format, ':'.join(get_versions([GLOBAL_TAG, tag])))
+	entry = cache.get(key)
+	if entry is None:
+		entry = build_feed(request, kind, format, slug)
+		cache.set(key, entry, replicas.cache_timeout(None))
+
+	if _not_modified(request, entry):
+		response = HttpResponseNotModified()
+	elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+		response = HttpResponse(entry['gzip'], content_type=entry['content_type'])
+		response['Content-Encoding'] = 'gzip'
+	else:
+		response = HttpResponse(entry['body'], content_type=entry['content_type'])
+
+	response['ETag'] = entry['etag']
+	if entry['last_modified']:
+		response['Last-Modified'] = entry['last_modified']
+	response['Vary'] = 'Accept-Encoding'
+	return response
+
+
+def _in_feed(post, posts):
+	newer = posts.filter(pub_date__gt=post.pub_date).exclude(pk=post.pk).order_by()
+	return len(newer.values_list('pk', flat=True)[:FEED_SIZE]) < FEED_SIZE
+
+
+def feed_tags(post, tag_slugs=None):
+	"""Tags of the feeds that show ``post`` as it is in memory."""
+	# The feeds of the post's own site, which need not be this process's
+	posts = Post.objects.filter(site=post.site_id)
+	tags = []
+	if _in_feed(post, posts):
+		tags.append(feed_tag('site'))
+	if post.category_id and _in_feed(post, posts.filter(category_id=post.category_id)):
+		tags.append(feed_tag('category', post.category.slug))
+	if tag_slugs is None:
+		tag_slugs = post.tags.values_list('slug', flat=True) if post.pk else []
+	for slug in tag_slugs:
+		if _in_feed(post, posts.filter(tags__slug=slug)):
+			tags.append(feed_tag('tag', slug))
+	return tags
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post_feeds(sender, instance, **kwargs):
+	tags = feed_tags(instance)
+	if getattr(instance, '_original', None):
+		tags += feed_tags(instance._original)
+	bump(tags)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_feeds(sender, instance, **kwargs):
+	instance._feed_tags = feed_tags(instance)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_feeds(sender, instance, **kwargs):
+	bump(getattr(instance, '_feed_tags', []))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tag_feeds(sender, instance, action, reverse, pk_set, **kwargs):
+	# Tags show up as item categories, so a post's other feeds change too
+	if reverse or action not in ('pre_clear', 'post_add', 'post_remove'):
+		return
+	if action == 'pre_clear':
+		pk_set = instance.tags.values_list('pk', flat=True)
+	slugs = Tag.objects.filter(pk__in=list(pk_set)).values_list('slug', flat=True)
+	bump(feed_tags(instance) + [feed_tag('tag', slug) for slug in slugs])
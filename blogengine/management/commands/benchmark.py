@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import sys
+import tempfile
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blogengine.benchmark import ROUTES, build_corpus, compare, query_plans, run_load, startup_times
+
+
+class Command(BaseCommand):
+	help = ("Build a synthetic corpus in a throwaway test database, load-test every "
+		"public route through the WSGI handler and report the results as JSON.")
+
+	option_list = BaseCommand.option_list + (
+		make_option('--posts', type='int', dest='posts', default=1000,
+			help='Number of posts in the corpus (default: 1000).'),
+		make_option('--categories', type='int', dest='categories', default=20),
+		make_option('--tags', type='int', dest='tags', default=200),
+		make_option('--tags-per-post', type='int', dest='tags_per_post', default=3),
+		make_option('--sites', type='int', dest='sites', default=1,
+			help='Number of sites the posts are spread over (default: 1).'),
+		make_option('--requests', type='int', dest='requests', default=2000,
+			help='Total number of requests to send (default: 2000).'),
+		make_option('--concurrency', type='int', dest='concurrency', default=4,
+			help='Number of concurrent client threads (default: 4).'),
+		make_option('--routes', dest='routes', default=','.join(ROUTES),
+			help='Comma-separated routes to exercise (default: %s).' % ','.join(ROUTES)),
+		make_option('--use-cache', action='store_true', dest='use_cache', default=False,
+			help='Let requests hit the full-page cache instead of rendering every time.'),
+		make_option('--instrument', action='store_true', dest='instrument', default=False,
+			help='Also report the mean SQL, template and Markdown time of each view.'),
+		make_option('--plans', action='store_true', dest='plans', default=False,
+			help='Also report the plans and timings of the listing queries with and without their indexes.'),
+		make_option('--startup', action='store_true', dest='startup', default=False,
+			help='Also report how long fresh processes take to import the application and '
+				'answer their first request, with and without warming up.'),
+		make_option('--seed', type='int', dest='seed', default=0),
+		make_option('--output', dest='output', default=None,
+			help='Write the JSON results to this file instead of stdout.'),
+		make_option('--baseline', dest='baseline', default=None,
+			help='JSON results of an earlier run to compare against.'),
+		make_option('--tolerance', type='float', dest='tolerance', default=0.1,
+			help='Relative slowdown that counts as a regression (default: 0.1).'),
+	)
+
+	def handle(self, *args, **options):
+		routes = [route for route in options['routes'].split(',') if route]
+		unknown = set(routes) - set(ROUTES)
+		if unknown:
+			raise CommandError("Unknown route(s): %s" % ", ".join(sorted(unknown)))
+
+		# Never touch the real database.  SQLite gets a file rather than the
+		# usual in-memory test database so the client threads share it.
+		test_file = None
+		if connection.vendor == 'sqlite':
+			test_file = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+			connection.settings_dict.setdefault('TEST', {})['NAME'] = test_file
+		old_name = connection.settings_dict['NAME']
+		connection.creation.create_test_db(verbosity=0, autoclobber=True)
+		try:
+			build_corpus(posts=options['posts'], categories=options['categories'],
+				tags=options['tags'], tags_per_post=options['tags_per_post'], sites=options['sites'],
+				seed=options['seed'])
+			results = run_load(requests=options['requests'], concurrency=options['concurrency'],
+				routes=routes, use_cache=options['use_cache'], seed=options['seed'],
+				instrument=options['instrument'])
+			if options['plans']:
+				results['query_plans'] = query_plans()
+			if options['startup']:
+				results['startup'] = startup_times(routes=routes, seed=options['seed'])
+		finally:
+			connection.creation.destroy_test_db(old_name, verbosity=0)
+			if test_file and os.path.exists(test_file):
+				os.remove(test_file)
+
+		if options['baseline']:
+			with open(options['baseline']) as baseline:
+				deltas, regressions = compare(results, json.load(baseline), options['tolerance'])
+			results['baseline'] = {'deltas': deltas, 'regressions': regressions}
+
+		output = json.dumps(results, indent=2, sort_keys=True)
+		if options['output']:
+			with open(options['output'], 'w') as out:
+				out.write(output + '\n')
+		else:
+			self.stdout.write(output)
+
+		if options['baseline'] and results['baseline']['regressions']:
+			raise CommandError("Regressed: %s" % ", ".join(results['baseline']['regressions']))
@@ -0,0 +1,32 @@
+import time
+from multiprocessing import cpu_count
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blogengine.sitebuild import build
+
+
+class Command(BaseCommand):
+	args = '<output directory>'
+	help = "Render every blog page to static files, re-rendering only pages whose inputs changed."
+
+	option_list = BaseCommand.option_list + (
+		make_option('--processes', type='int', dest='processes', default=cpu_count(),
+			help='Number of rendering processes (default: one per core).'),
+		make_option('--force', action='store_true', dest='force', default=False,
+			help='Ignore the manifest of the previous build and render everything.'),
+	)
+
+	def handle(self, *args, **options):
+		if len(args) != 1:
+			raise CommandError("Usage: manage.py build_static %s" % self.args)
+
+		started = time.time()
+		rendered, removed, failed = build(args[0], processes=options['processes'], force=options['force'])
+
+		if int(options['verbosity']):
+			self.stdout.write("Rendered %d page(s), removed %d in %.1fs" % (
+				len(rendered), len(removed), time.time() - started))
+		if failed:
+			raise CommandError("Failed to render: %s" % ", ".join(failed))
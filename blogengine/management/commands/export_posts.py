@@ -0,0 +1,26 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blogengine.transfer import export_records, write_jsonl, write_markdown
+
+
+class Command(BaseCommand):
+	args = '<file.jsonl | directory>'
+	help = ("Export every post, with its category and tags, to a JSONL file or a directory of "
+		"Markdown files with front matter.")
+
+	option_list = BaseCommand.option_list + (
+		make_option('--format', dest='format', choices=('jsonl', 'markdown'), default='jsonl',
+			help='jsonl (the default) or markdown.'),
+	)
+
+	def handle(self, *args, **options):
+		if len(args) != 1:
+			raise CommandError("Give one JSONL file or directory to export to.")
+		path, = args
+		write = write_markdown if options['format'] == 'markdown' else write_jsonl
+		count = write(export_records(), path)
+
+		if int(options['verbosity']):
+			self.stdout.write("Exported %d post(s) to %s" % (count, path))
@@ -0,0 +1,50 @@
+import os
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+from blogengine.transfer import BATCH_SIZE, import_records, read_jsonl, read_markdown, rebuild_derived
+
+
+class Command(BaseCommand):
+	args = '<file.jsonl | directory>'
+	help = ("Import posts, with their categories and tags, from a JSONL file or a directory of "
+		"Markdown files with front matter.  Posts, categories and tags are matched by slug.")
+
+	option_list = BaseCommand.option_list + (
+		make_option('--batch-size', type='int', dest='batch_size', default=BATCH_SIZE,
+			help='Posts written per transaction.'),
+		make_option('--skip-rebuild', action='store_false', dest='rebuild', default=True,
+			help="Don't rebuild the search index, archives, counts and related posts afterwards."),
+	)
+
+	def handle(self, *args, **options):
+		if len(args) != 1:
+			raise CommandError("Give one JSONL file or directory to import from.")
+		path, = args
+		verbosity = int(options['verbosity'])
+		records = read_markdown(path) if os.path.isdir(path) else read_jsonl(path)
+		started = time.time()
+		reported = [started]
+
+		def progress(created, updated):
+			# Every batch at verbosity 2, otherwise every few seconds
+			if verbosity > 1 or (verbosity and time.time() - reported[0] > 5):
+				reported[0] = time.time()
+				self.stdout.write("Created %d post(s), updated %d" % (created, updated))
+
+		try:
+			created, updated = import_records(records, batch_size=options['batch_size'], progress=progress)
+		except (IOError, KeyError, ValueError) as e:
+			raise CommandError("Import failed: %s" % e)
+		if verbosity:
+			self.stdout.write("Created %d post(s) and updated %d in %.1fs" % (created, updated, time.time() - started))
+		if (created or updated) and verbosity and is_process_local():
+			self.stderr.write(PROCESS_LOCAL_WARNING)
+
+		if options['rebuild']:
+			rebuild_derived()
+			if verbosity:
+				self.stdout.write("Rebuilt the derived tables; run render_posts to render the new HTML")
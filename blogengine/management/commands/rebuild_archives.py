@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blogengine.archive import rebuild
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+
+
+class Command(BaseCommand):
+	help = "Recompute the per-month post counts behind the Archives sidebar."
+
+	def handle(self, *args, **options):
+		rebuild()
+
+		if int(options['verbosity']):
+			self.stdout.write("Rebuilt the month archive summary")
+			if is_process_local():
+				self.stderr.write(PROCESS_LOCAL_WARNING)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+from blogengine.related import build
+
+
+class Command(BaseCommand):
+	help = "Recompute the word vectors and related posts of every post."
+
+	def handle(self, *args, **options):
+		build()
+
+		if int(options['verbosity']):
+			self.stdout.write("Rebuilt the related posts of every post")
+			if is_process_local():
+				self.stderr.write(PROCESS_LOCAL_WARNING)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+from blogengine.search import rebuild_index
+
+
+class Command(BaseCommand):
+	help = "Create the full-text search index if needed and re-index every post."
+
+	def handle(self, *args, **options):
+		backend = rebuild_index()
+
+		if int(options['verbosity']):
+			self.stdout.write("Rebuilt the search index with %s" % backend.__class__.__name__)
+			if is_process_local():
+				self.stderr.write(PROCESS_LOCAL_WARNING)
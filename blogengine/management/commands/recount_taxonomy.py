@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+from blogengine.taxonomy import recount
+
+
+class Command(BaseCommand):
+	help = "Recompute the post counts of every category and tag."
+
+	def handle(self, *args, **options):
+		recount()
+
+		if int(options['verbosity']):
+			self.stdout.write("Recounted the posts of every category and tag")
+			if is_process_local():
+				self.stderr.write(PROCESS_LOCAL_WARNING)
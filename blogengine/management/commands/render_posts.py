@@ -0,0 +1,43 @@
+import time
+from multiprocessing import cpu_count
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from blogengine.cache import PROCESS_LOCAL_WARNING, is_process_local
+from blogengine.markup import renderer_fingerprint
+from blogengine.models import Post
+from blogengine.rerender import CHUNK_SIZE, rerender
+
+
+class Command(BaseCommand):
+	help = "Re-render the stored HTML of every post whose text or renderer config changed."
+
+	option_list = BaseCommand.option_list + (
+		make_option('--force', action='store_true', dest='force', default=False,
+			help='Re-render every post, even if its stored HTML looks current.'),
+		make_option('--processes', type='int', dest='processes', default=cpu_count(),
+			help='Number of rendering processes (default: one per core).'),
+		make_option('--chunk-size', type='int', dest='chunk_size', default=CHUNK_SIZE,
+			help='Posts per chunk handed to a worker and written back together.'),
+	)
+
+	def handle(self, *args, **options):
+		verbosity = int(options['verbosity'])
+		total = Post.objects.count()
+		reported = [0]
+
+		def progress(checked, rendered, elapsed):
+			# Every chunk at verbosity 2, otherwise every few seconds
+			if verbosity > 1 or (verbosity and (checked == total or time.time() - reported[0] > 5)):
+				reported[0] = time.time()
+				self.stdout.write("Checked %d/%d post(s), rendered %d (%.0f posts/s)" % (
+					checked, total, rendered, checked / elapsed if elapsed else 0))
+
+		checked, rendered = rerender(processes=options['processes'], force=options['force'],
+			chunk_size=options['chunk_size'], progress=progress)
+
+		if verbosity:
+			self.stdout.write("Rendered %d post(s) with %s" % (rendered, renderer_fingerprint()))
+		if rendered and verbosity and is_process_local():
+			self.stderr.write(PROCESS_LOCAL_WARNING)
@@ -0,0 +1,164 @@
+"""
+Markdown rendering for post bodies.
+
+Post HTML is rendered once when a post is saved and stored alongside the
+source, together with the excerpt and teaser list pages show instead (see
+``render_summary()``).  The stored copy is tagged with ``render_key(text)``,
+a hash of the source text and of everything that affects the output (the
+markdown2 and Pygments versions, the extras list and the teaser length), so
+stale copies can be detected and re-rendered.
+
+Pygments highlighting dominates the render time of posts with code, and
+the same snippets recur across posts and across edits of one post, so
+highlighted blocks are cached by content: first in a small in-process LRU,
+then in the shared Django cache.
+
+Long posts are mostly edited a paragraph at a time, so they are rendered
+one top-level block at a time and each block's HTML is cached the same way,
+leaving only the changed blocks to render.
+
+The renderers themselves live in ``blogengine.renderers``, which is only
+imported once something is rendered: markdown2 is slow to import, and most
+processes serve stored HTML.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from HTMLParser import HTMLParser
+
+import pygments
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.encoding import force_unicode, smart_str
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from blogengine.signals import markdown_rendered
+
+MARKDOWN_EXTRAS = ["fenced-code-blocks"]
+
+# Highlighted code blocks kept in each process
+HIGHLIGHT_CACHE_SIZE = 512
+
+# Rendered blocks of long posts kept in each process, and for how long
+# other processes can find them in the shared cache
+BLOCK_CACHE_SIZE = 4096
+BLOCK_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Words of a post shown on list pages
+TEASER_WORDS = 60
+
+# Posts at least this many characters long are rendered block by block
+BLOCK_RENDER_MIN_LENGTH = 10000
+
+
+def renderer_fingerprint():
+	"""Identify the renderer configuration that produced a piece of HTML."""
+	import markdown2
+	return "markdown2=%s;pygments=%s;extras=%s;teaser=%d" % (
+		markdown2.__version__, pygments.__version__, ",".join(MARKDOWN_EXTRAS), TEASER_WORDS)
+
+
+def render_key(text):
+	"""Hash of the source text plus the renderer configuration."""
+	digest = hashlib.sha1(renderer_fingerprint())
+	digest.update("\0")
+	digest.update(smart_str(text))
+	return digest.hexdigest()
+
+
+class RenderCache(object):
+	"""
+	Two-tier cache of rendered HTML: a size-bounded LRU in this process in
+	front of the ``BLOGENGINE_CACHE`` Django cache, where entries last
+	``timeout`` seconds (forever by default).  Counts hits in each tier and
+	misses.
+	"""
+
+	def __init__(self, size, timeout=None):
+		self.size = size
+		self.timeout = timeout
+		self._lock = threading.Lock()
+		self.clear()
+
+	def clear(self):
+		with self._lock:
+			self._local = OrderedDict()
+			self.local_hits = self.shared_hits = self.misses = 0
+
+	def _shared(self):
+		return caches[getattr(settings, 'BLOGENGINE_CACHE', 'default')]
+
+	def _remember(self, key, html):
+		with self._lock:
+			self._local[key] = html
+			while len(self._local) > self.size:
+				self._local.popitem(last=False)
+
+	def get_or_render(self, key, render):
+		with self._lock:
+			html = self._local.pop(key, None)
+			if html is not None:
+				# Re-insert as the most recently used
+				self._local[key] = html
+				self.local_hits += 1
+				return html
+
+		html = self._shared().get(key)
+		if html is not None:
+			self.shared_hits += 1
+		else:
+			self.misses += 1
+			html = render()
+			self._shared().set(key, html, self.timeout)
+		self._remember(key, html)
+		return html
+
+	def stats(self):
+		with self._lock:
+			lookups = self.local_hits + self.shared_hits + self.misses
+			return {
+				'local_hits': self.local_hits,
+				'shared_hits': self.shared_hits,
+				'misses': self.misses,
+				'hit_rate': float(self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+				'size': len(self._local),
+			}
+
+
+highlight_cache = RenderCache(HIGHLIGHT_CACHE_SIZE)
+block_cache = RenderCache(BLOCK_CACHE_SIZE, BLOCK_CACHE_TIMEOUT)
+
+
+def highlight_key(codeblock, lexer, formatter_opts):
+	"""Cache key of a code block highlighted with ``lexer`` and ``formatter_opts``."""
+	digest = hashlib.sha1(smart_str(codeblock))
+	digest.update("\0%s;%r;%s;%r" % (pygments.__version__, lexer.__class__.__name__,
+		sorted(lexer.options.items()), sorted(formatter_opts.items())))
+	return 'blogengine:highlight:%s' % digest.hexdigest()
+
+
+def render_markdown(text):
+	"""Render Markdown source to an HTML string."""
+	from blogengine.renderers import BlockMarkdown, CachedMarkdown
+
+	started = time.time()
+	text = force_unicode(text)
+	renderer = BlockMarkdown if len(text) >= BLOCK_RENDER_MIN_LENGTH else CachedMarkdown
+	html = renderer(extras=MARKDOWN_EXTRAS).convert(text)
+	markdown_rendered.send(sender=None, duration=time.time() - started)
+	return html
+
+
+def render_summary(html):
+	"""
+	``(excerpt, teaser_html)`` of a post's rendered ``html``: its first
+	``TEASER_WORDS`` words as plain text, and as HTML with the open tags
+	closed.
+	"""
+	teaser_html = Truncator(html).words(TEASER_WORDS, html=True, truncate=u' \u2026')
+	text = HTMLParser().unescape(strip_tags(html))
+	return Truncator(text).words(TEASER_WORDS, truncate=u' \u2026'), teaser_html
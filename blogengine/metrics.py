@@ -0,0 +1,108 @@
+"""
+In-process request metrics.
+
+Each process keeps fixed-bucket histograms per resolved view name for wall
+time, SQL query count, SQL time, template render time and Markdown render
+time.  Recording is a bisect and a few additions under a lock, so it is
+cheap enough to leave on in production.  ``snapshot()`` and
+``prometheus_text()`` export the current values, along with the hit
+counts of the code highlighting cache.
+"""
+
+import threading
+from bisect import bisect_left
+
+from blogengine.markup import highlight_cache
+
+# Upper bounds of the histogram buckets
+TIME_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100, float('inf'))
+
+METRICS = (
+	('wall_ms', TIME_BUCKETS_MS, 'Wall time of the request in milliseconds'),
+	('sql_count', COUNT_BUCKETS, 'SQL queries per request'),
+	('sql_ms', TIME_BUCKETS_MS, 'Time spent in SQL per request in milliseconds'),
+	('template_ms', TIME_BUCKETS_MS, 'Template render time per request in milliseconds'),
+	('markdown_ms', TIME_BUCKETS_MS, 'Markdown render time per request in milliseconds'),
+)
+
+
+class Histogram(object):
+	def __init__(self, buckets):
+		self.buckets = buckets
+		self.counts = [0] * len(buckets)
+		self.count = 0
+		self.sum = 0.0
+
+	def observe(self, value):
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.count += 1
+		self.sum += value
+
+	def as_dict(self):
+		return {
+			'count': self.count,
+			'sum': self.sum,
+			'buckets': [[bound if bound != float('inf') else '+Inf', count]
+				for bound, count in zip(self.buckets, self.counts)],
+		}
+
+
+_lock = threading.Lock()
+_histograms = {}
+
+
+def record(view_name, values):
+	"""Record one request's ``{metric: value}`` under ``view_name``."""
+	with _lock:
+		for name, buckets, help_text in METRICS:
+			if name in values:
+				key = (view_name, name)
+				if key not in _histograms:
+					_histograms[key] = Histogram(buckets)
+				_histograms[key].observe(values[name])
+
+
+def reset():
+	with _lock:
+		_histograms.clear()
+
+
+def snapshot():
+	"""
+	Current histograms as ``{'views': {view name: {metric: histogram dict}},
+	'highlight_cache': stats}``.
+	"""
+	with _lock:
+		views = {}
+		for (view_name, name), histogram in _histograms.items():
+			views.setdefault(view_name, {})[name] = histogram.as_dict()
+	return {'views': views, 'highlight_cache': highlight_cache.stats()}
+
+
+def prometheus_text():
+	"""Current metrics in the Prometheus text exposition format."""
+	current = snapshot()
+	views = current['views']
+	lines = []
+	for name, buckets, help_text in METRICS:
+		metric = 'blogengine_request_%s' % name
+		lines.append('# HELP %s %s' % (metric, help_text))
+		lines.append('# TYPE %s histogram' % metric)
+		for view_name in sorted(views):
+			histogram = views[view_name].get(name)
+			if not histogram:
+				continue
+			cumulative = 0
+			for bound, count in histogram['buckets']:
+				cumulative += count
+				lines.append('%s_bucket{view="%s",le="%s"} %d' % (metric, view_name, bound, cumulative))
+			lines.append('%s_sum{view="%s"} %s' % (metric, view_name, histogram['sum']))
+			lines.append('%s_count{view="%s"} %d' % (metric, view_name, histogram['count']))
+
+	highlight = current['highlight_cache']
+	lines.append('# HELP blogengine_highlight_cache_lookups_total Code highlighting cache lookups by outcome')
+	lines.append('# TYPE blogengine_highlight_cache_lookups_total counter')
+	for outcome in ('local_hits', 'shared_hits', 'misses'):
+		lines.append('blogengine_highlight_cache_lookups_total{outcome="%s"} %d' % (outcome, highlight[outcome]))
+	return '\n'.join(lines) + '\n'
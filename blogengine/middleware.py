@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from blogengine import metrics, replicas
+from blogengine.signals import markdown_rendered
+
+_local = threading.local()
+
+
+def _count_markdown(sender, duration, **kwargs):
+	if getattr(_local, 'markdown', None) is not None:
+		_local.markdown += duration
+
+
+class InstrumentationMiddleware(object):
+	"""
+	Time every request by resolved view name: wall time, SQL count and time,
+	template rendering and Markdown rendering.  Results go to the
+	histograms in ``blogengine.metrics`` and to a ``Server-Timing`` header.
+
+	Turned on by ``BLOGENGINE_INSTRUMENTATION``, and should be the first
+	middleware so it sees as much of the request as possible.  Timing SQL
+	means recording the text of every statement, so only the
+	``BLOGENGINE_SQL_SAMPLE_RATE`` share of requests is timed.
+	"""
+
+	def __init__(self):
+		if not getattr(settings, 'BLOGENGINE_INSTRUMENTATION', False):
+			raise MiddlewareNotUsed
+		markdown_rendered.connect(_count_markdown, dispatch_uid='blogengine.instrumentation')
+
+	def process_request(self, request):
+		request._instrumentation = {
+			'started': time.time(),
+			'template': 0.0,
+		}
+		if random.random() < getattr(settings, 'BLOGENGINE_SQL_SAMPLE_RATE', 1.0):
+			request._instrumentation.update({
+				'queries': dict((connection.alias, len(connection.queries)) for connection in connections.all()),
+				'debug_cursor': dict((connection.alias, connection.use_debug_cursor) for connection in connections.all()),
+			})
+			# The debug cursor records the time of every query on the connection
+			for connection in connections.all():
+				connection.use_debug_cursor = True
+		_local.markdown = 0.0
+
+	def stop_sql_timing(self, state):
+		"""
+		Put back the connections' debug cursors, once, and keep the count
+		and seconds of the queries made since the request started.
+		"""
+		debug_cursor = state.pop('debug_cursor', None)
+		if debug_cursor is None:
+			return
+		sql_count, sql_time = 0, 0.0
+		for connection in connections.all():
+			queries = connection.queries[state['queries'].get(connection.alias, 0):]
+			sql_count += len(queries)
+			sql_time += sum(float(query['time']) for query in queries)
+			connection.use_debug_cursor = debug_cursor.get(connection.alias)
+		state['sql'] = sql_count, sql_time
+
+	def process_exception(self, request, exception):
+		# A middleware failing later could keep process_response from running
+		state = getattr(request, '_instrumentation', None)
+		if state is not None:
+			self.stop_sql_timing(state)
+
+	def process_template_response(self, request, response):
+		# This runs after every other middleware's process_template_response,
+		# so rendering here is what the handler would otherwise do next.
+		state = getattr(request, '_instrumentation', None)
+		if state is not None and not response.is_rendered:
+			started = time.time()
+			response.render()
+			state['template'] += time.time() - started
+		return response
+
+	def process_response(self, request, response):
+		state = getattr(request, '_instrumentation', None)
+		if state is None:
+			return response
+
+		self.stop_sql_timing(state)
+
+		markdown_time, _local.markdown = _local.markdown or 0.0, None
+		values = {
+			'wall_ms': (time.time() - state['started']) * 1000,
+			'template_ms': state['template'] * 1000,
+			'markdown_ms': markdown_time * 1000,
+		}
+		timings = ['total;dur=%.1f' % values['wall_ms']]
+		if 'sql' in state:
+			sql_count, sql_time = state['sql']
+			values.update({'sql_count': sql_count, 'sql_ms': sql_time * 1000})
+			timings.append('db;dur=%.1f;desc="%d queries"' % (values['sql_ms'], sql_count))
+		timings.extend(['tpl;dur=%.1f' % values['template_ms'], 'md;dur=%.1f' % values['markdown_ms']])
+		match = getattr(request, 'resolver_match', None)
+		metrics.record(match.view_name if match else 'unresolved', values)
+
+		response['Server-Timing'] = ', '.join(timings)
+		return response
+
+
+class ReplicaMiddleware(object):
+	"""
+	Let GET and HEAD requests outside the admin read from the replicas in
+	``BLOGENGINE_READ_REPLICAS`` (see ``blogengine.replicas``), unless the
+	client wrote something within the last few seconds.
+	"""
+
+	def __init__(self):
+		if not replicas.get_replicas():
+			raise MiddlewareNotUsed
+
+	def process_request(self, request):
+		replicas.reset()
+
+	def process_view(self, request, view_func, view_args, view_kwargs):
+		match = getattr(request, 'resolver_match', None)
+		if (request.method in ('GET', 'HEAD') and replicas.PRIMARY_COOKIE not in request.COOKIES
+				and not (match and match.app_name == 'admin')):
+			replicas.read_from_replicas()
+
+	def process_response(self, request, response):
+		if replicas.wrote():
+			response.set_cookie(replicas.PRIMARY_COOKIE, '1', max_age=replicas.sticky_seconds(), httponly=True)
+		replicas.reset()
+		return response
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'Term'
+        db.create_table(u'blogengine_term', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('term', self.gf('django.db.models.fields.CharField')(unique=True, max_length=100)),
+            ('post_count', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+        ))
+        db.send_create_signal(u'blogengine', ['Term'])
+
+        # Adding model 'PostTerm'
+        db.create_table(u'blogengine_postterm', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('post', self.gf('django.db.models.fields.related.ForeignKey')(related_name='terms', to=orm['blogengine.Post'])),
+            ('term', self.gf('django.db.models.fields.CharField')(max_length=100, db_index=True)),
+            ('weight', self.gf('django.db.models.fields.FloatField')()),
+        ))
+        db.send_create_signal(u'blogengine', ['PostTerm'])
+
+        # Adding unique constraint on 'PostTerm', fields ['post', 'term']
+        db.create_unique(u'blogengine_postterm', ['post_id', 'term'])
+
+        # Adding model 'RelatedPost'
+        db.create_table(u'blogengine_relatedpost', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('post', self.gf('django.db.models.fields.related.ForeignKey')(related_name='related_links', to=orm['blogengine.Post'])),
+            ('related', self.gf('django.db.models.fields.related.ForeignKey')(related_name='+', to=orm['blogengine.Post'])),
+            ('score', self.gf('django.db.models.fields.FloatField')()),
+            ('rank', self.gf('django.db.models.fields.PositiveSmallIntegerField')()),
+        ))
+        db.send_create_signal(u'blogengine', ['RelatedPost'])
+
+        # Adding unique constraint on 'RelatedPost', fields ['post', 'rank']
+        db.create_unique(u'blogengine_relatedpost', ['post_id', 'rank'])
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'RelatedPost', fields ['post', 'rank']
+        db.delete_unique(u'blogengine_relatedpost', ['post_id', 'rank'])
+
+        # Removing unique constraint on 'PostTerm', fields ['post', 'term']
+        db.delete_unique(u'blogengine_postterm', ['post_id', 'term'])
+
+        # Deleting model 'RelatedPost'
+        db.delete_table(u'blogengine_relatedpost')
+
+        # Deleting model 'PostTerm'
+        db.delete_table(u'blogengine_postterm')
+
+        # Deleting model 'Term'
+        db.delete_table(u'blogengine_term')
+
+
+    models = {
+        u'blogengine.archivemonth': {
+            'Meta': {'ordering': "['-year', '-month']", 'unique_together': "(('site', 'year', 'month'),)", 'object_name': 'ArchiveMonth'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'month': ('django.db.models.fields.PositiveSmallIntegerField', [], {}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"}),
+            'year': ('django.db.models.fields.PositiveIntegerField', [], {})
+        },
+        u'blogengine.category': {
+            'Meta': {'object_name': 'Category'},
+            'description': ('django.db.models.fields.TextField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '40', 'unique': 'True', 'null': 'True', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.post': {
+            'Meta': {'ordering': "['-pub_date']", 'object_name': 'Post'},
+            'category': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['blogengine.Category']", 'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'pub_date': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '40'}),
+            'tags': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['blogengine.Tag']", 'symmetrical': 'False'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'text_html': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'text_html_key': ('django.db.models.fields.CharField', [], {'max_length': '40', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.postterm': {
+            'Meta': {'unique_together': "(('post', 'term'),)", 'object_name': 'PostTerm'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'terms'", 'to': u"orm['blogengine.Post']"}),
+            'term': ('django.db.models.fields.CharField', [], {'max_length': '100', 'db_index': 'True'}),
+            'weight': ('django.db.models.fields.FloatField', [], {})
+        },
+        u'blogengine.relatedpost': {
+            'Meta': {'ordering': "['rank']", 'unique_together': "(('post', 'rank'),)", 'object_name': 'RelatedPost'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'related_links'", 'to': u"orm['blogengine.Post']"}),
+            'rank': ('django.db.models.fields.PositiveSmallIntegerField', [], {}),
+            'related': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['blogengine.Post']"}),
+            'score': ('django.db.models.fields.FloatField', [], {})
+        },
+        u'blogengine.tag': {
+            'Meta': {'object_name': 'Tag'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '40', 'unique': 'True', 'null': 'True', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.term': {
+            'Meta': {'object_name': 'Term'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'term': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '100'})
+        },
+        u'sites.site': {
+            'Meta': {'ordering': "(u'domain',)", 'object_name': 'Site', 'db_table': "u'django_site'"},
+            'domain': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        }
+    }
+
+    complete_apps = ['blogengine']
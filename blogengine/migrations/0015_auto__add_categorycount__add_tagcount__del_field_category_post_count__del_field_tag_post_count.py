@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CategoryCount'
+        db.create_table(u'blogengine_categorycount', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('site', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['sites.Site'])),
+            ('category', self.gf('django.db.models.fields.related.ForeignKey')(related_name='counts', to=orm['blogengine.Category'])),
+            ('post_count', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+        ))
+        db.send_create_signal(u'blogengine', ['CategoryCount'])
+
+        # Adding unique constraint on 'CategoryCount', fields ['site', 'category']
+        db.create_unique(u'blogengine_categorycount', ['site_id', 'category_id'])
+
+        # Adding model 'TagCount'
+        db.create_table(u'blogengine_tagcount', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('site', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['sites.Site'])),
+            ('tag', self.gf('django.db.models.fields.related.ForeignKey')(related_name='counts', to=orm['blogengine.Tag'])),
+            ('post_count', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+        ))
+        db.send_create_signal(u'blogengine', ['TagCount'])
+
+        # Adding unique constraint on 'TagCount', fields ['site', 'tag']
+        db.create_unique(u'blogengine_tagcount', ['site_id', 'tag_id'])
+
+        # Count the existing posts per site
+        if not db.dry_run:
+            db.execute("INSERT INTO blogengine_categorycount (site_id, category_id, post_count) "
+                       "SELECT site_id, category_id, COUNT(*) FROM blogengine_post "
+                       "WHERE category_id IS NOT NULL GROUP BY site_id, category_id")
+            db.execute("INSERT INTO blogengine_tagcount (site_id, tag_id, post_count) "
+                       "SELECT blogengine_post.site_id, blogengine_post_tags.tag_id, COUNT(*) "
+                       "FROM blogengine_post_tags JOIN blogengine_post ON blogengine_post.id = blogengine_post_tags.post_id "
+                       "GROUP BY blogengine_post.site_id, blogengine_post_tags.tag_id")
+
+        # Deleting field 'Category.post_count'
+        db.delete_column(u'blogengine_category', 'post_count')
+
+        # Deleting field 'Tag.post_count'
+        db.delete_column(u'blogengine_tag', 'post_count')
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'TagCount', fields ['site', 'tag']
+        db.delete_unique(u'blogengine_tagcount', ['site_id', 'tag_id'])
+
+        # Removing unique constraint on 'CategoryCount', fields ['site', 'category']
+        db.delete_unique(u'blogengine_categorycount', ['site_id', 'category_id'])
+
+        # Deleting model 'TagCount'
+        db.delete_table(u'blogengine_tagcount')
+
+        # Deleting model 'CategoryCount'
+        db.delete_table(u'blogengine_categorycount')
+
+        # Adding field 'Category.post_count'
+        db.add_column(u'blogengine_category', 'post_count',
+                      self.gf('django.db.models.fields.PositiveIntegerField')(default=0),
+                      keep_default=False)
+
+        # Adding field 'Tag.post_count'
+        db.add_column(u'blogengine_tag', 'post_count',
+                      self.gf('django.db.models.fields.PositiveIntegerField')(default=0),
+                      keep_default=False)
+
+        # Count the existing posts
+        if not db.dry_run:
+            db.execute("UPDATE blogengine_category SET post_count = (SELECT COUNT(*) FROM blogengine_post "
+                       "WHERE blogengine_post.category_id = blogengine_category.id)")
+            db.execute("UPDATE blogengine_tag SET post_count = (SELECT COUNT(*) FROM blogengine_post_tags "
+                       "WHERE blogengine_post_tags.tag_id = blogengine_tag.id)")
+
+
+    models = {
+        u'blogengine.archivemonth': {
+            'Meta': {'ordering': "['-year', '-month']", 'unique_together': "(('site', 'year', 'month'),)", 'object_name': 'ArchiveMonth'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'month': ('django.db.models.fields.PositiveSmallIntegerField', [], {}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"}),
+            'year': ('django.db.models.fields.PositiveIntegerField', [], {})
+        },
+        u'blogengine.category': {
+            'Meta': {'object_name': 'Category'},
+            'description': ('django.db.models.fields.TextField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '40', 'unique': 'True', 'null': 'True', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.categorycount': {
+            'Meta': {'unique_together': "(('site', 'category'),)", 'object_name': 'CategoryCount'},
+            'category': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'counts'", 'to': u"orm['blogengine.Category']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"})
+        },
+        u'blogengine.post': {
+            'Meta': {'ordering': "['-pub_date']", 'object_name': 'Post', 'index_together': "(('site', 'pub_date'), ('site', 'category', 'pub_date'))"},
+            'category': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['blogengine.Category']", 'null': 'True', 'blank': 'True'}),
+            'excerpt': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'pub_date': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '40'}),
+            'tags': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['blogengine.Tag']", 'symmetrical': 'False'}),
+            'teaser_html': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'text_html': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'text_html_key': ('django.db.models.fields.CharField', [], {'max_length': '40', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.postterm': {
+            'Meta': {'unique_together': "(('post', 'term'),)", 'object_name': 'PostTerm'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'terms'", 'to': u"orm['blogengine.Post']"}),
+            'term': ('django.db.models.fields.CharField', [], {'max_length': '100', 'db_index': 'True'}),
+            'weight': ('django.db.models.fields.FloatField', [], {})
+        },
+        u'blogengine.relatedpost': {
+            'Meta': {'ordering': "['rank']", 'unique_together': "(('post', 'rank'),)", 'object_name': 'RelatedPost'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'related_links'", 'to': u"orm['blogengine.Post']"}),
+            'rank': ('django.db.models.fields.PositiveSmallIntegerField', [], {}),
+            'related': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['blogengine.Post']"}),
+            'score': ('django.db.models.fields.FloatField', [], {})
+        },
+        u'blogengine.tag': {
+            'Meta': {'object_name': 'Tag'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '40', 'unique': 'True', 'null': 'True', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'blogengine.tagcount': {
+            'Meta': {'unique_together': "(('site', 'tag'),)", 'object_name': 'TagCount'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'site': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['sites.Site']"}),
+            'tag': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'counts'", 'to': u"orm['blogengine.Tag']"})
+        },
+        u'blogengine.term': {
+            'Meta': {'object_name': 'Term'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'post_count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'term': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '100'})
+        },
+        u'sites.site': {
+            'Meta': {'ordering': "(u'domain',)", 'object_name': 'Site', 'db_table': "u'django_site'"},
+            'domain': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        }
+    }
+
+    complete_apps = ['blogengine']
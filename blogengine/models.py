@@ -1,12 +1,19 @@
 from django.db import models
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.contrib.sites.managers import CurrentSiteManager
 from django.contrib.sites.models import Site
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 
+from blogengine.markup import render_key, render_markdown, render_summary
+
 # Create your models here.
 class Category(models.Model):
 	name = models.CharField(max_length=200)
 	description = models.TextField()
 	slug = models.SlugField(max_length=40, unique=True, blank=True, null=True)
+	updated_at = models.DateTimeField(auto_now=True)
 	
 	def save(self, *args, **kwargs):
 		if not self.slug:
@@ -25,6 +32,7 @@ class Category(models.Model):
 class Tag(models.Model):
 	name = models.CharField(max_length=200)
 	slug = models.SlugField(max_length=40, unique=True, blank=True, null=True)
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def save(self, *args, **kwargs):
 		if not self.slug:
@@ -37,14 +45,66 @@ class Tag(models.Model):
 	def __unicode__(self):
 		return self.name
 
+class PostQuerySet(models.QuerySet):
+	def with_taxonomy(self):
+		"""Fetch categories in the same join and every post's tags in one batch."""
+		return self.select_related('category').prefetch_related('tags')
+
+	def for_listing(self):
+		"""``with_taxonomy()`` without the bodies, which list pages don't show."""
+		return self.with_taxonomy().defer('text', 'text_html')
+
 class Post(models.Model):
 	title = models.CharField(max_length=200)
-	pub_date = models.DateTimeField()
+	pub_date = models.DateTimeField(db_index=True)
 	text = models.TextField()
 	slug = models.SlugField(max_length=40, unique=True)
 	site = models.ForeignKey(Site)
 	category = models.ForeignKey(Category, blank=True, null=True)
 	tags = models.ManyToManyField(Tag, blank=True, null=True)
+	text_html = models.TextField(blank=True, editable=False)
+	text_html_key = models.CharField(max_length=40, blank=True, editable=False)
+	# Rendered along with text_html; see blogengine.markup.render_summary()
+	excerpt = models.TextField(blank=True, editable=False)
+	teaser_html = models.TextField(blank=True, editable=False)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	objects = PostQuerySet.as_manager()
+	# Everything served to readers goes through this, so a post of one site
+	# never shows up on another
+	on_site = CurrentSiteManager.from_queryset(PostQuerySet)()
+
+	def save(self, *args, **kwargs):
+		self.render_text()
+		super(Post, self).save(*args, **kwargs)
+
+	def render_text(self, force=False):
+		"""
+		Refresh the stored HTML if the text or renderer config changed.
+		Returns True if the HTML was re-rendered.
+		"""
+		key = render_key(self.text)
+		if not force and key == self.text_html_key:
+			return False
+		self.text_html = render_markdown(self.text)
+		self.excerpt, self.teaser_html = render_summary(self.text_html)
+		self.text_html_key = key
+		return True
+
+	def get_text_html(self):
+		# Rows saved before text_html existed (or under an older renderer)
+		# are rendered on first view and written back.
+		if self.render_text() and self.pk:
+			Post.objects.filter(pk=self.pk).update(text_html=self.text_html, excerpt=self.excerpt,
+				teaser_html=self.teaser_html, text_html_key=self.text_html_key)
+		return mark_safe(self.text_html)
+
+	def get_teaser_html(self):
+		# Posts imported in bulk have no HTML yet, and those saved before
+		# teasers existed have none of those; both load the body once here.
+		if not self.text_html_key or not self.teaser_html:
+			self.get_text_html()
+		return mark_safe(self.teaser_html)
 
 	def get_absolute_url(self):
 		return "/%s/%s/%s/" % (self.pub_date.year, self.pub_date.month, self.slug)
@@ -53,4 +113,95 @@ class Post(models.Model):
 		return self.title
 
 	class Meta:
-		ordering = ["-pub_date"]
\ No newline at end of file
+		ordering = ["-pub_date"]
+		# Listings filter on the site (and category) and walk pub_date in order
+		index_together = [
+			('site', 'pub_date'),
+			('site', 'category', 'pub_date'),
+		]
+
+@receiver(pre_save, sender=Post)
+def remember_original(sender, instance, **kwargs):
+	"""
+	Keep the stored version of a post that is about to be saved, so the
+	receivers that maintain derived data can see what changed.
+	"""
+	instance._original = None
+	if instance.pk:
+		instance._original = Post.objects.select_related('category').filter(pk=instance.pk).first()
+
+class ArchiveMonth(models.Model):
+	"""How many posts a site has in each month, for the Archives sidebar."""
+	site = models.ForeignKey(Site)
+	year = models.PositiveIntegerField()
+	month = models.PositiveSmallIntegerField()
+	post_count = models.PositiveIntegerField(default=0)
+
+	def __unicode__(self):
+		return "%d/%d" % (self.year, self.month)
+
+	class Meta:
+		unique_together = ('site', 'year', 'month')
+		ordering = ["-year", "-month"]
+
+class CategoryCount(models.Model):
+	"""How many posts a site has in a category; see blogengine.taxonomy."""
+	site = models.ForeignKey(Site)
+	category = models.ForeignKey(Category, related_name='counts')
+	post_count = models.PositiveIntegerField(default=0)
+
+	def __unicode__(self):
+		return "%s: %d" % (self.category_id, self.post_count)
+
+	class Meta:
+		unique_together = ('site', 'category')
+
+class TagCount(models.Model):
+	"""How many posts a site has under a tag; see blogengine.taxonomy."""
+	site = models.ForeignKey(Site)
+	tag = models.ForeignKey(Tag, related_name='counts')
+	post_count = models.PositiveIntegerField(default=0)
+
+	def __unicode__(self):
+		return "%s: %d" % (self.tag_id, self.post_count)
+
+	class Meta:
+		unique_together = ('site', 'tag')
+
+class Term(models.Model):
+	"""How many of a site's posts use a word, as of the last related posts build."""
+	site = models.ForeignKey(Site)
+	term = models.CharField(max_length=100)
+	post_count = models.PositiveIntegerField(default=0)
+
+	def __unicode__(self):
+		return self.term
+
+	class Meta:
+		unique_together = ('site', 'term')
+
+class PostTerm(models.Model):
+	"""One of the heaviest words in a post's TF-IDF vector."""
+	post = models.ForeignKey(Post, related_name='terms')
+	term = models.CharField(max_length=100, db_index=True)
+	weight = models.FloatField()
+
+	def __unicode__(self):
+		return self.term
+
+	class Meta:
+		unique_together = ('post', 'term')
+
+class RelatedPost(models.Model):
+	"""One of the closest neighbours of a post, maintained by blogengine.related."""
+	post = models.ForeignKey(Post, related_name='related_links')
+	related = models.ForeignKey(Post, related_name='+')
+	score = models.FloatField()
+	rank = models.PositiveSmallIntegerField()
+
+	def __unicode__(self):
+		return "%s -> %s" % (self.post_id, self.related_id)
+
+	class Meta:
+		unique_together = ('post', 'rank')
+		ordering = ["rank"]
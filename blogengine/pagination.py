@@ -0,0 +1,207 @@
+"""
+Keyset ("seek") pagination for post listings.
+
+Listings are ordered by ``-pub_date`` with ``-id`` as the tiebreak, and a
+page is fetched as "the next ``per_page + 1`` posts after this key" instead
+of ``COUNT(*)`` plus ``OFFSET``, so deep pages cost the same as the first.
+
+Pages can be addressed by cursor (``?after=`` / ``?before=``) or, for the
+numbered URLs, by page number.  Numbers are turned into keys through a map
+of page boundaries kept in the cache under the listing's dependency tags.
+It is scanned only as deep as the pages asked for, and starts over when a
+post on that listing changes.
+"""
+
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.urlresolvers import reverse
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+
+from blogengine import replicas
+from blogengine.cache import GLOBAL_TAG, get_cache, get_versions
+
+ORDERING = ('-pub_date', '-pk')
+POSTS_PER_PAGE = 5
+CURSOR_DATE_FORMAT = '%Y%m%d%H%M%S%f'
+
+# Seconds a listing's page-boundary map is kept
+BOUNDARIES_TIMEOUT = 60 * 60 * 24
+
+
+def encode_cursor(pub_date, pk):
+	if timezone.is_aware(pub_date):
+		pub_date = timezone.make_naive(pub_date, timezone.utc)
+	return '%s-%d' % (pub_date.strftime(CURSOR_DATE_FORMAT), pk)
+
+
+def decode_cursor(cursor):
+	"""Return the ``(pub_date, pk)`` key in ``cursor``; ValueError if malformed."""
+	date, pk = cursor.split('-')
+	pub_date = datetime.strptime(date, CURSOR_DATE_FORMAT)
+	if settings.USE_TZ:
+		pub_date = timezone.make_aware(pub_date, timezone.utc)
+	return pub_date, int(pk)
+
+
+def after_key(posts, key):
+	pub_date, pk = key
+	return posts.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+
+
+def before_key(posts, key):
+	pub_date, pk = key
+	return posts.filter(Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk))
+
+
+def page_boundaries(posts, per_page, tags, number):
+	"""
+	Keys of the last post on each page of ``posts`` before page ``number``,
+	cached under ``tags``; fewer if the listing ends sooner.  Page ``n``
+	starts right after ``boundaries[n - 2]``.  The cached map is extended
+	from its last key when a deeper page is asked for.
+	"""
+	cache = get_cache()
+	key = 'blogengine:page-boundaries:%d:%s:%s' % (
+		per_page, ','.join(tags), ':'.join(get_versions([GLOBAL_TAG] + tags)))
+	boundaries, complete = cache.get(key) or ([], False)
+	missing = number - 1 - len(boundaries)
+	if missing > 0 and not complete:
+		keys = posts.order_by(*ORDERING)
+		if boundaries:
+			keys = after_key(keys, boundaries[-1])
+		scanned = 0
+		for scanned, row in enumerate(keys.values_list('pub_date', 'pk')[:missing * per_page].iterator(), 1):
+			if scanned % per_page == 0:
+				boundaries.append(row)
+		complete = scanned < missing * per_page
+		cache.set(key, (boundaries, complete), replicas.cache_timeout(BOUNDARIES_TIMEOUT))
+	return boundaries
+
+
+def page_url(url_name, kwargs, number, page_kwarg='page'):
+	"""URL of page ``number`` of the listing ``url_name`` with ``kwargs``."""
+	kwargs = dict(kwargs)
+	if number > 1:
+		kwargs[page_kwarg] = number
+	url = reverse(url_name, kwargs=kwargs)
+	# Most patterns make the trailing slash optional and reverse() drops it
+	return url if url.endswith('/') else url + '/'
+
+
+class KeysetPage(object):
+	"""The bits of Django's Page that the listing templates use."""
+
+	def __init__(self, object_list, number, has_next, has_previous, next_url, previous_url, count=None, per_page=None):
+		self.object_list = object_list
+		self.number = number
+		# Only known for listings that keep a post count
+		self.count = count
+		self.num_pages = int(math.ceil(float(count) / per_page)) if count is not None else None
+		self._has_next = has_next
+		self._has_previous = has_previous
+		self.next_url = next_url
+		self.previous_url = previous_url
+
+	def __len__(self):
+		return len(self.object_list)
+
+	def __iter__(self):
+		return iter(self.object_list)
+
+	def has_next(self):
+		return self._has_next
+
+	def has_previous(self):
+		return self._has_previous
+
+	def has_other_pages(self):
+		return self._has_next or self._has_previous
+
+	def next_page_number(self):
+		return self.number + 1 if self.number else None
+
+	def previous_page_number(self):
+		return self.number - 1 if self.number else None
+
+
+class KeysetPaginationMixin(object):
+	"""
+	Paginate a post ListView by key instead of offset.  Subclasses name
+	the URL pattern of their pages and the cache tags of their listing, in
+	``page_tags`` or, when they depend on the URL, ``get_page_tags()``.
+	"""
+	page_url_name = None
+	page_tags = None
+
+	def get_page_tags(self):
+		"""Cache tags bumped whenever a post on this listing changes."""
+		if self.page_tags is None:
+			raise ImproperlyConfigured("%s is missing page_tags or get_page_tags()" % self.__class__.__name__)
+		return list(self.page_tags)
+
+	def get_post_count(self):
+		"""The number of posts listed, if known without counting them."""
+		return None
+
+	def get_page_url_kwargs(self):
+		return dict((k, v) for k, v in self.kwargs.items() if k != self.page_kwarg)
+
+	def get_page_url(self, number):
+		if self.page_url_name is None:
+			raise ImproperlyConfigured("%s is missing page_url_name" % self.__class__.__name__)
+		return page_url(self.page_url_name, self.get_page_url_kwargs(), number, self.page_kwarg)
+
+	def paginate_queryset(self, queryset, page_size):
+		posts = queryset.order_by(*ORDERING)
+		self.post_count = self.get_post_count()
+		after = self.request.GET.get('after')
+		before = self.request.GET.get('before')
+
+		try:
+			if before:
+				key = decode_cursor(before)
+				rows = list(before_key(posts, key).reverse()[:page_size + 1])
+				has_previous = len(rows) > page_size
+				rows = rows[:page_size][::-1]
+				return None, self.make_page(rows, None, True, has_previous), rows, True
+
+			if after:
+				key = decode_cursor(after)
+				number, has_previous = None, True
+			else:
+				number = int(self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1)
+				if number < 1:
+					raise ValueError
+				has_previous = number > 1
+				key = None
+				if self.post_count is not None and number > max(1, int(math.ceil(float(self.post_count) / page_size))):
+					raise Http404("Invalid page (%s)" % number)
+				if number > 1:
+					boundaries = page_boundaries(queryset, page_size, self.get_page_tags(), number)
+					if number - 2 >= len(boundaries):
+						raise Http404("Invalid page (%s)" % number)
+					key = boundaries[number - 2]
+		except ValueError:
+			raise Http404("Invalid page cursor")
+
+		if key is not None:
+			posts = after_key(posts, key)
+		rows = list(posts[:page_size + 1])
+		has_next = len(rows) > page_size
+		rows = rows[:page_size]
+		return None, self.make_page(rows, number, has_next, has_previous), rows, True
+
+	def make_page(self, rows, number, has_next, has_previous):
+		if number:
+			next_url = self.get_page_url(number + 1)
+			previous_url = self.get_page_url(number - 1) if number > 1 else None
+		else:
+			next_url = rows and '?after=%s' % encode_cursor(rows[-1].pub_date, rows[-1].pk)
+			previous_url = rows and '?before=%s' % encode_cursor(rows[0].pub_date, rows[0].pk)
+		return KeysetPage(rows, number, has_next, has_previous, next_url, previous_url,
+			self.post_count, self.get_paginate_by(None))
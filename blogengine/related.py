@@ -0,0 +1,373 @@
+"""
+Related posts.
+
+``RelatedPost`` keeps the ``RELATED_POSTS`` closest neighbours of every
+post, so the detail page reads its block with one indexed query.  Two posts
+of the same site are scored by a weighted mix of the cosine of their TF-IDF
+vectors, the Jaccard overlap of their tags and whether they share a
+category.  Each vector is cut down to its ``TERMS_PER_POST`` heaviest words
+and stored as ``PostTerm`` rows, which double as an inverted index for
+finding candidate neighbours.
+
+``build()`` recomputes everything, with sparse matrix products when NumPy
+and SciPy are installed (they are in ``requirements-optional.txt``).  Between builds, saving a post recomputes its own
+list from the posts that share the most words, a tag or its category with
+it (at most ``MAX_CANDIDATES`` of each), and patches the lists of those
+posts that it enters, leaves or moves within.  That only happens when its
+text, site, category or tags change.
+Word document frequencies (``Term``) are counted per site, like the post
+totals they are compared with, and only refreshed by ``build()``; words
+first seen since then count as rare.
+"""
+
+import heapq
+import math
+
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from blogengine.cache import bump
+from blogengine.models import Post, PostTerm, RelatedPost, Term
+from blogengine.search import STOPWORDS, tokenize
+from blogengine.utils import iterate_by_pk
+
+# Only build() uses NumPy and SciPy, and they are slow to import, so they
+# are imported on its first run; None if they aren't installed
+numpy = sparse = None
+_tried_numpy = False
+
+RELATED_POSTS = 5
+TERMS_PER_POST = 50
+
+TEXT_WEIGHT = 0.6
+TAG_WEIGHT = 0.3
+CATEGORY_WEIGHT = 0.1
+
+# Posts considered per source (shared words, shared tags, shared category)
+# when a post is saved
+MAX_CANDIDATES = 200
+
+MAX_TERM_LENGTH = 100
+
+# Words in more than this share of a site's posts say little about any one of
+# them, and would make nearly every pair of posts neighbours.  They are
+# ignored once a site has enough posts for that to be costly.
+COMMON_WORD_SHARE = 0.5
+COMMON_WORD_MIN_POSTS = 100
+
+# Scores are rounded so that both build paths rank ties the same way
+SCORE_DIGITS = 6
+
+
+def term_counts(text):
+	counts = {}
+	for token in tokenize(text.lower()):
+		if token not in STOPWORDS and not token.isdigit() and len(token) <= MAX_TERM_LENGTH:
+			counts[token] = counts.get(token, 0) + 1
+	return counts
+
+
+def idf(post_count, total):
+	return math.log((1.0 + total) / (1.0 + post_count)) + 1
+
+
+def vector(counts, frequencies, total):
+	"""
+	Unit TF-IDF vector, as a dict, of the ``TERMS_PER_POST`` heaviest of
+	``counts``, given per-word post counts ``frequencies`` out of ``total``.
+	"""
+	common = COMMON_WORD_SHARE * total if total >= COMMON_WORD_MIN_POSTS else total
+	weights = [(count * idf(frequencies.get(term, 0), total), term) for term, count in counts.items()
+		if frequencies.get(term, 0) <= common]
+	top = heapq.nlargest(TERMS_PER_POST, weights)
+	norm = math.sqrt(sum(weight * weight for weight, term in top))
+	return dict((term, weight / norm) for weight, term in top) if norm else {}
+
+
+def score(text_similarity, tags, other_tags, category_id, other_category_id):
+	union = len(tags | other_tags)
+	tag_overlap = float(len(tags & other_tags)) / union if union else 0.0
+	same_category = 1.0 if category_id and category_id == other_category_id else 0.0
+	return round(TEXT_WEIGHT * text_similarity + TAG_WEIGHT * tag_overlap + CATEGORY_WEIGHT * same_category,
+		SCORE_DIGITS)
+
+
+def top_related(scores):
+	"""The best ``RELATED_POSTS`` of ``{post id: score}`` as ``[(id, score)]``."""
+	best = heapq.nsmallest(RELATED_POSTS, ((-s, pk) for pk, s in scores.items() if s > 0))
+	return [(pk, -s) for s, pk in best]
+
+
+def related_lists(post_ids):
+	"""Current ``{post id: [(related id, score)]}`` for ``post_ids``."""
+	lists = dict((pk, []) for pk in post_ids)
+	links = RelatedPost.objects.filter(post__in=post_ids).order_by('post', 'rank')
+	for post_id, related_id, link_score in links.values_list('post_id', 'related_id', 'score'):
+		lists[post_id].append((related_id, link_score))
+	return lists
+
+
+def write_lists(lists):
+	"""Replace the stored lists of ``{post id: [(related id, score)]}``."""
+	with transaction.atomic():
+		RelatedPost.objects.filter(post__in=list(lists)).delete()
+		RelatedPost.objects.bulk_create([
+			RelatedPost(post_id=post_id, related_id=related_id, score=link_score, rank=rank)
+			for post_id, related in lists.items()
+			for rank, (related_id, link_score) in enumerate(related)])
+
+
+def store_vector(post_id, post_vector):
+	with transaction.atomic():
+		PostTerm.objects.filter(post=post_id).delete()
+		PostTerm.objects.bulk_create([PostTerm(post_id=post_id, term=term, weight=weight)
+			for term, weight in post_vector.items()])
+
+
+def similar_texts(post, post_vector):
+	"""
+	``[(post id, cosine)]`` of the ``MAX_CANDIDATES`` posts of the site
+	sharing the most weight with ``post_vector``.  The dot products are
+	summed by the database, which scans the postings of common words far
+	faster than they could be fetched.
+	"""
+	if not post_vector:
+		return []
+	terms = list(post_vector)
+	cursor = connection.cursor()
+	cursor.execute(
+		"SELECT pt.post_id, SUM(pt.weight * CASE pt.term %(cases)s END) AS similarity "
+		"FROM %(term)s pt INNER JOIN %(post)s p ON p.id = pt.post_id "
+		"WHERE pt.term IN (%(terms)s) AND p.site_id = %%s AND pt.post_id != %%s "
+		"GROUP BY pt.post_id ORDER BY similarity DESC, pt.post_id LIMIT %%s"
+		% {'cases': ' '.join(['WHEN %s THEN %s'] * len(terms)), 'terms': ', '.join(['%s'] * len(terms)),
+			'term': PostTerm._meta.db_table, 'post': Post._meta.db_table},
+		[value for term in terms for value in (term, post_vector[term])] + terms
+			+ [post.site_id, post.pk, MAX_CANDIDATES])
+	return cursor.fetchall()
+
+
+def score_candidates(post, post_vector, tags):
+	"""``{post id: score}`` for every post of the site that could relate to ``post``."""
+	text_similarity = dict(similar_texts(post, post_vector))
+	others = Post.objects.filter(site=post.site_id).exclude(pk=post.pk).order_by('-pub_date')
+	candidates = set(text_similarity)
+	if tags:
+		candidates.update(others.filter(tags__in=tags).values_list('pk', flat=True).distinct()[:MAX_CANDIDATES])
+	if post.category_id:
+		candidates.update(others.filter(category=post.category_id).values_list('pk', flat=True)[:MAX_CANDIDATES])
+	# Posts listing this one must see its new score, even if it is now zero
+	candidates.update(RelatedPost.objects.filter(related=post.pk).values_list('post_id', flat=True))
+	candidates.discard(post.pk)
+	if not candidates:
+		return {}
+
+	candidate_tags = dict((pk, set()) for pk in candidates)
+	for post_id, tag_id in Post.tags.through.objects.filter(post__in=candidates).values_list('post_id', 'tag_id'):
+		candidate_tags[post_id].add(tag_id)
+	categories = Post.objects.filter(pk__in=candidates, site=post.site_id).values_list('pk', 'category_id')
+	return dict((pk, score(text_similarity.get(pk, 0.0), tags, candidate_tags[pk], post.category_id, category_id))
+		for pk, category_id in categories)
+
+
+def update_post(post):
+	"""
+	Recompute the vector and related list of ``post`` and patch the lists
+	of the posts it could enter or leave.  Returns the ids of every post
+	whose list changed.
+	"""
+	counts = term_counts(post.text)
+	frequencies = dict(Term.objects.filter(site=post.site_id, term__in=list(counts)).values_list('term', 'post_count'))
+	post_vector = vector(counts, frequencies, Post.objects.filter(site=post.site_id).count())
+	store_vector(post.pk, post_vector)
+
+	tags = set(post.tags.values_list('pk', flat=True))
+	scores = score_candidates(post, post_vector, tags)
+
+	current = related_lists([post.pk] + list(scores))
+	changed = {}
+	own = top_related(scores)
+	if own != current.pop(post.pk):
+		changed[post.pk] = own
+	# Scores are symmetric, so each candidate's list either gains, keeps or
+	# loses this post by comparing its score against the list's tail
+	for other, related in current.items():
+		listed = dict(related)
+		entering = scores[other] > 0 and (len(related) < RELATED_POSTS or scores[other] > related[-1][1])
+		if post.pk in listed or entering:
+			listed[post.pk] = scores[other]
+			updated = top_related(listed)
+			if updated != related:
+				changed[other] = updated
+
+	if changed:
+		write_lists(changed)
+		bump(['post:%s' % slug for slug in Post.objects.filter(pk__in=list(changed)).values_list('slug', flat=True)])
+	return list(changed)
+
+
+def related_posts(post):
+	"""The neighbours of ``post``, best first, without their bodies."""
+	links = RelatedPost.objects.filter(post=post.pk).select_related('related').defer('related__text', 'related__text_html')
+	return [link.related for link in links]
+
+
+def _insert(model, columns, rows, batch_size=2000):
+	"""Insert ``rows`` of ``columns`` values into ``model``'s table in batches of one statement."""
+	quote = connection.ops.quote_name
+	sql = "INSERT INTO %s (%s) VALUES (%s)" % (quote(model._meta.db_table),
+		', '.join(quote(column) for column in columns), ', '.join(['%s'] * len(columns)))
+	cursor = connection.cursor()
+	batch = []
+	for row in rows:
+		batch.append(row)
+		if len(batch) == batch_size:
+			cursor.executemany(sql, batch)
+			batch = []
+	if batch:
+		cursor.executemany(sql, batch)
+
+
+def _import_numpy():
+	global numpy, sparse, _tried_numpy
+	if not _tried_numpy:
+		_tried_numpy = True
+		try:
+			import numpy
+			from scipy import sparse
+		except ImportError:
+			numpy = sparse = None
+
+
+def build():
+	"""Recompute every vector, word frequency and related list."""
+	_import_numpy()
+	posts = Post.objects.all()
+	# Two passes over the text, so it is never all in memory at once
+	frequencies, site_posts = {}, {}
+	for pk, site_id, text in iterate_by_pk(posts, ('pk', 'site', 'text')):
+		site_frequencies = frequencies.setdefault(site_id, {})
+		for term in term_counts(text):
+			site_frequencies[term] = site_frequencies.get(term, 0) + 1
+		site_posts.setdefault(site_id, []).append(pk)
+	sites = dict((pk, site_id) for site_id, pks in site_posts.items() for pk in pks)
+	vectors = dict((pk, vector(term_counts(text), frequencies[sites[pk]], len(site_posts[sites[pk]])))
+		for pk, text in iterate_by_pk(posts, ('pk', 'text')))
+
+	with transaction.atomic():
+		Term.objects.all().delete()
+		_insert(Term, ('site_id', 'term', 'post_count'), ((site_id, term, count)
+			for site_id, site_frequencies in frequencies.iteritems() for term, count in site_frequencies.iteritems()))
+		PostTerm.objects.all().delete()
+		_insert(PostTerm, ('post_id', 'term', 'weight'),
+			((pk, term, weight) for pk, post_vector in vectors.iteritems() for term, weight in post_vector.iteritems()))
+
+		RelatedPost.objects.all().delete()
+		related_lists = _related_lists_sparse if sparse is not None else _related_lists_scan
+		for site_id, pks in site_posts.items():
+			_insert(RelatedPost, ('post_id', 'related_id', 'score', 'rank'),
+				((pk, related_id, link_score, rank) for pk, related in related_lists(site_id, pks, vectors).iteritems()
+					for rank, (related_id, link_score) in enumerate(related)))
+	bump(['post:%s' % slug for slug in Post.objects.values_list('slug', flat=True)])
+
+
+def _related_lists_scan(site_id, post_ids, vectors):
+	lists = {}
+	for post in Post.objects.filter(site=site_id).only('pk', 'site', 'category'):
+		tags = set(post.tags.values_list('pk', flat=True))
+		lists[post.pk] = top_related(score_candidates(post, vectors[post.pk], tags))
+	return lists
+
+
+def _related_lists_sparse(site_id, post_ids, vectors, chunk_cells=2000000):
+	"""
+	The lists of ``post_ids``, all of ``site_id``, from sparse products of
+	their word, tag and category matrices.  Rows are scored a chunk at a
+	time, sized so a chunk has at most ``chunk_cells`` cells.
+	"""
+	row = dict((pk, i) for i, pk in enumerate(post_ids))
+	size = len(post_ids)
+
+	def matrix(pairs):
+		columns = {}
+		rows, cols, data = [], [], []
+		for pk, key, value in pairs:
+			rows.append(row[pk])
+			cols.append(columns.setdefault(key, len(columns)))
+			data.append(value)
+		return sparse.csr_matrix((data, (rows, cols)), shape=(size, max(len(columns), 1)))
+
+	words = matrix((pk, term, weight) for pk in post_ids for term, weight in vectors[pk].iteritems())
+	links = Post.tags.through.objects.filter(post__site=site_id).values_list('post_id', 'tag_id')
+	tags = matrix((pk, tag_id, 1.0) for pk, tag_id in links)
+	categories = matrix((pk, category_id, 1.0) for pk, category_id
+		in Post.objects.filter(site=site_id, category__isnull=False).values_list('pk', 'category_id'))
+	tag_counts = numpy.asarray(tags.sum(axis=1)).ravel()
+	ids = numpy.array(post_ids)
+
+	lists = {}
+	chunk_size = max(1, chunk_cells // size)
+	for start in range(0, size, chunk_size):
+		stop = min(start + chunk_size, size)
+		text = words[start:stop].dot(words.T)
+		shared = tags[start:stop].dot(tags.T).tocoo()
+		union = tag_counts[shared.row + start] + tag_counts[shared.col] - shared.data
+		overlap = sparse.csr_matrix((shared.data / union, (shared.row, shared.col)), shape=shared.shape)
+		same_category = categories[start:stop].dot(categories.T)
+		scores = sparse.csr_matrix(TEXT_WEIGHT * text + TAG_WEIGHT * overlap + CATEGORY_WEIGHT * same_category)
+		for i in range(stop - start):
+			columns = scores.indices[scores.indptr[i]:scores.indptr[i + 1]]
+			values = numpy.round(scores.data[scores.indptr[i]:scores.indptr[i + 1]], SCORE_DIGITS)
+			keep = columns != start + i
+			columns, values = columns[keep], values[keep]
+			if len(values) > RELATED_POSTS:
+				# Everything tied with the last place goes on to the exact ranking
+				cutoff = numpy.partition(values, len(values) - RELATED_POSTS)[len(values) - RELATED_POSTS]
+				best = values >= cutoff
+				columns, values = columns[best], values[best]
+			lists[post_ids[start + i]] = top_related(dict(zip(ids[columns].tolist(), values.tolist())))
+	return lists
+
+
+@receiver(post_save, sender=Post)
+def relate_saved_post(sender, instance, **kwargs):
+	# Nothing else a post's scores depend on is saved with it
+	original = getattr(instance, '_original', None)
+	if original and (original.text, original.site_id, original.category_id) == (
+			instance.text, instance.site_id, instance.category_id):
+		return
+	update_post(instance)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def relate_retagged_post(sender, instance, action, reverse, pk_set, **kwargs):
+	links = sender.objects.filter(**{'tag' if reverse else 'post': instance})
+	if action in ('pre_remove', 'pre_clear'):
+		# Only links that exist are removed, and a clear doesn't say which
+		if action == 'pre_remove':
+			links = links.filter(**{'post__in' if reverse else 'tag__in': pk_set})
+		instance._retagged_post_ids = set(links.values_list('post_id', flat=True))
+		return
+
+	if action == 'post_add':
+		# Links that already existed are left out of pk_set
+		post_ids = pk_set if reverse or not pk_set else set([instance.pk])
+	elif action in ('post_remove', 'post_clear'):
+		post_ids = getattr(instance, '_retagged_post_ids', set())
+	else:
+		return
+	if not reverse:
+		if post_ids:
+			update_post(instance)
+	else:
+		for post in Post.objects.filter(pk__in=post_ids):
+			update_post(post)
+
+
+@receiver(pre_delete, sender=Post)
+def unrelate_deleted_post(sender, instance, **kwargs):
+	# The links themselves go with the post; the pages showing them must too.
+	# Lists that lose it stay one short until they are next recomputed.
+	listing = RelatedPost.objects.filter(related=instance.pk).values_list('post__slug', flat=True)
+	bump(['post:%s' % slug for slug in listing])
@@ -0,0 +1,115 @@
+"""
+The markdown2 renderers behind ``blogengine.markup.render_markdown()``.
+"""
+
+import hashlib
+import re
+
+import markdown2
+
+from django.utils.encoding import force_unicode, smart_str
+
+from blogengine.markup import (MARKDOWN_EXTRAS, block_cache, highlight_cache, highlight_key,
+	renderer_fingerprint)
+
+
+class CachedMarkdown(markdown2.Markdown):
+	"""markdown2 with highlighted code blocks served from ``highlight_cache``."""
+
+	def _color_with_pygments(self, codeblock, lexer, **formatter_opts):
+		highlight = super(CachedMarkdown, self)._color_with_pygments
+		return highlight_cache.get_or_render(highlight_key(codeblock, lexer, formatter_opts),
+			lambda: highlight(codeblock, lexer, **formatter_opts))
+
+
+class BlockMarkdown(CachedMarkdown):
+	"""
+	Renders the top-level blocks of a post separately and caches the HTML of
+	each in ``block_cache``, under a hash of the block and of the link
+	definitions it refers to.  The output is the same as a full render.
+	markdown2 stands in salted, per-process placeholders for code and raw
+	HTML, so keys are hashed with those swapped back for what they hide.
+
+	The preprocessing that needs the whole text (fenced code, raw HTML and
+	link definitions) still runs over all of it, as in ``Markdown.convert()``
+	of the markdown2 version below, whose steps are repeated here.  A block
+	starts at a line that isn't indented, after a blank line, unless a list
+	or a blockquote before it carries on there.  Texts this can't split
+	safely, with raw HTML or unclosed fences left after preprocessing, are
+	rendered in full.
+	"""
+
+	markdown2_version = '2.3.0'
+
+	_block_start_re = re.compile(r'\n{2,}(?=\S)')
+	_continued_re = re.compile(r'(?:%s|%s)[ \t]+|>' % (markdown2.Markdown._marker_ul,
+		markdown2.Markdown._marker_ol))
+	_unsplittable_re = re.compile(r'^(?:[ ]{0,3}<|```)', re.M)
+	_placeholder_re = re.compile(r'md5-[0-9a-f]{32}')
+
+	def can_split(self):
+		return (markdown2.__version__ == self.markdown2_version and not self.safe_mode
+			and not self.use_file_vars and sorted(self.extras) == sorted(MARKDOWN_EXTRAS))
+
+	def split_blocks(self, text):
+		"""The top-level blocks of preprocessed ``text``, each with the blank lines after it."""
+		blocks, start = [], 0
+		for match in self._block_start_re.finditer(text):
+			if self._continued_re.match(text, match.end()):
+				continue
+			blocks.append(text[start:match.end()])
+			start = match.end()
+		blocks.append(text[start:])
+		return [block for block in blocks if block.strip()]
+
+	def unhash(self, text):
+		"""``text`` with markdown2's placeholders replaced by what they stand for."""
+		escapes = dict((placeholder, char) for char, placeholder in self._escape_table.items())
+
+		def original(match):
+			placeholder = match.group(0)
+			if placeholder in self.html_blocks:
+				# Delimited, so it can't pass for the same text written inline
+				return u'\0%s\0' % self.unhash(self.html_blocks[placeholder])
+			return escapes.get(placeholder, placeholder)
+		return self._placeholder_re.sub(original, text)
+
+	def block_key(self, block):
+		block = self.unhash(block)
+		# A reference id can span lines; match them the way _do_links() does
+		normalized = re.sub(r'[ ]?\n', ' ', block.lower())
+		links = sorted((link_id, url, self.titles.get(link_id))
+			for link_id, url in self.urls.items() if link_id in normalized)
+		digest = hashlib.sha1(renderer_fingerprint())
+		digest.update("\0%r\0" % links)
+		digest.update(smart_str(block))
+		return 'blogengine:block:%s' % digest.hexdigest()
+
+	def preprocessed_blocks(self, text):
+		"""The blocks of ``text`` after the whole-text steps, or None if it can't be split."""
+		if not self.can_split():
+			return None
+		self.reset()
+		text = force_unicode(text)
+		text = re.sub("\r\n|\r", "\n", text) + "\n\n"
+		text = self._detab(text)
+		text = self._ws_only_line_re.sub("", text)
+		text = self.preprocess(text)
+		text = self._do_fenced_code_blocks(text)
+		text = self._hash_html_blocks(text, raw=True)
+		text = self._strip_link_definitions(text)
+		if self._unsplittable_re.search(text):
+			return None
+		return self.split_blocks(text) or None
+
+	def convert(self, text):
+		blocks = self.preprocessed_blocks(text)
+		if blocks is None:
+			return super(BlockMarkdown, self).convert(text)
+		html = [block_cache.get_or_render(self.block_key(block), lambda: self.render_block(block))
+			for block in blocks]
+		return markdown2.UnicodeWithAttrs(u"\n\n".join(html) + u"\n")
+
+	def render_block(self, block):
+		html = self.postprocess(self._run_block_gamut(block))
+		return self._unescape_special_chars(html)
@@ -0,0 +1,144 @@
+"""
+Read replicas for the public pages.
+
+``ReplicaRouter`` sends reads of blog posts, categories, tags and flat pages
+to one of the database aliases in ``BLOGENGINE_READ_REPLICAS``, and
+everything else, every write included, to ``default``.  Reads only leave
+the primary inside a request ``ReplicaMiddleware`` has allowed to: a GET or
+HEAD outside the admin from a client that hasn't written recently.
+Management commands, the admin and signal receivers always see the
+primary, so nothing is ever updated from a stale read.
+
+Replicas take turns, one per request so a page never mixes two of them.
+One that can't be connected to is skipped for
+``BLOGENGINE_REPLICA_RETRY_SECONDS``; with none left, reads go to the
+primary.  A request that writes sets a cookie that keeps its client on the
+primary for ``BLOGENGINE_PRIMARY_STICKY_SECONDS``, long enough for the
+replicas to catch up, so nobody misses their own change.
+
+The caches are keyed on versions bumped on the primary, so a page built
+from a lagging replica right after a bump would be cached under the new
+version and outlive the lag.  Shared cache entries built from replica reads
+are therefore only kept for ``cache_timeout()`` (the sticky interval), and
+the small per-process memos built once per version read the primary inside
+``primary()``.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PRIMARY = 'default'
+
+# Apps whose reads may be served by a replica
+REPLICATED_APPS = frozenset(['blogengine', 'flatpages'])
+
+PRIMARY_COOKIE = 'blogengine_primary'
+
+_local = threading.local()
+
+# Per process: where the round robin is, and when each failed replica may
+# be tried again
+_turns = itertools.count()
+_down_until = {}
+
+
+def get_replicas():
+	return list(getattr(settings, 'BLOGENGINE_READ_REPLICAS', ()))
+
+
+def sticky_seconds():
+	return getattr(settings, 'BLOGENGINE_PRIMARY_STICKY_SECONDS', 10)
+
+
+def reset():
+	"""Go back to reading everything from the primary."""
+	_local.use_replicas = False
+	_local.replica = None
+	_local.wrote = False
+
+
+def read_from_replicas():
+	"""Send reads to a replica until ``reset()`` or the next write."""
+	_local.use_replicas = True
+
+
+def wrote():
+	"""Whether anything was written since ``reset()``."""
+	return getattr(_local, 'wrote', False)
+
+
+def used_replica():
+	"""Whether anything was read from a replica since ``reset()``."""
+	return getattr(_local, 'replica', None) not in (None, PRIMARY)
+
+
+def cache_timeout(timeout):
+	"""
+	``timeout`` for a cache entry built in this request, cut down to
+	``sticky_seconds()`` if it may hold rows read from a lagging replica.
+	"""
+	if not used_replica():
+		return timeout
+	return sticky_seconds() if timeout is None else min(timeout, sticky_seconds())
+
+
+@contextmanager
+def primary():
+	"""Read everything from the primary inside the block."""
+	use_replicas = getattr(_local, 'use_replicas', False)
+	_local.use_replicas = False
+	try:
+		yield
+	finally:
+		_local.use_replicas = use_replicas
+
+
+def healthy(alias):
+	"""Connect to ``alias`` unless it failed recently; False if that fails."""
+	if _down_until.get(alias, 0) > time.time():
+		return False
+	try:
+		connections[alias].ensure_connection()
+	except DatabaseError:
+		_down_until[alias] = time.time() + getattr(settings, 'BLOGENGINE_REPLICA_RETRY_SECONDS', 30)
+		return False
+	_down_until.pop(alias, None)
+	return True
+
+
+def choose_replica():
+	"""The next healthy replica in turn, or the primary if there is none."""
+	replicas = get_replicas()
+	start = next(_turns)
+	for offset in range(len(replicas)):
+		alias = replicas[(start + offset) % len(replicas)]
+		if healthy(alias):
+			return alias
+	return PRIMARY
+
+
+class ReplicaRouter(object):
+	def db_for_read(self, model, **hints):
+		if (model._meta.app_label not in REPLICATED_APPS or not getattr(_local, 'use_replicas', False)
+				or _local.wrote):
+			return PRIMARY
+		if _local.replica is None:
+			_local.replica = choose_replica()
+		return _local.replica
+
+	def db_for_write(self, model, **hints):
+		# Whatever is read after a write has to see it
+		_local.wrote = True
+		return PRIMARY
+
+	def allow_relation(self, obj1, obj2, **hints):
+		# The replicas hold the same rows as the primary
+		databases = set([PRIMARY] + get_replicas())
+		if obj1._state.db in databases and obj2._state.db in databases:
+			return True
+		return None
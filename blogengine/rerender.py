@@ -0,0 +1,110 @@
+"""
+Bulk re-rendering of the stored post HTML.
+
+The parent process streams post ids in chunks to a pool of workers.  Each
+worker loads the text for its chunk, renders the posts whose
+``text_html_key`` is stale and hands the HTML, excerpt and teaser back.
+The parent writes each chunk in a single transaction with one batched
+UPDATE, so an interrupted run loses at most the chunks in flight.  A re-run
+picks up where it left off, because posts that were already written have a
+current key and are skipped.
+
+The UPDATE bypasses ``post_save``, so it sets ``updated_at`` itself, and
+once posts were rewritten the whole page and feed cache is invalidated in
+one go by bumping the ``global`` tag.
+"""
+
+import time
+from multiprocessing import Pool
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from blogengine.cache import GLOBAL_TAG, bump
+from blogengine.markup import render_key, render_markdown, render_summary
+from blogengine.models import Post
+from blogengine.utils import iterate_by_pk
+
+CHUNK_SIZE = 100
+
+
+def _chunks(chunk_size):
+	chunk = []
+	for pk, in iterate_by_pk(Post.objects.all(), ('pk',)):
+		chunk.append(pk)
+		if len(chunk) == chunk_size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+def render_chunk(job):
+	"""
+	Render the stale posts among ``pks``; runs in the worker processes.
+	Returns the number of posts checked and ``(html, excerpt, teaser_html,
+	key, pk)`` rows.
+	"""
+	pks, force = job
+	rows = []
+	posts = Post.objects.filter(pk__in=pks).values_list('pk', 'text', 'text_html_key')
+	for pk, text, current_key in posts:
+		key = render_key(text)
+		if force or key != current_key:
+			html = render_markdown(text)
+			excerpt, teaser_html = render_summary(html)
+			rows.append((html, excerpt, teaser_html, key, pk))
+	return len(pks), rows
+
+
+def write_rows(rows):
+	"""
+	Store rendered ``(html, excerpt, teaser_html, key, pk)`` rows with one
+	batched UPDATE, marking the posts as updated now.
+	"""
+	if not rows:
+		return
+	quote = connection.ops.quote_name
+	columns = ('text_html', 'excerpt', 'teaser_html', 'text_html_key', 'updated_at')
+	sql = "UPDATE %s SET %s WHERE %s = %%s" % (quote(Post._meta.db_table),
+		', '.join('%s = %%s' % quote(column) for column in columns), quote(Post._meta.pk.column))
+	now = connection.ops.value_to_db_datetime(timezone.now())
+	with transaction.atomic():
+		connection.cursor().executemany(sql, [row[:-1] + (now, row[-1]) for row in rows])
+
+
+def rerender(processes=None, force=False, chunk_size=CHUNK_SIZE, progress=None):
+	"""
+	Re-render every post whose stored HTML is stale, or every post with
+	``force``.  ``progress(checked, rendered, elapsed)`` is called after each
+	chunk is written, and the cached pages are invalidated at the end if
+	any post was rendered.  Returns ``(checked, rendered)``.
+	"""
+	jobs = ((chunk, force) for chunk in _chunks(chunk_size))
+	started = time.time()
+	checked = rendered = 0
+
+	pool = None
+	if processes == 1:
+		results = (render_chunk(job) for job in jobs)
+	else:
+		# Forked workers must not share the parent's database connections
+		for conn in connections.all():
+			conn.close()
+		pool = Pool(processes)
+		results = pool.imap_unordered(render_chunk, jobs)
+
+	try:
+		for count, rows in results:
+			write_rows(rows)
+			checked += count
+			rendered += len(rows)
+			if progress:
+				progress(checked, rendered, time.time() - started)
+	finally:
+		if pool is not None:
+			pool.terminate()
+			pool.join()
+		if rendered:
+			bump([GLOBAL_TAG])
+	return checked, rendered
@@ -0,0 +1,243 @@
+"""
+Full-text search over posts.
+
+The backend is picked from the database vendor: an FTS5 virtual table on
+SQLite, a weighted ``tsvector`` column with a GIN index on PostgreSQL, and a
+plain ``icontains`` scan everywhere else.  Every backend ranks title matches
+above body matches and returns an ordered list of post ids.  The index is
+kept current by the ``post_save``/``post_delete`` receivers at the bottom of
+this module.
+
+Queries are normalized (case, punctuation, word order, stopwords) and the
+ranked id list for each normalized query is cached under the ``search``
+tag, so paging through results or repeating a popular search doesn't
+query the index again.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from blogengine import replicas
+from blogengine.cache import bump, get_cache, get_versions, search_tags
+from blogengine.models import Post
+
+# Relative weight of a title hit over a body hit.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+# Ranked results past this point are never paged through, and capping them
+# keeps the cost of a query independent of how many posts match.
+MAX_RESULTS = 1000
+
+# Cached result lists expire after this many seconds even if no post changes
+SEARCH_CACHE_TIMEOUT = 10 * 60
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOPWORDS = frozenset('''
+	a an and are as at be but by for from has have how i if in into is it its
+	of on or so that the their then there these this to was were what when
+	where which who will with you your
+'''.split())
+
+
+def tokenize(query):
+	return TOKEN_RE.findall(query)
+
+
+def normalize_query(query):
+	"""
+	Canonical form of ``query``: lowercase, deduplicated, sorted tokens with
+	stopwords removed (unless nothing else is left).  Every backend ANDs the
+	tokens together, so their order never affects the results.
+	"""
+	tokens = set(token.lower() for token in tokenize(query))
+	return u' '.join(sorted(tokens - STOPWORDS or tokens))
+
+
+class SearchBackend(object):
+	"""Unindexed fallback that scans the post table."""
+
+	def __init__(self, using):
+		self.using = using
+
+	def cursor(self):
+		return connections[self.using].cursor()
+
+	def ensure_index(self):
+		pass
+
+	def index_post(self, post):
+		pass
+
+	def remove_post(self, post_id):
+		pass
+
+	def rebuild(self):
+		pass
+
+	def all_ids(self):
+		return list(Post.on_site.using(self.using).values_list('pk', flat=True)[:MAX_RESULTS])
+
+	def search(self, query):
+		"""Return the ids of the posts matching ``query``, best match first."""
+		tokens = tokenize(query)
+		if not tokens:
+			return self.all_ids()
+		return self.search_tokens(tokens)
+
+	def search_tokens(self, tokens):
+		posts = Post.on_site.using(self.using)
+		for token in tokens:
+			posts = posts.filter(Q(text__icontains=token) | Q(title__icontains=token))
+		return list(posts.values_list('pk', flat=True)[:MAX_RESULTS])
+
+
+class SqliteFTSBackend(SearchBackend):
+	table = 'blogengine_post_fts'
+
+	def ensure_index(self):
+		self.cursor().execute(
+			"CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(title, text)" % self.table)
+
+	def index_post(self, post):
+		cursor = self.cursor()
+		cursor.execute("DELETE FROM %s WHERE rowid = %%s" % self.table, [post.pk])
+		cursor.execute("INSERT INTO %s (rowid, title, text) VALUES (%%s, %%s, %%s)" % self.table,
+			[post.pk, post.title, post.text])
+
+	def remove_post(self, post_id):
+		self.cursor().execute("DELETE FROM %s WHERE rowid = %%s" % self.table, [post_id])
+
+	def rebuild(self):
+		cursor = self.cursor()
+		cursor.execute("DELETE FROM %s" % self.table)
+		cursor.execute("INSERT INTO %s (rowid, title, text) SELECT id, title, text FROM %s"
+			% (self.table, Post._meta.db_table))
+
+	def search_tokens(self, tokens):
+		# Quote every token so user input can't inject FTS5 query syntax, and
+		# prefix-match it to keep the old substring-ish behaviour.
+		match = " ".join('"%s"*' % token.replace('"', '""') for token in tokens)
+		cursor = self.cursor()
+		cursor.execute(
+			"SELECT p.id FROM %(fts)s f JOIN %(post)s p ON p.id = f.rowid "
+			"WHERE %(fts)s MATCH %%s AND p.site_id = %%s "
+			"ORDER BY bm25(%(fts)s, %(title)s, %(text)s), p.pub_date DESC LIMIT %%s"
+			% {'fts': self.table, 'post': Post._meta.db_table,
+				'title': TITLE_WEIGHT, 'text': TEXT_WEIGHT},
+			[match, settings.SITE_ID, MAX_RESULTS])
+		return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend(SearchBackend):
+	column = 'search_vector'
+	index = 'blogengine_post_search_vector'
+	vector_sql = ("setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+		"setweight(to_tsvector('english', coalesce(text, '')), 'B')")
+
+	def ensure_index(self):
+		table = Post._meta.db_table
+		cursor = self.cursor()
+		cursor.execute("SELECT 1 FROM information_schema.columns "
+			"WHERE table_name = %s AND column_name = %s", [table, self.column])
+		if not cursor.fetchone():
+			cursor.execute("ALTER TABLE %s ADD COLUMN %s tsvector" % (table, self.column))
+			self.rebuild()
+		cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [self.index])
+		if not cursor.fetchone():
+			cursor.execute("CREATE INDEX %s ON %s USING gin(%s)" % (self.index, table, self.column))
+
+	def index_post(self, post):
+		self.cursor().execute("UPDATE %s SET %s = %s WHERE id = %%s"
+			% (Post._meta.db_table, self.column, self.vector_sql), [post.pk])
+
+	def rebuild(self):
+		self.cursor().execute("UPDATE %s SET %s = %s"
+			% (Post._meta.db_table, self.column, self.vector_sql))
+
+	def search_tokens(self, tokens):
+		# ts_rank weighs 'A' (title) lexemes at 1.0 and 'B' (body) at 0.4.
+		tsquery = " & ".join("%s:*" % token for token in tokens)
+		cursor = self.cursor()
+		cursor.execute(
+			"SELECT id FROM %(post)s, to_tsquery('english', %%s) query "
+			"WHERE %(column)s @@ query AND site_id = %%s "
+			"ORDER BY ts_rank(%(column)s, query) DESC, pub_date DESC LIMIT %%s"
+			% {'post': Post._meta.db_table, 'column': self.column},
+			[tsquery, settings.SITE_ID, MAX_RESULTS])
+		return [row[0] for row in cursor.fetchall()]
+
+
+_backends = {}
+
+
+def _sqlite_has_fts5(connection):
+	cursor = connection.cursor()
+	cursor.execute("PRAGMA compile_options")
+	return any('FTS5' in row[0] for row in cursor.fetchall())
+
+
+def get_backend(using='default'):
+	if using not in _backends:
+		connection = connections[using]
+		if connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+			backend = SqliteFTSBackend(using)
+		elif connection.vendor == 'postgresql':
+			backend = PostgresBackend(using)
+		else:
+			backend = SearchBackend(using)
+		_backends[using] = backend
+	return _backends[using]
+
+
+def search_post_ids(query):
+	"""Ranked ids of the posts matching ``query``, cached per normalized query."""
+	query = normalize_query(query)
+	version, = get_versions(search_tags({}))
+	key = 'blogengine:search:%s:%s:%s' % (settings.SITE_ID, version, hashlib.md5(query.encode('utf-8')).hexdigest())
+	cache = get_cache()
+	ids = cache.get(key)
+	if ids is None:
+		# The index lives next to the posts, so it is read from the same replica
+		ids = get_backend(router.db_for_read(Post)).search(query)
+		cache.set(key, ids, replicas.cache_timeout(SEARCH_CACHE_TIMEOUT))
+	return ids
+
+
+def invalidate_results():
+	bump(search_tags({}))
+
+
+def rebuild_index(using='default'):
+	"""Create the index if needed, re-index every post and drop cached results."""
+	backend = get_backend(using)
+	backend.ensure_index()
+	backend.rebuild()
+	invalidate_results()
+	return backend
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using='default', **kwargs):
+	if sender.name == 'blogengine':
+		get_backend(using).ensure_index()
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, using='default', **kwargs):
+	get_backend(using).index_post(instance)
+	# Results cached between the page cache bump and this update are stale
+	invalidate_results()
+
+
+@receiver(post_delete, sender=Post)
+def remove_post(sender, instance, using='default', **kwargs):
+	get_backend(using).remove_post(instance.pk)
+	invalidate_results()
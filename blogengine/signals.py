@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent after a Markdown document has been rendered, with the wall time in seconds
+markdown_rendered = Signal(providing_args=['duration'])
@@ -0,0 +1,209 @@
+"""
+Render the whole blog to static files.
+
+``site_pages()`` lists every page the static site needs (posts, the
+paginated index, category, tag and month archive listings, and flat pages)
+together with a fingerprint of everything that page is rendered from.  A
+build compares those fingerprints with the manifest of the previous build
+and only renders the pages whose inputs changed, spreading the rendering
+over a process pool.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.db import connections
+from django.template.loaders.app_directories import app_template_dirs
+from django.test import Client
+from django.utils import timezone
+
+from blogengine.models import ArchiveMonth, Category, Post, RelatedPost, Tag
+from blogengine.pagination import POSTS_PER_PAGE, page_url
+from blogengine.taxonomy import summary
+
+MANIFEST_NAME = '.build-manifest.json'
+
+
+def _hash(*parts):
+	return hashlib.sha1('\0'.join(str(part) for part in parts)).hexdigest()
+
+
+def template_fingerprint():
+	"""Hash of every template the pages could be rendered from."""
+	digest = hashlib.sha1()
+	for directory in list(settings.TEMPLATE_DIRS) + list(app_template_dirs):
+		for root, dirs, files in sorted(os.walk(directory)):
+			dirs.sort()
+			for name in sorted(files):
+				path = os.path.join(root, name)
+				digest.update(path)
+				with open(path, 'rb') as template:
+					digest.update(template.read())
+	return digest.hexdigest()
+
+
+def global_fingerprint():
+	"""Inputs shared by every page: templates and the sidebar."""
+	months = ArchiveMonth.objects.filter(site_id=settings.SITE_ID).values_list('year', 'month')
+	taxonomy = summary()
+	return _hash(template_fingerprint(), list(months), taxonomy['categories'], taxonomy['tag_cloud'],
+		settings.STATIC_URL)
+
+
+def _month(pub_date):
+	if timezone.is_aware(pub_date):
+		pub_date = timezone.localtime(pub_date)
+	return pub_date.year, pub_date.month
+
+
+def _listing_pages(url_name, kwargs, fingerprints, shared):
+	pages = [fingerprints[start:start + POSTS_PER_PAGE]
+		for start in range(0, len(fingerprints), POSTS_PER_PAGE)] or [[]]
+	for number, page in enumerate(pages, 1):
+		yield page_url(url_name, kwargs, number), _hash(shared, number, len(pages), *page)
+
+
+def site_pages():
+	"""Yield ``(url, fingerprint)`` for every page of the static site."""
+	shared = global_fingerprint()
+
+	category_updates = dict(Category.objects.values_list('pk', 'updated_at'))
+	category_slugs = dict(Category.objects.values_list('pk', 'slug'))
+	tag_updates = dict(Tag.objects.values_list('pk', 'updated_at'))
+	tag_slugs = dict(Tag.objects.values_list('pk', 'slug'))
+	post_tags = {}
+	links = Post.tags.through.objects.filter(post__site=settings.SITE_ID).values_list('post_id', 'tag_id')
+	for post_id, tag_id in links.iterator():
+		post_tags.setdefault(post_id, []).append(tag_id)
+	# A post page also shows the titles of its related posts
+	post_related = {}
+	links = (RelatedPost.objects.filter(post__site=settings.SITE_ID).order_by('post', 'rank')
+		.values_list('post_id', 'related_id', 'related__updated_at'))
+	for post_id, related_id, updated_at in links.iterator():
+		post_related.setdefault(post_id, []).append('%s@%s' % (related_id, updated_at))
+
+	index = []
+	by_category = OrderedDict((pk, []) for pk in category_slugs)
+	by_tag = OrderedDict((pk, []) for pk in tag_slugs)
+	by_month = OrderedDict()
+
+	posts = Post.on_site.order_by('-pub_date', '-pk').values_list(
+		'pk', 'slug', 'pub_date', 'updated_at', 'category_id')
+	for pk, slug, pub_date, updated_at, category_id in posts.iterator():
+		tags = sorted(post_tags.get(pk, []))
+		fingerprint = _hash(pk, updated_at, category_id, category_updates.get(category_id),
+			*['%s@%s' % (tag, tag_updates[tag]) for tag in tags])
+
+		year, month = _month(pub_date)
+		page = _hash(shared, fingerprint, *post_related.get(pk, []))
+		yield '/%s/%s/%s/' % (pub_date.year, pub_date.month, slug), page
+
+		index.append(fingerprint)
+		if category_id:
+			by_category[category_id].append(fingerprint)
+		for tag in tags:
+			by_tag[tag].append(fingerprint)
+		by_month.setdefault((year, month), []).append(fingerprint)
+
+	for page in _listing_pages('blogengine:index', {}, index, shared):
+		yield page
+	for pk, fingerprints in by_category.items():
+		for page in _listing_pages('blogengine:category', {'slug': category_slugs[pk]}, fingerprints, shared):
+			yield page
+	for pk, fingerprints in by_tag.items():
+		for page in _listing_pages('blogengine:tag', {'slug': tag_slugs[pk]}, fingerprints, shared):
+			yield page
+	for (year, month), fingerprints in by_month.items():
+		for page in _listing_pages('blogengine:archive_month', {'year': year, 'month': month}, fingerprints, shared):
+			yield page
+
+	flatpages = FlatPage.objects.filter(sites=settings.SITE_ID, registration_required=False)
+	for url, title, content, template_name in flatpages.values_list('url', 'title', 'content', 'template_name'):
+		yield url, _hash(shared, title, content, template_name)
+
+
+def output_path(output_dir, url):
+	return os.path.join(output_dir, url.strip('/'), 'index.html')
+
+
+_client = None
+
+
+def render_page(job):
+	"""Render one URL into the output directory; runs in the worker processes."""
+	global _client
+	url, output_dir = job
+	if _client is None:
+		_client = Client()
+	response = _client.get(url)
+	if response.status_code == 200:
+		path = output_path(output_dir, url)
+		if not os.path.isdir(os.path.dirname(path)):
+			try:
+				os.makedirs(os.path.dirname(path))
+			except OSError:
+				# Made by another worker
+				pass
+		with open(path, 'wb') as page:
+			page.write(response.content)
+	return url, response.status_code
+
+
+def read_manifest(output_dir):
+	try:
+		with open(os.path.join(output_dir, MANIFEST_NAME)) as manifest:
+			return json.load(manifest)
+	except (IOError, ValueError):
+		return {}
+
+
+def write_manifest(output_dir, manifest):
+	path = os.path.join(output_dir, MANIFEST_NAME)
+	with open(path + '.tmp', 'w') as tmp:
+		json.dump(manifest, tmp, sort_keys=True, indent=0)
+	os.rename(path + '.tmp', path)
+
+
+def build(output_dir, processes=None, force=False):
+	"""
+	Bring ``output_dir`` up to date and return ``(rendered, removed, failed)``
+	lists of URLs.
+	"""
+	if not os.path.isdir(output_dir):
+		os.makedirs(output_dir)
+	previous = {} if force else read_manifest(output_dir)
+	pages = dict(site_pages())
+	stale = sorted(url for url, fingerprint in pages.items() if previous.get(url) != fingerprint)
+	removed = sorted(url for url in previous if url not in pages)
+
+	jobs = [(url, output_dir) for url in stale]
+	if processes == 1 or len(jobs) < 2:
+		results = map(render_page, jobs)
+	else:
+		# Forked workers must not share the parent's database connections
+		for connection in connections.all():
+			connection.close()
+		pool = Pool(processes)
+		try:
+			results = list(pool.imap_unordered(render_page, jobs, chunksize=16))
+		finally:
+			pool.close()
+			pool.join()
+
+	failed = [url for url, status in results if status != 200]
+	manifest = dict((url, fingerprint) for url, fingerprint in pages.items() if url not in failed)
+
+	for url in removed:
+		path = output_path(output_dir, url)
+		if os.path.exists(path):
+			os.remove(path)
+			if url != '/' and not os.listdir(os.path.dirname(path)):
+				os.rmdir(os.path.dirname(path))
+
+	write_manifest(output_dir, manifest)
+	return [url for url in stale if url not in failed], removed, failed
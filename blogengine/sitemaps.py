@@ -0,0 +1,119 @@
+"""
+Sharded, streaming sitemaps.
+
+``sitemap.xml`` is a sitemap index that points to one or more shards per
+section (posts, categories, tags and flat pages).  Shard ``n`` of a section
+covers primary keys ``n * SHARD_SIZE + 1`` to ``(n + 1) * SHARD_SIZE``, so
+it never holds more than the protocol's 50,000 URLs, and finding the shards
+only needs the largest key.  Shards are streamed a chunk of rows at a time,
+so memory use does not depend on the size of the corpus.
+"""
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.sites.models import Site
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.html import escape
+
+from blogengine.models import Category, Post, Tag
+from blogengine.utils import iterate_by_pk
+
+SHARD_SIZE = 50000
+
+
+def _w3c_date(value):
+	return value.strftime('%Y-%m-%dT%H:%M:%S+00:00') if value else None
+
+
+class Section(object):
+	"""One kind of URL in the sitemap, split into primary-key shards."""
+
+	def __init__(self, queryset, fields, location, has_lastmod=True):
+		self.queryset = queryset
+		self.fields = fields
+		self.location = location
+		self.has_lastmod = has_lastmod
+
+	def get_queryset(self):
+		return self.queryset.all()
+
+	def shards(self):
+		"""Yield ``(shard number, lastmod)`` for every non-empty shard."""
+		queryset = self.get_queryset()
+		aggregates = {'last': Max('pk')}
+		if self.has_lastmod:
+			aggregates['lastmod'] = Max('updated_at')
+		shards = queryset.extra(select={'shard': '(%s.id - 1) / %d' % (queryset.model._meta.db_table, SHARD_SIZE)})
+		for row in shards.values('shard').annotate(**aggregates).order_by('shard'):
+			yield row['shard'], row.get('lastmod')
+
+	def urls(self, shard):
+		"""Yield ``(path, lastmod)`` for every URL in ``shard``."""
+		rows = self.get_queryset().filter(pk__gt=shard * SHARD_SIZE, pk__lte=(shard + 1) * SHARD_SIZE)
+		for row in iterate_by_pk(rows, self.fields):
+			yield self.location(*row[1:]), row[-1] if self.has_lastmod else None
+
+
+def _post_location(slug, pub_date, updated_at):
+	return Post(slug=slug, pub_date=pub_date).get_absolute_url()
+
+
+def _category_location(slug, updated_at):
+	return Category(slug=slug).get_absolute_url()
+
+
+def _tag_location(slug, updated_at):
+	return Tag(slug=slug).get_absolute_url()
+
+
+def _flatpage_location(url):
+	return url
+
+
+class FlatPageSection(Section):
+	def get_queryset(self):
+		return FlatPage.objects.filter(sites=settings.SITE_ID, registration_required=False)
+
+
+SECTIONS = {
+	# The manager rather than a queryset, so the current site is read per request
+	'posts': Section(Post.on_site, ('pk', 'slug', 'pub_date', 'updated_at'), _post_location),
+	'categories': Section(Category.objects.all(), ('pk', 'slug', 'updated_at'), _category_location),
+	'tags': Section(Tag.objects.all(), ('pk', 'slug', 'updated_at'), _tag_location),
+	'pages': FlatPageSection(FlatPage.objects.all(), ('pk', 'url'), _flatpage_location, has_lastmod=False),
+}
+SECTION_ORDER = ('posts', 'categories', 'tags', 'pages')
+
+
+def _base_url(request):
+	return '%s://%s' % (request.is_secure() and 'https' or 'http', Site.objects.get_current().domain)
+
+
+def sitemap_index(request):
+	base_url = _base_url(request)
+	lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+		'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+	for name in SECTION_ORDER:
+		for shard, lastmod in SECTIONS[name].shards():
+			lines.append('<sitemap><loc>%s/sitemap-%s-%d.xml</loc>%s</sitemap>' % (
+				base_url, name, shard, '<lastmod>%s</lastmod>' % _w3c_date(lastmod) if lastmod else ''))
+	lines.append('</sitemapindex>\n')
+	return HttpResponse('\n'.join(lines), content_type='application/xml')
+
+
+def _shard_lines(base_url, section, shard):
+	yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+		'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+	for location, lastmod in section.urls(shard):
+		yield '<url><loc>%s%s</loc>%s</url>\n' % (
+			base_url, escape(location), '<lastmod>%s</lastmod>' % _w3c_date(lastmod) if lastmod else '')
+	yield '</urlset>\n'
+
+
+def sitemap_shard(request, section, shard):
+	if section not in SECTIONS:
+		raise Http404("No such sitemap section")
+	return StreamingHttpResponse(
+		_shard_lines(_base_url(request), SECTIONS[section], int(shard)),
+		content_type='application/xml')
@@ -0,0 +1,88 @@
+"""
+WSGI middleware serving ``STATIC_ROOT`` with the precompressed variants
+written by ``blogengine.assets``.
+
+Each request picks the smallest encoding the client accepts that exists on
+disk, so nothing is compressed per request.  Content-hashed files are sent
+with a year-long ``immutable`` ``Cache-Control``; anything else may change
+in place and gets a short lifetime.
+
+With ``DEBUG`` on, or for files ``collectstatic`` hasn't copied, requests go
+to the staticfiles app's own handler instead, which serves the originals
+from the apps and ``STATICFILES_DIRS``.
+"""
+
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_tz, mktime_tz
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+
+from blogengine.assets import ENCODINGS
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=3600'
+CHUNK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+	"""Content codings the client accepts, ignoring ``q=0`` entries."""
+	accepted = set()
+	for part in header.split(','):
+		params = [param.strip() for param in part.split(';')]
+		if params[0] and 'q=0' not in params[1:] and 'q=0.0' not in params[1:]:
+			accepted.add(params[0].lower())
+	return accepted
+
+
+class PrecompressedStatic(object):
+	def __init__(self, application, root=None, prefix=None):
+		self.application = application
+		self.root = os.path.abspath(root or settings.STATIC_ROOT)
+		self.prefix = prefix or settings.STATIC_URL
+		self.finders = StaticFilesHandler(application)
+
+	def __call__(self, environ, start_response):
+		path = environ.get('PATH_INFO', '')
+		if not path.startswith(self.prefix) or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+			return self.application(environ, start_response)
+
+		name = path[len(self.prefix):]
+		filename = os.path.abspath(os.path.join(self.root, name))
+		if not filename.startswith(self.root + os.sep):
+			start_response('404 Not Found', [('Content-Type', 'text/plain')])
+			return ['Not Found']
+		if settings.DEBUG or not os.path.isfile(filename):
+			return self.finders(environ, start_response)
+
+		content_type, encoding = mimetypes.guess_type(filename)
+		headers = [
+			('Content-Type', content_type or 'application/octet-stream'),
+			('Cache-Control', IMMUTABLE if HASHED_NAME.search(name) else SHORT_LIVED),
+			('Vary', 'Accept-Encoding'),
+		]
+		accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+		for coding, suffix in ENCODINGS.items():
+			if coding in accepted and os.path.isfile(filename + suffix):
+				filename += suffix
+				headers.append(('Content-Encoding', coding))
+				break
+
+		stat = os.stat(filename)
+		headers.append(('Last-Modified', formatdate(stat.st_mtime, usegmt=True)))
+		since = parsedate_tz(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+		if since and mktime_tz(since) >= int(stat.st_mtime):
+			start_response('304 Not Modified', headers)
+			return []
+
+		headers.append(('Content-Length', str(stat.st_size)))
+		start_response('200 OK', headers)
+		if environ['REQUEST_METHOD'] == 'HEAD':
+			return []
+		# Either wrapper closes the file once the server is done with it
+		file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+		return file_wrapper(open(filename, 'rb'), CHUNK_SIZE)
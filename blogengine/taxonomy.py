@@ -0,0 +1,180 @@
+"""
+Denormalized post counts of categories and tags, per site.
+
+``CategoryCount`` and ``TagCount`` hold one row per site and category or
+tag with posts, adjusted by the receivers below as posts are saved,
+retagged, moved between sites or deleted, so category and tag pages know
+how many posts they list and the sidebar can show the categories and a tag
+cloud without grouping the post table.  ``summary()`` keeps the current
+site's counts in each process until one of them changes.
+"""
+
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from blogengine import replicas
+from blogengine.cache import GLOBAL_TAG, TAXONOMY_TAG, bump, get_versions
+from blogengine.models import Category, CategoryCount, Post, Tag, TagCount
+
+# Bumped whenever any count changes; ``taxonomy`` only when one crosses zero
+COUNTS_TAG = 'taxonomy:counts'
+
+# Tags shown in the cloud, and the number of size classes they fall into
+TAG_CLOUD_SIZE = 30
+TAG_CLOUD_WEIGHTS = 5
+
+
+# The column each kind of count row is keyed on besides the site
+COUNTED = {CategoryCount: 'category_id', TagCount: 'tag_id'}
+
+
+def adjust(model, site_id, pks, delta):
+	"""
+	Add ``delta`` to ``site_id``'s post counts of the categories or tags in
+	``pks``, for ``model`` ``CategoryCount`` or ``TagCount``.
+	"""
+	pks = set(pk for pk in pks if pk is not None)
+	if not pks or not delta:
+		return
+	column = COUNTED[model]
+	rows = model.objects.filter(site_id=site_id, **{column + '__in': pks})
+	if delta < 0:
+		rows.filter(post_count__gte=-delta).update(post_count=F('post_count') + delta)
+		emptied = rows.filter(post_count=0)
+		crossed = emptied.exists()
+		emptied.delete()
+	else:
+		existing = set(rows.values_list(column, flat=True))
+		rows.filter(**{column + '__in': existing}).update(post_count=F('post_count') + delta)
+		crossed = False
+		for pk in pks - existing:
+			try:
+				with transaction.atomic():
+					model.objects.create(site_id=site_id, post_count=delta, **{column: pk})
+			except IntegrityError:
+				# Created concurrently
+				rows.filter(**{column: pk}).update(post_count=F('post_count') + delta)
+			else:
+				crossed = True
+	# A category or tag appearing in or leaving the sidebar changes every page
+	if crossed:
+		bump([TAXONOMY_TAG, COUNTS_TAG])
+	else:
+		bump([COUNTS_TAG])
+
+
+def recount():
+	"""Recompute every count from the post table."""
+	categories = (Post.objects.filter(category__isnull=False).order_by()
+		.values_list('site_id', 'category_id').annotate(count=Count('pk')))
+	tags = (Post.tags.through.objects.order_by()
+		.values_list('post__site_id', 'tag_id').annotate(count=Count('pk')))
+	with transaction.atomic():
+		CategoryCount.objects.all().delete()
+		CategoryCount.objects.bulk_create([CategoryCount(site_id=site_id, category_id=pk, post_count=count)
+			for site_id, pk, count in categories])
+		TagCount.objects.all().delete()
+		TagCount.objects.bulk_create([TagCount(site_id=site_id, tag_id=pk, post_count=count)
+			for site_id, pk, count in tags])
+	bump([TAXONOMY_TAG, COUNTS_TAG])
+
+
+def tag_cloud(tags):
+	"""
+	The ``TAG_CLOUD_SIZE`` most used of ``(name, slug, count)`` tags, by
+	name, as ``(name, url, weight)`` with weights from 1 to
+	``TAG_CLOUD_WEIGHTS`` on a log scale.
+	"""
+	tags = sorted(tags, key=lambda tag: -tag[2])[:TAG_CLOUD_SIZE]
+	if not tags:
+		return []
+	low, high = math.log(tags[-1][2]), math.log(tags[0][2])
+	spread = (high - low) or 1
+	return sorted((name, Tag(slug=slug).get_absolute_url(),
+			1 + int(round((math.log(count) - low) / spread * (TAG_CLOUD_WEIGHTS - 1))))
+		for name, slug, count in tags)
+
+
+# The counts change on every post save and are read on every page, so each
+# process keeps the last summary it built until the shared version moves on.
+# It is read from the primary, which the version is bumped on.
+_summary = {}
+
+def summary():
+	"""
+	``{'category_counts': {slug: count}, 'tag_counts': {slug: count},
+	'categories': [(name, url)], 'tag_cloud': [(name, url, weight)]}``
+	covering the categories and tags that have posts on the current site.
+	"""
+	key = (settings.SITE_ID,) + tuple(get_versions([GLOBAL_TAG, COUNTS_TAG]))
+	if key not in _summary:
+		with replicas.primary():
+			categories = list(CategoryCount.objects.filter(site_id=settings.SITE_ID, post_count__gt=0)
+				.order_by('category__name').values_list('category__name', 'category__slug', 'post_count'))
+			tags = list(TagCount.objects.filter(site_id=settings.SITE_ID, post_count__gt=0)
+				.values_list('tag__name', 'tag__slug', 'post_count'))
+		_summary.clear()
+		_summary[key] = {
+			'category_counts': dict((slug, count) for name, slug, count in categories),
+			'tag_counts': dict((slug, count) for name, slug, count in tags),
+			'categories': [(name, Category(slug=slug).get_absolute_url()) for name, slug, count in categories],
+			'tag_cloud': tag_cloud(tags),
+		}
+	return _summary[key]
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, **kwargs):
+	original = getattr(instance, '_original', None)
+	old = (original.site_id, original.category_id) if original else (None, None)
+	if old != (instance.site_id, instance.category_id):
+		adjust(CategoryCount, old[0], [old[1]], -1)
+		adjust(CategoryCount, instance.site_id, [instance.category_id], 1)
+	if original and original.site_id != instance.site_id:
+		# Its tags move to the other site along with it
+		tag_ids = list(instance.tags.values_list('pk', flat=True))
+		adjust(TagCount, original.site_id, tag_ids, -1)
+		adjust(TagCount, instance.site_id, tag_ids, 1)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_counted_tags(sender, instance, **kwargs):
+	# The tag links are gone by the time post_delete is sent
+	instance._counted_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+	adjust(CategoryCount, instance.site_id, [instance.category_id], -1)
+	adjust(TagCount, instance.site_id, getattr(instance, '_counted_tag_ids', []), -1)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+	links = sender.objects.filter(**{'tag' if reverse else 'post': instance})
+	if action in ('pre_remove', 'pre_clear'):
+		# Only links that exist are removed, whatever was asked for
+		if action == 'pre_remove':
+			links = links.filter(**{'post__in' if reverse else 'tag__in': pk_set})
+		instance._removed_links = list(links.values_list('post_id' if reverse else 'tag_id', flat=True))
+		return
+
+	if action == 'post_add':
+		changed, delta = pk_set, 1
+	elif action in ('post_remove', 'post_clear'):
+		changed, delta = getattr(instance, '_removed_links', []), -1
+	else:
+		return
+	if reverse:
+		# The posts may be spread over several sites
+		sites = Counter(Post.objects.filter(pk__in=changed).values_list('site_id', flat=True))
+		for site_id, count in sites.items():
+			adjust(TagCount, site_id, [instance.pk], delta * count)
+	else:
+		adjust(TagCount, instance.site_id, changed, delta)
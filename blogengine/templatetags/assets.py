@@ -0,0 +1,24 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html, format_html_join
+
+from blogengine.assets import BUNDLES
+
+register = template.Library()
+
+TAGS = {
+	'.css': u'<link rel="stylesheet" href="{0}">',
+	'.js': u'<script src="{0}"></script>',
+}
+
+@register.simple_tag
+def bundle(name):
+	"""
+	Link to bundle ``name`` once ``collectstatic`` has built it, and to
+	each of its source files until then.
+	"""
+	tag = TAGS['.css' if name.endswith('.css') else '.js']
+	is_collected = getattr(staticfiles_storage, 'is_collected', None)
+	if is_collected and is_collected(name):
+		return format_html(tag, staticfiles_storage.url(name))
+	return format_html_join(u'\n', tag, ((staticfiles_storage.url(source),) for source in BUNDLES[name]))
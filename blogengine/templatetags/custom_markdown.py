@@ -1,15 +1,12 @@
-import markdown2
-
 from django import template
 from django.template.defaultfilters import stringfilter
-from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
 
+from blogengine.markup import render_markdown
+
 register = template.Library()
 
 @register.filter(is_safe=True)
 @stringfilter
 def custom_markdown(value):
-	extras = ["fenced-code-blocks"]
-
-	return mark_safe(markdown2.markdown(force_unicode(value), extras = extras))
\ No newline at end of file
+	return mark_safe(render_markdown(value))
@@ -0,0 +1,55 @@
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from blogengine import replicas
+from blogengine.cache import ARCHIVES_TAG, GLOBAL_TAG, TAXONOMY_TAG, get_cache, get_versions
+from blogengine.taxonomy import COUNTS_TAG
+
+register = template.Library()
+
+# What each fragment shows, as the cache tags that change it; ``global``
+# is added to all of them
+FRAGMENT_TAGS = {
+	'masthead': [],
+	'sidebar': [ARCHIVES_TAG, TAXONOMY_TAG, COUNTS_TAG],
+}
+
+
+def fragment_key(name):
+	versions = get_versions([GLOBAL_TAG] + FRAGMENT_TAGS[name])
+	return 'blogengine:fragment:%s:%s:%s' % (name, settings.SITE_ID, ':'.join(versions))
+
+
+class CachedFragmentNode(template.Node):
+	def __init__(self, name, nodelist):
+		self.name = name
+		self.nodelist = nodelist
+
+	def render(self, context):
+		cache = get_cache()
+		key = fragment_key(self.name)
+		content = cache.get(key)
+		if content is None:
+			content = self.nodelist.render(context)
+			cache.set(key, content, replicas.cache_timeout(getattr(settings, 'BLOGENGINE_CACHE_TIMEOUT', 60 * 60)))
+		return mark_safe(content)
+
+
+@register.tag
+def cached_fragment(parser, token):
+	"""
+	Render what's between ``{% cached_fragment "sidebar" %}`` and
+	``{% endcached_fragment %}`` once per site until one of the fragment's
+	``FRAGMENT_TAGS`` is bumped.  The content must only depend on the site
+	and on what those tags cover.
+	"""
+	bits = token.split_contents()
+	if len(bits) != 2 or bits[1][0] not in '"\'' or bits[1][-1] != bits[1][0]:
+		raise template.TemplateSyntaxError("%r takes a quoted fragment name" % bits[0])
+	name = bits[1][1:-1]
+	if name not in FRAGMENT_TAGS:
+		raise template.TemplateSyntaxError("Unknown fragment %r" % name)
+	nodelist = parser.parse(('endcached_fragment',))
+	parser.delete_first_token()
+	return CachedFragmentNode(name, nodelist)
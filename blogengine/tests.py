@@ -1,9 +1,51 @@
-from django.test import TestCase, LiveServerTestCase, Client
+from django.conf import settings
+from django.db import models
+from django.test import TestCase, LiveServerTestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 from django.contrib.flatpages.models import FlatPage
 from django.contrib.sites.models import Site
+from django.core.exceptions import ImproperlyConfigured
 from django.core.urlresolvers import reverse
-from blogengine.models import Post, Category, Tag
+from django.http import HttpResponse
+from django.core.management import call_command
+from django.core import signals
+from django.db import OperationalError, close_old_connections, connection, connections, router
+from django.template import Context, Template
+from blogengine.models import ArchiveMonth, Post, Category, CategoryCount, RelatedPost, Tag, TagCount, Term
+from blogengine.markup import MARKDOWN_EXTRAS, BLOCK_RENDER_MIN_LENGTH, block_cache, highlight_cache, render_key
+from blogengine.renderers import BlockMarkdown
+from blogengine.rerender import rerender
+from blogengine.search import normalize_query, rebuild_index, search_post_ids
+from blogengine.cache import get_cache
+from blogengine.pagination import KeysetPaginationMixin, encode_cursor, page_boundaries
+from blogengine.context_processors import month_archives
+from blogengine.taxonomy import recount, summary
+from blogengine import related
+from blogengine.sitebuild import build
+from blogengine import sitemaps
+from blogengine.benchmark import build_corpus, compare, listing_indexes, query_plans, run_load, startup
+from blogengine import metrics
+from blogengine import replicas
+from blogengine.middleware import InstrumentationMiddleware
+from blogengine.warmup import warm_up
+from blogengine.assets import minify_css, minify_js
+from blogengine.autocomplete import PrefixIndex, post_entries
+from blogengine.staticserve import PrecompressedStatic
+
+import datetime
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from cStringIO import StringIO
+from unittest import skipUnless
 
 import markdown2 as markdown
 import factory.django
@@ -137,10 +179,174 @@ class PostTest(TestCase):
 		self.assertEquals(only_post_tag, tag)
 		self.assertEquals(only_post_tag.name, 'python')
 
+	def test_html_rendered_on_save(self):
+		post = PostFactory(text='This is *my* first post')
+
+		only_post = Post.objects.get(pk=post.pk)
+		self.assertEquals(only_post.text_html, markdown.markdown(post.text))
+		self.assertEquals(only_post.text_html_key, render_key(post.text))
+
+		# Editing the text re-renders it
+		only_post.text = 'This is my **edited** post'
+		only_post.save()
+		only_post = Post.objects.get(pk=post.pk)
+		self.assertTrue('<strong>edited</strong>' in only_post.text_html)
+
+	def test_stale_html_rendered_lazily(self):
+		post = PostFactory()
+
+		# Simulate a row saved before text_html existed
+		Post.objects.filter(pk=post.pk).update(text_html='', text_html_key='')
+
+		only_post = Post.objects.get(pk=post.pk)
+		self.assertEquals(only_post.get_text_html(), markdown.markdown(post.text))
+
+		# The rendered HTML was written back
+		only_post = Post.objects.get(pk=post.pk)
+		self.assertEquals(only_post.text_html_key, render_key(post.text))
+
+	def test_highlight_cache(self):
+		get_cache().clear()
+		highlight_cache.clear()
+		code = "```python\ndef hello():\n    return 'world'\n```\n"
+		post = PostFactory(text="A typpo.\n\n" + code)
+		html = Post.objects.get(pk=post.pk).text_html
+		self.assertTrue('codehilite' in html)
+		self.assertEquals(highlight_cache.stats()['misses'], 1)
+
+		# Fixing the typo doesn't re-highlight the unchanged code block
+		post.text = "A typo.\n\n" + code
+		post.save()
+		self.assertEquals(Post.objects.get(pk=post.pk).text_html, html.replace('typpo', 'typo'))
+		self.assertEquals(highlight_cache.stats()['misses'], 1)
+		self.assertEquals(highlight_cache.stats()['local_hits'], 1)
+
+		# Another process finds it in the shared cache
+		highlight_cache.clear()
+		self.assertEquals(markdown.markdown(post.text, extras=["fenced-code-blocks"]), post.text_html)
+		self.assertEquals(Post.objects.get(pk=post.pk).render_text(force=True), True)
+		self.assertEquals(highlight_cache.stats()['shared_hits'], 1)
+		self.assertEquals(highlight_cache.stats()['hit_rate'], 1.0)
+
+	def test_render_posts_command(self):
+		post = PostFactory()
+		Post.objects.filter(pk=post.pk).update(text_html='stale', text_html_key='stale')
+
+		call_command('render_posts', verbosity=0)
+
+		only_post = Post.objects.get(pk=post.pk)
+		self.assertEquals(only_post.text_html, markdown.markdown(post.text))
+		self.assertEquals(only_post.text_html_key, render_key(post.text))
+
+	def test_rerender_resumes(self):
+		posts = [PostFactory(slug='post-%d' % i, text='Post *%d*' % i) for i in range(5)]
+		# Only the posts a previous run didn't get to are stale
+		Post.objects.filter(pk__in=[post.pk for post in posts[3:]]).update(text_html='stale', text_html_key='stale')
+
+		reports = []
+		checked, rendered = rerender(processes=1, chunk_size=2,
+			progress=lambda checked, rendered, elapsed: reports.append((checked, rendered)))
+
+		self.assertEquals((checked, rendered), (5, 2))
+		self.assertEquals(reports, [(2, 0), (4, 1), (5, 2)])
+		for post in Post.objects.all():
+			self.assertEquals(post.text_html, markdown.markdown(post.text))
+
+		self.assertEquals(rerender(processes=1, chunk_size=2), (5, 0))
+		self.assertEquals(rerender(processes=1, chunk_size=2, force=True), (5, 5))
+
+
+class BlockRenderTest(TestCase):
+	# The posts of the other tests, and what can carry on past a blank line
+	PIECES = [
+		'This is my first post',
+		'This is *my* first post',
+		'This is [my first blog post](http://127.0.0.1:8000/)',
+		'Opening **words** & more',
+		"```python\ndef hello():\n    return 'world'\n```",
+		'## Heading', 'Setext\n======', '* * *',
+		'- one\n- two', '- one\n\n- two', '1. first\n\n    more of first\n\n2. second',
+		'* outer\n    * inner\n* outer', '+ item\n\n  lazy', '-not a list', 'Text\n- tight list',
+		'> quote', '> quote\n\n> more', '> - quoted list',
+		'    indented code', '```\nplain fence\n```',
+		'See [the docs][docs] and [Other][].', '[docs]: http://example.com/docs "Docs"',
+		'[other]: http://example.com/other', '[Docs]: http://example.com/new', 'A [split\nreference][docs]',
+		'Break  \nhere', 'A `code span` with \\*escapes\\*', 'Auto <http://example.com>', '<div>\nraw\n</div>',
+	]
+
+	def setUp(self):
+		get_cache().clear()
+		block_cache.clear()
+
+	def render(self, parts, separators):
+		text = parts[0] + ''.join(separator + part for separator, part in zip(separators, parts[1:]))
+		html = BlockMarkdown(extras=MARKDOWN_EXTRAS).convert(text)
+		self.assertEquals(html, markdown.markdown(text, extras=MARKDOWN_EXTRAS), repr(text))
+
+	def test_same_as_full_render(self):
+		rng = random.Random(0)
+		for _ in range(200):
+			parts = [rng.choice(self.PIECES) for _ in range(rng.randint(1, 12))]
+			separators = [rng.choice(['\n', '\n\n', '\n\n\n', ' \n\n', '\r\n\r\n']) for _ in range(12)]
+			for _ in range(3):
+				self.render(parts, separators)
+				# Edit the post and render it again, mostly from the cache
+				index = rng.randrange(len(parts))
+				edit = rng.choice(['replace', 'insert', 'delete'])
+				if edit == 'replace':
+					parts[index] = rng.choice(self.PIECES)
+				elif edit == 'insert':
+					parts.insert(index, rng.choice(self.PIECES))
+				elif len(parts) > 1:
+					del parts[index]
+			if rng.random() < 0.3:
+				block_cache.clear()
+
+	def test_keys_shared_between_processes(self):
+		text = "Intro\n\n```python\nx = '*'\n```\n\n<div>raw</div>\n\n    code_with *stars*\n\nEnd"
+
+		def keys():
+			renderer = BlockMarkdown(extras=MARKDOWN_EXTRAS)
+			return [renderer.block_key(block) for block in renderer.preprocessed_blocks(text)]
+
+		# Another process salts markdown2's placeholders differently
+		salt, escapes = markdown.SECRET_SALT, markdown.g_escape_table
+		original = keys()
+		try:
+			markdown.SECRET_SALT = salt + '1'
+			markdown.g_escape_table = dict((char, markdown._hash_text(char)) for char in escapes)
+			self.assertEquals(keys(), original)
+		finally:
+			markdown.SECRET_SALT, markdown.g_escape_table = salt, escapes
+		self.assertEquals(len(set(original)), 4)
+
+	def test_only_changed_blocks_rendered(self):
+		parts = ['Paragraph *%d* ' % n * 80 for n in range(10)] + [
+			'See [the docs][docs].', '[docs]: http://example.com/docs']
+		post = PostFactory(text='\n\n'.join(parts))
+		self.assertTrue(len(post.text) >= BLOCK_RENDER_MIN_LENGTH)
+		self.assertEquals(post.text_html, markdown.markdown(post.text, extras=MARKDOWN_EXTRAS))
+		# The definition isn't a block of its own
+		self.assertEquals(block_cache.stats()['misses'], 11)
+
+		parts[3] = 'Edited ' * 50
+		post.text = '\n\n'.join(parts)
+		post.save()
+		self.assertEquals(block_cache.stats()['misses'], 12)
+
+		# So is the block that refers to a changed definition
+		parts[-1] = '[docs]: http://example.com/new-docs'
+		post.text = '\n\n'.join(parts)
+		post.save()
+		self.assertEquals(block_cache.stats()['misses'], 13)
+		self.assertEquals(post.text_html, markdown.markdown(post.text, extras=MARKDOWN_EXTRAS))
+		self.assertTrue('new-docs' in post.text_html)
+
 
 class BaseAcceptanceTest(LiveServerTestCase):
 	def setUp(self):
 		self.client = Client()
+		get_cache().clear()
 
 
 class AdminTest(BaseAcceptanceTest):
@@ -598,4 +804,1281 @@ class SearchViewTest(BaseAcceptanceTest):
 		# Try to get nonexistent second page
 		response = self.client.get(reverse('blogengine:search') + '?q=baseball&page=2')
 		self.assertEquals(response.status_code, 200)
-		self.assertTrue('No posts found' in response.content)
\ No newline at end of file
+		self.assertTrue('No posts found' in response.content)
+
+	def test_search_ranks_title_matches_first(self):
+		body_match = PostFactory(text='Notes about django internals', title='Some notes', slug='some-notes')
+		title_match = PostFactory(text='Notes about the framework', title='Django tips', slug='django-tips')
+
+		self.assertEquals(search_post_ids('django'), [title_match.pk, body_match.pk])
+
+	def test_search_index_follows_edits_and_deletes(self):
+		post = PostFactory()
+		self.assertEquals(search_post_ids('first'), [post.pk])
+
+		post.title = 'My renamed post'
+		post.text = 'This post was renamed'
+		post.save()
+		self.assertEquals(search_post_ids('first'), [])
+		self.assertEquals(search_post_ids('renamed'), [post.pk])
+
+		post.delete()
+		self.assertEquals(search_post_ids('renamed'), [])
+
+		# Rebuilding from scratch gives the same results
+		post = PostFactory()
+		call_command('rebuild_search_index', verbosity=0)
+		self.assertEquals(search_post_ids('first'), [post.pk])
+
+	def test_search_results_are_cached(self):
+		self.assertEquals(normalize_query('  Tips for the DJANGO, tips!'), 'django tips')
+		self.assertEquals(normalize_query('The'), 'the')
+
+		post = PostFactory(title='Django tips', slug='django-tips')
+		self.assertEquals(search_post_ids('django tips'), [post.pk])
+		with self.assertNumQueries(0):
+			self.assertEquals(search_post_ids('Tips for the DJANGO'), [post.pk])
+
+		# Later pages of the same search reuse the cached ids
+		response = self.client.get(reverse('blogengine:search') + '?q=django+tips')
+		self.assertTrue('Django tips' in response.content)
+
+		post.title = 'Flask tips'
+		post.save()
+		self.assertEquals(search_post_ids('django tips'), [])
+
+	def test_autocomplete(self):
+		tag = TagFactory(name='django', slug='django')
+		post = PostFactory(title='Intro to Django', slug='intro-to-django')
+		url = reverse('blogengine:autocomplete')
+
+		response = self.client.get(url + '?q=Dja')
+		self.assertEquals(response.status_code, 200)
+		self.assertEquals(json.loads(response.content)['suggestions'], [
+			{'label': 'Intro to Django', 'url': post.get_absolute_url()},
+			{'label': 'django', 'url': tag.get_absolute_url()},
+		])
+
+		# Saves and deletes update the loaded index in place
+		PostFactory(title='Django tips', slug='django-tips')
+		post.delete()
+		suggestions = json.loads(self.client.get(url + '?q=django+t').content)['suggestions']
+		self.assertEquals([suggestion['label'] for suggestion in suggestions], ['Django tips'])
+		self.assertEquals(json.loads(self.client.get(url + '?q=').content)['suggestions'], [])
+
+	def test_autocomplete_across_processes(self):
+		post = PostFactory(title='Intro to Django', slug='intro-to-django')
+		this, other = PrefixIndex(), PrefixIndex()
+		this.lookup('django')
+		other.lookup('django')
+
+		# Both replay the changes made elsewhere in order instead of
+		# reloading, including one that came in between this one's last
+		# lookup and its own update
+		PostFactory(title='Django tips', slug='django-tips')
+		post.title = 'Intro to Django 1.7'
+		this.update(('post', post.pk), post_entries(post))
+		with self.assertNumQueries(0):
+			for index in (this, other):
+				self.assertEquals([suggestion['label'] for suggestion in index.lookup('django')],
+					['Intro to Django 1.7', 'Django tips'])
+
+		# A change gone from the cache means loading the whole list
+		post.delete()
+		get_cache().delete('blogengine:autocomplete:%s:%d' % (this.epoch, this.number + 1))
+		with self.assertNumQueries(2):
+			self.assertEquals([suggestion['label'] for suggestion in this.lookup('django')], ['Django tips'])
+
+class QueryCountTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(QueryCountTest, self).setUp()
+		category = CategoryFactory()
+		other_category = CategoryFactory(name='perl', description='The Perl programming language', slug='perl')
+		tags = [TagFactory(), TagFactory(name='django', slug='django')]
+
+		for i in range(5):
+			post = PostFactory(
+				title='Post %d' % i,
+				text='This is post number %d' % i,
+				slug='post-%d' % i,
+				category=category if i % 2 else other_category)
+			post.tags.add(*tags)
+		self.post = post
+
+		# Build the Archives sidebar, which is only reloaded when a month
+		# is added or removed, and the category and tag summary, reloaded
+		# when a count changes
+		month_archives(None)
+		summary()
+
+	def test_index_queries(self):
+		with self.assertNumQueries(2):
+			response = self.client.get(reverse('blogengine:index'))
+		self.assertEquals(response.status_code, 200)
+
+	def test_post_queries(self):
+		with self.assertNumQueries(3):
+			response = self.client.get(self.post.get_absolute_url())
+		self.assertEquals(response.status_code, 200)
+
+	def test_category_queries(self):
+		with self.assertNumQueries(2):
+			response = self.client.get('/category/python/')
+		self.assertEquals(response.status_code, 200)
+
+	def test_tag_queries(self):
+		with self.assertNumQueries(2):
+			response = self.client.get('/tag/django/')
+		self.assertEquals(response.status_code, 200)
+
+	def test_search_queries(self):
+		with self.assertNumQueries(3):
+			response = self.client.get(reverse('blogengine:search') + '?q=post')
+		self.assertEquals(response.status_code, 200)
+
+
+
+class SiteScopeTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(SiteScopeTest, self).setUp()
+		self.post = PostFactory(title='Local post', slug='local', text='About django')
+		self.post.tags.add(TagFactory())
+		self.other = PostFactory(title='Foreign post', slug='foreign', text='Also about django',
+			site=SiteFactory(name='other.com', domain='other.com'))
+		self.other.tags.add(TagFactory())
+
+	def test_other_sites_are_hidden(self):
+		for url in ('/', '/category/python/', '/tag/python/', '/search?q=django', '/feeds/rss/',
+				'/%d/%d/' % (self.post.pub_date.year, self.post.pub_date.month), '/sitemap-posts-0.xml'):
+			response = self.client.get(url)
+			content = ''.join(response.streaming_content) if response.streaming else response.content
+			self.assertTrue('/local/' in content, url)
+			self.assertTrue('/foreign/' not in content, url)
+
+		self.assertEquals(self.client.get(self.other.get_absolute_url()).status_code, 404)
+		self.assertEquals(json.loads(self.client.get('/search/autocomplete/?q=foreign').content)['suggestions'], [])
+
+		with self.settings(SITE_ID=self.other.site_id):
+			self.assertEquals(self.client.get(self.other.get_absolute_url()).status_code, 200)
+			self.assertEquals(search_post_ids('django'), [self.other.pk])
+
+	def test_counts_are_per_site(self):
+		for i in range(5):
+			PostFactory(title='Foreign %d' % i, slug='foreign-%d' % i, site=self.other.site).tags.add(TagFactory())
+		page = self.client.get('/category/python/').context['page_obj']
+		self.assertEquals((page.count, page.num_pages), (1, 1))
+		self.assertEquals(summary()['tag_counts'], {'python': 1})
+		with self.settings(SITE_ID=self.other.site_id):
+			self.assertEquals(summary()['tag_counts'], {'python': 6})
+
+		# A post moved to the other site takes its counts along
+		self.post.site = self.other.site
+		self.post.save()
+		self.assertEquals(summary()['category_counts'], {})
+		with self.settings(SITE_ID=self.other.site_id):
+			self.assertEquals(summary()['category_counts'], {'python': 7})
+			self.assertEquals(summary()['tag_counts'], {'python': 7})
+
+	def test_listing_indexes(self):
+		self.assertEquals(sorted(listing_indexes().values()),
+			[('site_id', 'category_id', 'pub_date'), ('site_id', 'pub_date')])
+
+
+@skipUnless('replica1' in settings.DATABASES, "run with --settings=django_blog.test_settings")
+@override_settings(BLOGENGINE_READ_REPLICAS=['replica1'])
+class ReplicaTest(BaseAcceptanceTest):
+	multi_db = True
+	fixtures = ['users.json']
+
+	def setUp(self):
+		super(ReplicaTest, self).setUp()
+		replicas._down_until.clear()
+		self.post = PostFactory(title='Replicated post', slug='replicated', text='Replicated text')
+		self.post.tags.add(TagFactory())
+		page = FlatPageFactory()
+		page.sites.add(self.post.site)
+		self.replicate()
+		# Not replicated yet
+		self.lagging = PostFactory(title='Lagging post', slug='lagging', text='Lagging text')
+
+	def tearDown(self):
+		replicas._down_until.clear()
+		super(ReplicaTest, self).tearDown()
+
+	def replicate(self):
+		"""Copy the primary's posts and flat pages to the replica."""
+		cursor = connections['replica1'].cursor()
+		models = (Site, Category, Tag, Post, Post.tags.through, FlatPage, FlatPage.sites.through)
+		for model in models:
+			cursor.execute('DELETE FROM %s' % model._meta.db_table)
+		for model in models:
+			model.objects.using('replica1').bulk_create(model.objects.all())
+		rebuild_index('replica1')
+
+	def test_public_pages_read_from_replica(self):
+		response = self.client.get('/')
+		self.assertTrue('Replicated post' in response.content)
+		self.assertTrue('Lagging post' not in response.content)
+		self.assertEquals(self.client.get(self.lagging.get_absolute_url()).status_code, 404)
+		self.assertTrue(replicas.PRIMARY_COOKIE not in response.cookies)
+
+		Post.objects.using('replica1').filter(pk=self.post.pk).update(title='Replica title')
+		FlatPage.objects.using('replica1').update(content='Replica content')
+		get_cache().clear()
+		self.assertTrue('Replica title' in self.client.get(self.post.get_absolute_url()).content)
+		self.assertTrue('Replica content' in self.client.get('/about/').content)
+		self.assertTrue('Replica title' in self.client.get('/search?q=replicated').content)
+		self.assertTrue('Lagging post' not in self.client.get('/search?q=lagging').content)
+
+	def test_everything_else_reads_from_primary(self):
+		self.assertEquals(router.db_for_read(Post), 'default')
+		self.client.login(username='bobsmith', password='password')
+		self.assertTrue('Lagging post' in self.client.get('/admin/blogengine/post/').content)
+
+	def test_writes_stick_to_primary(self):
+		self.client.login(username='bobsmith', password='password')
+		response = self.client.post('/admin/blogengine/post/add/', {
+			'title': 'Fresh post',
+			'text': 'Fresh text',
+			'slug': 'fresh',
+			'pub_date_0': '2014-9-23',
+			'pub_date_1': '22:00:04',
+			'site': '1',
+		})
+		self.assertEquals(response.status_code, 302)
+		self.assertEquals(response.cookies[replicas.PRIMARY_COOKIE]['max-age'], 10)
+
+		# The writer sees the new post; other readers catch up with the
+		# replica, and what they were shown is only cached until it has
+		self.assertTrue('Fresh post' in self.client.get('/').content)
+		with self.settings(BLOGENGINE_PRIMARY_STICKY_SECONDS=0):
+			self.assertTrue('Fresh post' not in Client().get('/').content)
+			self.replicate()
+			self.assertTrue('Fresh post' in Client().get('/').content)
+
+	def test_replica_reads_cached_briefly(self):
+		replicas.reset()
+		self.assertEquals(replicas.cache_timeout(None), None)
+		replicas.read_from_replicas()
+		try:
+			# The per-process memos read the primary
+			with replicas.primary():
+				Post.objects.count()
+			self.assertEquals(replicas.cache_timeout(None), None)
+			self.assertEquals(Post.objects.count(), 1)
+			self.assertEquals(replicas.cache_timeout(None), 10)
+			self.assertEquals(replicas.cache_timeout(5), 5)
+		finally:
+			replicas.reset()
+
+	def test_failed_replica_is_skipped(self):
+		def refuse():
+			raise OperationalError('Connection refused')
+		connection = connections['replica1']
+		connection.ensure_connection = refuse
+		try:
+			self.assertTrue('Lagging post' in self.client.get('/').content)
+		finally:
+			del connection.ensure_connection
+		self.assertTrue('replica1' in replicas._down_until)
+
+		# Not tried again until the retry interval is up
+		get_cache().clear()
+		self.assertTrue('Lagging post' in self.client.get('/').content)
+		replicas._down_until.clear()
+		get_cache().clear()
+		self.assertTrue('Lagging post' not in self.client.get('/').content)
+
+	def test_replicas_take_turns(self):
+		with self.settings(BLOGENGINE_READ_REPLICAS=['replica1', 'default']):
+			chosen = [replicas.choose_replica() for _ in range(4)]
+		self.assertEquals(sorted(chosen[:2]), ['default', 'replica1'])
+		self.assertEquals(chosen[:2], chosen[2:])
+
+
+class ResponseCacheTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(ResponseCacheTest, self).setUp()
+		self.post = PostFactory()
+		self.post.tags.add(TagFactory())
+		self.other_category = CategoryFactory(name='perl', description='The Perl programming language', slug='perl')
+		self.other_post = PostFactory(title='Perl post', text='About perl', slug='perl-post', category=self.other_category)
+
+	def assertCached(self, url):
+		with self.assertNumQueries(0):
+			response = self.client.get(url)
+		self.assertEquals(response.status_code, 200)
+
+	def test_hit_skips_database(self):
+		response = self.client.get(reverse('blogengine:index'))
+		self.assertEquals(response.status_code, 200)
+
+		with self.assertNumQueries(0):
+			cached = self.client.get(reverse('blogengine:index'))
+		self.assertEquals(cached.content, response.content)
+
+	def test_edit_evicts_only_affected_pages(self):
+		urls = {
+			'index': reverse('blogengine:index'),
+			'post': self.post.get_absolute_url(),
+			'category': '/category/python/',
+			'tag': '/tag/python/',
+			'other_post': self.other_post.get_absolute_url(),
+			'other_category': '/category/perl/',
+		}
+		for url in urls.values():
+			self.client.get(url)
+
+		self.post.text = 'This is my edited post'
+		self.post.save()
+
+		for name in ('other_post', 'other_category'):
+			self.assertCached(urls[name])
+
+		for name in ('index', 'post', 'category', 'tag'):
+			response = self.client.get(urls[name])
+			self.assertTrue('This is my edited post' in response.content, name)
+
+	def test_bump_from_another_process(self):
+		url = self.post.get_absolute_url()
+		etag = self.client.get(url)['ETag']
+		# Skips the receivers, like a write from another process would
+		Post.objects.filter(pk=self.post.pk).update(title='Edited elsewhere')
+		self.assertFalse('Edited elsewhere' in self.client.get(url).content)
+
+		env = dict(os.environ, DJANGO_SETTINGS_MODULE='django_blog.settings')
+		subprocess.check_call([sys.executable, '-c', 'import django; django.setup(); '
+			'from blogengine.cache import GLOBAL_TAG, bump; bump([GLOBAL_TAG])'], cwd=settings.BASE_DIR, env=env)
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue('Edited elsewhere' in response.content)
+
+	def test_taxonomy_edit_evicts_everything(self):
+		self.client.get(self.other_post.get_absolute_url())
+
+		self.other_category.name = 'Perl 6'
+		self.other_category.save()
+
+		response = self.client.get(self.other_post.get_absolute_url())
+		self.assertTrue('Perl 6' in response.content)
+
+	def test_rerender_evicts_pages(self):
+		url = self.post.get_absolute_url()
+		long_ago = timezone.now() - datetime.timedelta(days=30)
+		# The stored key is current, so only a forced run replaces the HTML
+		Post.objects.filter(pk=self.post.pk).update(text_html='<p>stale</p>', updated_at=long_ago)
+		self.assertTrue('stale' in self.client.get(url).content)
+
+		rerender(processes=1, force=True)
+
+		self.assertTrue(Post.objects.get(pk=self.post.pk).updated_at > long_ago)
+		response = self.client.get(url)
+		self.assertFalse('stale' in response.content)
+		self.assertTrue(self.post.text in response.content)
+
+	def test_commands_warn_of_process_local_cache(self):
+		commands = ('render_posts', 'rebuild_related', 'recount_taxonomy', 'rebuild_archives', 'rebuild_search_index')
+		for name in commands:
+			stderr = StringIO()
+			call_command(name, force=True, processes=1, stdout=StringIO(), stderr=stderr)
+			self.assertEquals(stderr.getvalue(), '', name)
+
+		with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+			for name in commands:
+				stderr = StringIO()
+				call_command(name, force=True, processes=1, stdout=StringIO(), stderr=stderr)
+				self.assertTrue('restart the server' in stderr.getvalue(), name)
+
+	def test_sessions_bypass_cache(self):
+		self.client.get(reverse('blogengine:index'))
+
+		self.client.cookies[settings.SESSION_COOKIE_NAME] = 'not-a-session'
+		with self.assertNumQueries(2):
+			self.client.get(reverse('blogengine:index'))
+
+
+class ConditionalGetTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(ConditionalGetTest, self).setUp()
+		self.post = PostFactory()
+		self.post.tags.add(TagFactory())
+
+	def test_etag(self):
+		for url in (reverse('blogengine:index'), self.post.get_absolute_url(), '/category/python/', '/tag/python/'):
+			response = self.client.get(url)
+			self.assertEquals(response.status_code, 200)
+			etag = response['ETag']
+
+			response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+			self.assertEquals(response.status_code, 304, url)
+
+			# The validator is checked before anything is rendered, without
+			# a query, when the page isn't served from the cache either
+			self.client.cookies[settings.SESSION_COOKIE_NAME] = 'not-a-session'
+			with self.assertNumQueries(0):
+				response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+			self.assertEquals(response.status_code, 304, url)
+			del self.client.cookies[settings.SESSION_COOKIE_NAME]
+
+	def test_last_modified(self):
+		url = self.post.get_absolute_url()
+		response = self.client.get(url)
+		last_modified = response['Last-Modified']
+
+		response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+		self.assertEquals(response.status_code, 304)
+
+	def test_edit_changes_validators(self):
+		url = reverse('blogengine:index')
+		etag = self.client.get(url)['ETag']
+
+		self.post.text = 'This is my edited post'
+		self.post.save()
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 200)
+		self.assertNotEquals(response['ETag'], etag)
+
+	def test_delete_changes_validators(self):
+		PostFactory(title='My second post', text='This is my second post', slug='my-second-post')
+		url = reverse('blogengine:index')
+		etag = self.client.get(url)['ETag']
+
+		self.post.delete()
+
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 200)
+
+	def test_delete_changes_last_modified(self):
+		PostFactory(title='My second post', text='This is my second post', slug='my-second-post')
+		url = reverse('blogengine:index')
+		# As if nothing on the index had changed for an hour
+		an_hour_ago = int(time.time()) - 60 * 60
+		get_cache().set_many(dict(('blogengine:version:%s' % tag, 'old-%d' % an_hour_ago)
+			for tag in ('global', 'archives', 'taxonomy', 'index')), None)
+		last_modified = self.client.get(url)['Last-Modified']
+		self.assertEquals(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+		self.post.delete()
+
+		self.assertEquals(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class KeysetPaginationTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(KeysetPaginationTest, self).setUp()
+		start = timezone.now()
+		tag = TagFactory()
+		self.posts = []
+		for i in range(12):
+			# Pairs of posts share a pub_date to exercise the id tiebreak
+			post = PostFactory(
+				title='Post number %d' % i,
+				text='This is post number %d' % i,
+				slug='post-%d' % i,
+				pub_date=start - datetime.timedelta(days=i // 2))
+			post.tags.add(tag)
+			self.posts.append(post)
+		self.ordered = sorted(self.posts, key=lambda post: (post.pub_date, post.pk), reverse=True)
+
+	def titles(self, response):
+		return re.findall(r'>(Post number \d+)</a>', response.content)
+
+	def expected(self, start, end):
+		return [post.title for post in self.ordered[start:end]]
+
+	def test_listing_must_name_pages_and_tags(self):
+		view = KeysetPaginationMixin()
+		self.assertRaises(ImproperlyConfigured, view.get_page_tags)
+		self.assertRaises(ImproperlyConfigured, view.get_page_url, 2)
+		view.page_tags = ('index',)
+		self.assertEquals(view.get_page_tags(), ['index'])
+
+	def test_numbered_pages(self):
+		for url in ('/', '/category/python/', '/tag/python/'):
+			response = self.client.get(url)
+			self.assertEquals(self.titles(response), self.expected(0, 5))
+
+		response = self.client.get(reverse('blogengine:index', kwargs={'page': 2}))
+		self.assertEquals(self.titles(response), self.expected(5, 10))
+
+		response = self.client.get(reverse('blogengine:category', kwargs={'slug': 'python', 'page': 3}))
+		self.assertEquals(self.titles(response), self.expected(10, 12))
+		self.assertTrue('Next Page' not in response.content)
+
+		response = self.client.get(reverse('blogengine:tag', kwargs={'slug': 'python', 'page': 4}))
+		self.assertEquals(response.status_code, 404)
+
+	def test_deep_pages_skip_count_and_offset(self):
+		# Prime the page-boundary map
+		self.client.get('/3/')
+
+		with self.assertNumQueries(2):
+			response = self.client.get('/3/?nocache')
+		self.assertEquals(self.titles(response), self.expected(10, 12))
+
+	def test_boundaries_scanned_on_demand(self):
+		posts = Post.objects.all()
+		with self.assertNumQueries(1):
+			self.assertEquals(len(page_boundaries(posts, 5, ['index'], 2)), 1)
+		with self.assertNumQueries(0):
+			self.assertEquals(len(page_boundaries(posts, 5, ['index'], 2)), 1)
+		# Deeper pages carry on from the last key, until the listing runs out
+		with self.assertNumQueries(1):
+			self.assertEquals(page_boundaries(posts, 5, ['index'], 9),
+				[(post.pub_date, post.pk) for post in (self.ordered[4], self.ordered[9])])
+		with self.assertNumQueries(0):
+			self.assertEquals(len(page_boundaries(posts, 5, ['index'], 20)), 2)
+
+	def test_cursor_links(self):
+		response = self.client.get('/')
+		self.assertTrue('href="/2/"' in response.content)
+
+		last = self.ordered[4]
+		response = self.client.get('/?after=%s' % encode_cursor(last.pub_date, last.pk))
+		self.assertEquals(self.titles(response), self.expected(5, 10))
+
+		first = self.ordered[5]
+		response = self.client.get('/?before=%s' % encode_cursor(first.pub_date, first.pk))
+		self.assertEquals(self.titles(response), self.expected(0, 5))
+
+		response = self.client.get('/?after=garbage')
+		self.assertEquals(response.status_code, 404)
+
+	def test_new_post_shifts_pages(self):
+		self.client.get('/2/')
+		PostFactory(title='Post number 99', text='Newest', slug='post-99')
+
+		response = self.client.get('/2/')
+		self.assertEquals(self.titles(response), self.expected(4, 9))
+
+
+class ArchiveTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(ArchiveTest, self).setUp()
+		self.september = timezone.make_aware(datetime.datetime(2014, 9, 23, 22, 0), timezone.utc)
+		self.october = timezone.make_aware(datetime.datetime(2014, 10, 2, 22, 0), timezone.utc)
+		self.post = PostFactory(pub_date=self.september)
+		self.other_post = PostFactory(title='My second post', text='This is my second post',
+			slug='my-second-post', pub_date=self.september)
+
+	def months(self):
+		return list(ArchiveMonth.objects.values_list('year', 'month', 'post_count'))
+
+	def test_summary_follows_posts(self):
+		self.assertEquals(self.months(), [(2014, 9, 2)])
+
+		self.post.pub_date = self.october
+		self.post.save()
+		self.assertEquals(self.months(), [(2014, 10, 1), (2014, 9, 1)])
+
+		self.other_post.delete()
+		self.assertEquals(self.months(), [(2014, 10, 1)])
+
+		ArchiveMonth.objects.all().delete()
+		call_command('rebuild_archives', verbosity=0)
+		self.assertEquals(self.months(), [(2014, 10, 1)])
+
+	def test_sidebar(self):
+		response = self.client.get(reverse('blogengine:index'))
+		self.assertTrue('<a href="/2014/9/">September 2014</a>' in response.content)
+
+		# A new month is picked up by cached pages too
+		PostFactory(title='My third post', text='This is my third post', slug='my-third-post', pub_date=self.october)
+		response = self.client.get(self.post.get_absolute_url())
+		self.assertTrue('<a href="/2014/10/">October 2014</a>' in response.content)
+
+	def test_month_archive(self):
+		PostFactory(title='My third post', text='This is my third post', slug='my-third-post', pub_date=self.october)
+
+		# The empty-month check, the page, its tags, the Archives sidebar,
+		# which changed when October appeared, and the category and tag
+		# summary, which changed with the new post
+		with self.assertNumQueries(6):
+			response = self.client.get(reverse('blogengine:archive_month', args=[2014, 9]))
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue('My first post' in response.content)
+		self.assertTrue('My second post' in response.content)
+		self.assertTrue('My third post' not in response.content)
+
+		response = self.client.get('/2014/8/')
+		self.assertEquals(response.status_code, 404)
+
+		# Posts are still reachable under the same prefix
+		response = self.client.get(self.post.get_absolute_url())
+		self.assertEquals(response.status_code, 200)
+
+
+class TaxonomyCountTest(BaseAcceptanceTest):
+	def counts(self):
+		return (dict(CategoryCount.objects.values_list('category__slug', 'post_count')),
+			dict(TagCount.objects.values_list('tag__slug', 'post_count')))
+
+	def test_counts_follow_posts(self):
+		python = CategoryFactory()
+		perl = CategoryFactory(name='perl', description='The Perl programming language', slug='perl')
+		django, web = TagFactory(name='django', slug='django'), TagFactory(name='web', slug='web')
+
+		post = PostFactory(category=python)
+		post.tags.add(django, web)
+		other = PostFactory(title='Other', slug='other', category=python)
+		other.tags.add(django)
+		self.assertEquals(self.counts(), ({'python': 2}, {'django': 2, 'web': 1}))
+
+		post.category = perl
+		post.save()
+		# Removing a tag the post doesn't have changes nothing
+		post.tags.remove(web, TagFactory())
+		web.post_set.add(other)
+		self.assertEquals(self.counts(), ({'python': 1, 'perl': 1}, {'django': 2, 'web': 1}))
+
+		other.tags.clear()
+		post.delete()
+		self.assertEquals(self.counts(), ({'python': 1}, {}))
+
+		CategoryCount.objects.update(post_count=7)
+		TagCount.objects.create(site=other.site, tag=web, post_count=3)
+		call_command('recount_taxonomy', verbosity=0)
+		self.assertEquals(self.counts(), ({'python': 1}, {}))
+
+	def test_sidebar_and_page_count(self):
+		tag = TagFactory(name='django', slug='django')
+		for i in range(7):
+			PostFactory(title='Post %d' % i, slug='post-%d' % i).tags.add(tag)
+		TagFactory(name='unused', slug='unused')
+
+		response = self.client.get('/tag/django/')
+		self.assertTrue('<a href="/category/python/">python</a>' in response.content)
+		self.assertTrue('href="/tag/django/">django</a>' in response.content)
+		self.assertTrue('/tag/unused/' not in response.content)
+		self.assertTrue('Page 1 of 2' in response.content)
+
+		self.assertEquals(self.client.get('/tag/django/page/2/').status_code, 200)
+		self.assertEquals(self.client.get('/tag/django/page/3/').status_code, 404)
+		self.assertEquals(self.client.get('/tag/unused/').status_code, 200)
+
+
+class FragmentCacheTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(FragmentCacheTest, self).setUp()
+		self.post = PostFactory()
+		# Let every request render the page, so only the fragments are cached
+		self.client.cookies[settings.SESSION_COOKIE_NAME] = 'anything'
+
+	def test_sidebar_is_cached_until_taxonomy_changes(self):
+		self.assertTrue('<a href="/category/python/">python</a>' in self.client.get('/').content)
+
+		# Not through save(), so nothing is bumped
+		Category.objects.update(name='snake')
+		self.assertTrue('<a href="/category/python/">python</a>' in self.client.get('/').content)
+
+		PostFactory(title='Another', slug='another', category=CategoryFactory(name='perl', slug='perl'))
+		content = self.client.get('/').content
+		self.assertTrue('<a href="/category/python/">snake</a>' in content)
+		self.assertTrue('<a href="/category/perl/">perl</a>' in content)
+
+	def test_fragments_are_per_site(self):
+		month = '%s %d</a>' % (self.post.pub_date.strftime('%B'), self.post.pub_date.year)
+		self.assertTrue(month in self.client.get('/').content)
+		other = SiteFactory(name='other.com', domain='other.com')
+		with self.settings(SITE_ID=other.pk):
+			self.assertTrue(month not in self.client.get('/').content)
+
+
+class ExcerptTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(ExcerptTest, self).setUp()
+		words = ['word%d' % n for n in range(200)]
+		self.post = PostFactory(title='Long post', slug='long',
+			text='Opening **%s** & more\n\n%s' % (' '.join(words[:100]), ' '.join(words[100:])))
+
+	def test_excerpt_and_teaser_are_stored(self):
+		post = Post.objects.get(pk=self.post.pk)
+		self.assertEquals(len(post.excerpt.split()), 61)
+		self.assertTrue(post.excerpt.startswith('Opening word0 word1'))
+		self.assertTrue(post.teaser_html.startswith('<p>Opening <strong>word0 word1'))
+		# Cut inside the <strong>, which is closed again
+		self.assertTrue(post.teaser_html.endswith('word58 \xe2\x80\xa6</strong></p>'.decode('utf-8')))
+		self.assertTrue('word199' in post.text_html)
+
+	def test_list_pages_show_teasers_without_loading_bodies(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/')
+		self.assertTrue('word58' in response.content)
+		self.assertTrue('word59' not in response.content)
+		self.assertTrue('<a href="%s">Read more</a>' % self.post.get_absolute_url() in response.content)
+		post_queries = [query['sql'] for query in queries.captured_queries if 'FROM "blogengine_post"' in query['sql']]
+		self.assertTrue(post_queries)
+		for sql in post_queries:
+			self.assertTrue('"blogengine_post"."text"' not in sql)
+			self.assertTrue('"blogengine_post"."text_html"' not in sql)
+
+		self.assertTrue('word199' in self.client.get(self.post.get_absolute_url()).content)
+
+	def test_posts_without_teasers_are_rendered_on_first_view(self):
+		Post.objects.filter(pk=self.post.pk).update(text_html='', teaser_html='', excerpt='', text_html_key='')
+		self.assertTrue('word58' in self.client.get('/').content)
+		post = Post.objects.get(pk=self.post.pk)
+		self.assertEquals(post.text_html_key, render_key(post.text))
+		self.assertTrue(post.teaser_html and post.excerpt)
+
+
+class RelatedPostTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(RelatedPostTest, self).setUp()
+		self.django = TagFactory(name='django', slug='django')
+		self.post = PostFactory(title='Caching Django views', slug='caching-views',
+			text='Caching Django views with memcached keeps page renders cheap')
+		self.post.tags.add(self.django)
+		self.close = PostFactory(title='Memcached for Django', slug='memcached',
+			text='Memcached keeps Django page renders cheap')
+		self.close.tags.add(self.django)
+		self.far = PostFactory(title='Gardening', slug='gardening', text='Tomatoes need sun and water',
+			category=CategoryFactory(name='garden', description='Gardening', slug='garden'))
+
+	def related(self, post):
+		return [other.slug for other in related.related_posts(post)]
+
+	def test_updated_on_save(self):
+		self.assertEquals(self.related(self.post), ['memcached'])
+		self.assertEquals(self.related(self.close), ['caching-views'])
+		self.assertEquals(self.related(self.far), [])
+
+		self.far.text = 'Tomatoes and memcached page renders'
+		self.far.save()
+		self.assertEquals(self.related(self.post), ['memcached', 'gardening'])
+		self.assertEquals(sorted(self.related(self.far)), ['caching-views', 'memcached'])
+
+		self.close.tags.remove(self.django)
+		self.close.text = 'Nothing in common'
+		self.close.category = self.far.category
+		self.close.save()
+		self.assertEquals(self.related(self.post), ['gardening'])
+		self.assertEquals(self.related(self.far), ['caching-views', 'memcached'])
+
+		response = self.client.get(self.post.get_absolute_url())
+		self.assertTrue('Related posts' in response.content)
+		self.assertTrue(self.far.get_absolute_url() in response.content)
+
+	def test_recomputed_only_on_relevant_changes(self):
+		RelatedPost.objects.filter(post=self.post).update(score=42)
+		self.post.title = 'Caching Django views with memcached'
+		self.post.save()
+		self.post.tags.add(self.django)
+		self.assertEquals(RelatedPost.objects.get(post=self.post).score, 42)
+
+		self.post.text += ' and templates'
+		self.post.save()
+		score = RelatedPost.objects.get(post=self.post).score
+		self.assertTrue(0 < score < 42)
+
+		# Clearing a tag's posts reaches every post that had it
+		self.django.post_set.clear()
+		self.assertTrue(RelatedPost.objects.get(post=self.post).score < score)
+		self.assertTrue(RelatedPost.objects.get(post=self.close).score < score)
+
+	def test_detail_page_follows_related_posts(self):
+		url = self.post.get_absolute_url()
+		etag = self.client.get(url)['ETag']
+
+		# Renaming a related post changes the pages listing it
+		self.close.title = 'Memcached and Django'
+		self.close.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue('Memcached and Django' in response.content)
+
+		# So does a post joining the list
+		etag = response['ETag']
+		self.far.text = 'Tomatoes and memcached page renders'
+		self.far.save()
+		response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue(self.far.get_absolute_url() in response.content)
+
+	def test_common_words_ignored(self):
+		counts, frequencies = {'django': 1, 'memcached': 1}, {'django': 60, 'memcached': 3}
+		self.assertEquals(sorted(related.vector(counts, frequencies, 100)), ['memcached'])
+		# Small sites keep every word
+		self.assertEquals(sorted(related.vector(counts, frequencies, 99)), ['django', 'memcached'])
+
+		Post.objects.all().delete()
+		for slug, text in (('views', 'django memcached'), ('templates', 'django templates'),
+				('forms', 'django forms'), ('tomatoes', 'tomatoes memcached')):
+			PostFactory(title=slug, slug=slug, text=text, category=None)
+		related.build()
+		self.assertEquals(self.related(Post.objects.get(slug='templates')), ['views', 'forms'])
+
+		# Once 'django', in three posts of four, is too common, only 'memcached' links posts
+		min_posts, related.COMMON_WORD_MIN_POSTS = related.COMMON_WORD_MIN_POSTS, 4
+		try:
+			related.build()
+		finally:
+			related.COMMON_WORD_MIN_POSTS = min_posts
+		self.assertEquals(self.related(Post.objects.get(slug='templates')), [])
+		self.assertEquals(self.related(Post.objects.get(slug='views')), ['tomatoes'])
+
+	def test_word_frequencies_are_per_site(self):
+		Post.objects.all().delete()
+		for slug, text in (('views', 'django memcached'), ('templates', 'django templates'),
+				('tomatoes', 'tomatoes'), ('sun', 'sun')):
+			PostFactory(title=slug, slug=slug, text=text, category=None)
+		other = SiteFactory(name='other.com', domain='other.com')
+		for i in range(5):
+			PostFactory(title='Foreign %d' % i, slug='foreign-%d' % i, text='django', category=None, site=other)
+
+		# 'django' is in half the posts here, however common it is elsewhere
+		min_posts, related.COMMON_WORD_MIN_POSTS = related.COMMON_WORD_MIN_POSTS, 4
+		try:
+			related.build()
+			self.assertEquals(Term.objects.get(site=settings.SITE_ID, term='django').post_count, 2)
+			self.assertEquals(Term.objects.get(site=other, term='django').post_count, 5)
+			self.assertEquals(self.related(Post.objects.get(slug='templates')), ['views'])
+
+			# Saving a post weighs its words the same way
+			post = Post.objects.get(slug='views')
+			post.save()
+			self.assertEquals(sorted(post.terms.values_list('term', flat=True)), ['django', 'memcached'])
+		finally:
+			related.COMMON_WORD_MIN_POSTS = min_posts
+
+	def test_build_matches_incremental(self):
+		for i in range(12):
+			post = PostFactory(title='Post %d' % i, slug='post-%d' % i,
+				text=' '.join(['django', 'cache', 'query', 'template', 'deploy', 'memcached'][i % 6:i % 6 + 3]))
+			if i % 3:
+				post.tags.add(self.django)
+		related.build()
+		built = list(RelatedPost.objects.order_by('post', 'rank').values_list('post', 'related', 'score'))
+		self.assertTrue(built)
+		# The pure Python scan agrees with the sparse matrix build
+		sparse, related.sparse = related.sparse, None
+		try:
+			call_command('rebuild_related', verbosity=0)
+		finally:
+			related.sparse = sparse
+		self.assertEquals(list(RelatedPost.objects.order_by('post', 'rank').values_list('post', 'related', 'score')), built)
+
+
+class StaticBuildTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(StaticBuildTest, self).setUp()
+		self.output_dir = tempfile.mkdtemp()
+		self.post = PostFactory(pub_date=timezone.make_aware(datetime.datetime(2014, 9, 23, 22, 0), timezone.utc))
+		self.post.tags.add(TagFactory())
+		self.other_category = CategoryFactory(name='perl', description='The Perl programming language', slug='perl')
+		self.other_post = PostFactory(title='Perl post', text='About perl', slug='perl-post',
+			category=self.other_category, pub_date=timezone.make_aware(datetime.datetime(2014, 10, 2, 22, 0), timezone.utc))
+		page = FlatPageFactory()
+		page.sites.add(Site.objects.all()[0])
+
+	def tearDown(self):
+		shutil.rmtree(self.output_dir)
+
+	def read(self, url):
+		with open(os.path.join(self.output_dir, url.strip('/'), 'index.html')) as page:
+			return page.read()
+
+	def test_full_build(self):
+		rendered, removed, failed = build(self.output_dir, processes=1)
+		self.assertEquals(failed, [])
+		self.assertEquals(sorted(rendered), sorted([
+			'/', '/2014/9/my-first-post/', '/2014/10/perl-post/', '/category/python/', '/category/perl/',
+			'/tag/python/', '/2014/9/', '/2014/10/', '/about/']))
+
+		self.assertTrue('This is my first post' in self.read('/2014/9/my-first-post/'))
+		self.assertTrue('All about me' in self.read('/about/'))
+
+		call_command('build_static', self.output_dir, processes=1, verbosity=0)
+
+	def test_incremental_build(self):
+		build(self.output_dir, processes=1)
+
+		rendered, removed, failed = build(self.output_dir, processes=1)
+		self.assertEquals(rendered, [])
+
+		self.post.text = 'This is my edited post'
+		self.post.save()
+		rendered, removed, failed = build(self.output_dir, processes=1)
+		self.assertEquals(sorted(rendered), sorted([
+			'/', '/2014/9/my-first-post/', '/category/python/', '/tag/python/', '/2014/9/']))
+		self.assertTrue('This is my edited post' in self.read('/'))
+
+		self.other_post.delete()
+		rendered, removed, failed = build(self.output_dir, processes=1)
+		self.assertTrue('/2014/10/perl-post/' in removed)
+		self.assertFalse(os.path.exists(os.path.join(self.output_dir, '2014', '10', 'perl-post')))
+
+
+class FeedTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(FeedTest, self).setUp()
+		self.post = PostFactory(text='This is [my first blog post](http://127.0.0.1:8000/)')
+		self.post.tags.add(TagFactory())
+		self.other_category = CategoryFactory(name='perl', description='The Perl programming language', slug='perl')
+		self.other_post = PostFactory(title='Perl post', text='About perl', slug='perl-post', category=self.other_category)
+
+	def test_feeds(self):
+		for url, content_type in (
+				('/feeds/rss/', 'application/rss+xml'),
+				('/feeds/atom/', 'application/atom+xml'),
+				('/category/python/rss/', 'application/rss+xml'),
+				('/tag/python/atom/', 'application/atom+xml')):
+			response = self.client.get(url)
+			self.assertEquals(response.status_code, 200)
+			self.assertTrue(response['Content-Type'].startswith(content_type))
+			self.assertTrue('My first post' in response.content)
+			# Items carry the stored HTML
+			self.assertTrue('&lt;a href="http://127.0.0.1:8000/"&gt;my first blog post&lt;/a&gt;' in response.content)
+
+		response = self.client.get('/category/perl/rss/')
+		self.assertTrue('My first post' not in response.content)
+
+		response = self.client.get('/category/blah/rss/')
+		self.assertEquals(response.status_code, 404)
+
+	def test_conditional_get_and_gzip(self):
+		response = self.client.get('/feeds/atom/')
+		etag = response['ETag']
+
+		with self.assertNumQueries(0):
+			response = self.client.get('/feeds/atom/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEquals(response.status_code, 304)
+
+		response = self.client.get('/feeds/atom/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+		self.assertEquals(response['Content-Encoding'], 'gzip')
+		self.assertTrue('My first post' in gzip.GzipFile(fileobj=StringIO(response.content)).read())
+
+	def test_edit_regenerates_only_its_feeds(self):
+		for url in ('/feeds/rss/', '/category/python/rss/', '/category/perl/rss/'):
+			self.client.get(url)
+
+		self.other_post.title = 'Edited perl post'
+		self.other_post.save()
+
+		with self.assertNumQueries(0):
+			self.client.get('/category/python/rss/')
+		self.assertTrue('Edited perl post' in self.client.get('/category/perl/rss/').content)
+		self.assertTrue('Edited perl post' in self.client.get('/feeds/rss/').content)
+
+
+class SitemapTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(SitemapTest, self).setUp()
+		self.posts = [PostFactory(title='Post %d' % i, text='Post %d' % i, slug='post-%d' % i) for i in range(5)]
+		self.posts[0].tags.add(TagFactory())
+		page = FlatPageFactory()
+		page.sites.add(Site.objects.all()[0])
+
+	def get_shard(self, url):
+		response = self.client.get(url)
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		return ''.join(response.streaming_content)
+
+	def test_sitemap(self):
+		response = self.client.get('/sitemap.xml')
+		self.assertEquals(response.status_code, 200)
+		for shard in ('posts-0', 'categories-0', 'tags-0', 'pages-0'):
+			self.assertTrue('http://example.com/sitemap-%s.xml' % shard in response.content)
+
+		content = self.get_shard('/sitemap-posts-0.xml')
+		for post in self.posts:
+			self.assertTrue('<loc>http://example.com%s</loc>' % post.get_absolute_url() in content)
+		self.assertEquals(content.count('<lastmod>'), 5)
+
+		self.assertTrue('http://example.com/category/python/' in self.get_shard('/sitemap-categories-0.xml'))
+		self.assertTrue('http://example.com/tag/python/' in self.get_shard('/sitemap-tags-0.xml'))
+		self.assertTrue('http://example.com/about/' in self.get_shard('/sitemap-pages-0.xml'))
+
+		response = self.client.get('/sitemap-blah-0.xml')
+		self.assertEquals(response.status_code, 404)
+
+	def test_shards(self):
+		shard_size = sitemaps.SHARD_SIZE
+		sitemaps.SHARD_SIZE = 2
+		try:
+			shards = list(sitemaps.SECTIONS['posts'].shards())
+			urls = []
+			for shard, lastmod in shards:
+				shard_urls = list(sitemaps.SECTIONS['posts'].urls(shard))
+				self.assertTrue(len(shard_urls) <= 2)
+				urls.extend(url for url, lastmod in shard_urls)
+		finally:
+			sitemaps.SHARD_SIZE = shard_size
+
+		self.assertEquals(len(shards), 3)
+		self.assertEquals(sorted(urls), sorted(post.get_absolute_url() for post in self.posts))
+
+
+class BenchmarkTest(BaseAcceptanceTest):
+	def test_small_run(self):
+		build_corpus(posts=30, categories=3, tags=10)
+		self.assertEquals(Post.objects.count(), 30)
+		self.assertEquals(ArchiveMonth.objects.aggregate(total=models.Sum('post_count'))['total'], 30)
+
+		results = run_load(requests=28, concurrency=1, instrument=True)
+		self.assertTrue(results['views']['blogengine:index']['template_ms'] > 0)
+		self.assertEquals(sorted(results['routes']),
+			['archive', 'category', 'flatpage', 'index', 'post', 'search', 'tag'])
+		self.assertEquals(results['overall']['requests'], 28)
+		self.assertEquals(results['overall']['errors'], 0)
+		self.assertTrue(results['routes']['index']['queries_per_request'] >= 1)
+
+		slower = {'routes': {'index': dict(results['routes']['index'])}}
+		slower['routes']['index']['p95_ms'] *= 2
+		deltas, regressions = compare(slower, results)
+		self.assertEquals(regressions, ['index'])
+		deltas, regressions = compare(results, slower)
+		self.assertEquals(regressions, [])
+
+	def test_query_plans(self):
+		build_corpus(posts=40, categories=3, tags=10, sites=2)
+		self.assertEquals(Post.on_site.count(), 20)
+		plans = query_plans(repeat=2)
+		self.assertEquals(len(plans['dropped_indexes']), 2)
+		self.assertEquals(sorted(plans['with_indexes']), ['archive', 'category', 'index', 'index_deep_page', 'post'])
+		for query in ('index', 'category'):
+			self.assertTrue(any(name in ' '.join(plans['with_indexes'][query]['plan'])
+				for name in plans['dropped_indexes']))
+			self.assertFalse(any(name in ' '.join(plans['without_indexes'][query]['plan'])
+				for name in plans['dropped_indexes']))
+		# Put back afterwards
+		self.assertEquals(query_plans(repeat=1)['dropped_indexes'], plans['dropped_indexes'])
+
+	def test_startup(self):
+		# Nothing slow is imported before it's needed, unless warming up.  The
+		# test database isn't visible to other processes, so the response
+		# itself is an error.
+		results = startup({'missing': '/no-such-page/'}, repeat=1)
+		self.assertEquals(results['missing']['loaded'], [])
+		self.assertTrue(results['missing']['import_ms'] > 0)
+
+		results = startup({'missing': '/no-such-page/'}, warm_up=True, repeat=1)
+		self.assertEquals(results['missing']['loaded'], ['markdown2', 'pygments.formatters', 'pygments.lexers'])
+
+	def test_warm_up_skips_uncached_templates(self):
+		loaders = ('django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader')
+		with self.settings(TEMPLATE_LOADERS=loaders):
+			self.assertTrue('Skipped parsing the templates' in ' '.join(warm_up()))
+		with self.settings(TEMPLATE_LOADERS=(('django.template.loaders.cached.Loader', loaders),)):
+			self.assertEquals(warm_up(), [])
+
+class TransferTest(BaseAcceptanceTest):
+	def setUp(self):
+		super(TransferTest, self).setUp()
+		self.output_dir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.output_dir)
+		super(TransferTest, self).tearDown()
+
+	def snapshot(self):
+		return [(post.slug, post.title, post.pub_date, post.text, post.category.slug if post.category else None,
+				sorted(tag.slug for tag in post.tags.all()))
+			for post in Post.objects.for_listing().order_by('slug')]
+
+	def test_round_trip(self):
+		for i in range(7):
+			post = PostFactory(title=u'Post \u2603 %d' % i, slug='post-%d' % i, text='Text of post %d' % i,
+				pub_date=timezone.make_aware(datetime.datetime(2014, 9, i + 1, 12, 0), timezone.utc))
+			post.tags.add(TagFactory(name='tag %d' % (i % 3), slug='tag-%d' % (i % 3)))
+		PostFactory(title='No category', slug='no-category', category=None)
+		before = self.snapshot()
+
+		for format, path in (('jsonl', os.path.join(self.output_dir, 'posts.jsonl')),
+				('markdown', os.path.join(self.output_dir, 'posts'))):
+			call_command('export_posts', path, format=format, verbosity=0)
+			Post.objects.all().delete()
+			Tag.objects.all().delete()
+			call_command('import_posts', path, batch_size=3, verbosity=0)
+			self.assertEquals(self.snapshot(), before)
+
+		self.assertEquals(summary()['tag_counts'], {'tag-0': 3, 'tag-1': 2, 'tag-2': 2})
+		self.assertEquals(sorted(search_post_ids('post')), sorted(Post.objects.values_list('pk', flat=True)))
+		response = self.client.get(Post.objects.get(slug='post-3').get_absolute_url())
+		self.assertTrue('Text of post 3' in response.content)
+
+	def test_markdown_upsert(self):
+		post = PostFactory()
+		url = post.get_absolute_url()
+		self.assertTrue('My first post' in self.client.get(url).content)
+		with open(os.path.join(self.output_dir, 'my-first-post.md'), 'w') as markdown_file:
+			markdown_file.write("---\ntitle: Edited title\npub_date: 2014-10-01T09:30:00\n"
+				"category: Perl\ntags: [\"django\", {\"name\": \"Web\", \"slug\": \"www\"}]\n---\nNew *text*\n")
+		with open(os.path.join(self.output_dir, 'new.md'), 'w') as markdown_file:
+			markdown_file.write('---\ntitle: "2014"\npub_date: "2014-10-02T09:30:00+00:00"\n---\nNew post\n')
+		call_command('import_posts', self.output_dir, rebuild=False, verbosity=0)
+
+		post = Post.objects.get(pk=post.pk)
+		self.assertEquals((post.title, post.text, post.category.slug), ('Edited title', 'New *text*\n', 'perl'))
+		self.assertEquals(sorted(post.tags.values_list('slug', 'name')), [('django', 'django'), ('www', 'Web')])
+		self.assertEquals(post.get_text_html(), '<p>New <em>text</em></p>\n')
+		self.assertEquals(Post.objects.get(slug='new').title, '2014')
+		# The cached page goes, even without the rebuild
+		self.assertTrue('Edited title' in self.client.get(url).content)
+
+	def test_warns_of_process_local_cache(self):
+		path = os.path.join(self.output_dir, 'posts.jsonl')
+		with open(path, 'w') as jsonl_file:
+			jsonl_file.write(json.dumps({'title': 'Imported', 'slug': 'imported', 'pub_date': '2014-10-02T09:30:00',
+				'text': 'Imported post'}) + '\n')
+		stderr = StringIO()
+		call_command('import_posts', path, rebuild=False, stdout=StringIO(), stderr=stderr)
+		self.assertEquals(stderr.getvalue(), '')
+
+		with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+			call_command('import_posts', path, rebuild=False, stdout=StringIO(), stderr=stderr)
+		self.assertTrue('restart the server' in stderr.getvalue())
+
+@override_settings(BLOGENGINE_INSTRUMENTATION=True, BLOGENGINE_METRICS_TOKEN='sekrit', BLOGENGINE_SQL_SAMPLE_RATE=1.0)
+class InstrumentationTest(BaseAcceptanceTest):
+	fixtures = ['users.json']
+
+	def setUp(self):
+		super(InstrumentationTest, self).setUp()
+		metrics.reset()
+		PostFactory(text='Some *emphasis*')
+
+	def test_records_view_metrics(self):
+		response = self.client.get('/')
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue(re.match(r'total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, md;dur=[\d.]+$',
+			response['Server-Timing']))
+
+		index = metrics.snapshot()['views']['blogengine:index']
+		self.assertEquals(index['wall_ms']['count'], 1)
+		self.assertTrue(index['sql_count']['sum'] >= 1)
+		self.assertTrue(index['template_ms']['sum'] > 0)
+
+		# Served from the page cache: no template is rendered
+		self.client.get('/')
+		index = metrics.snapshot()['views']['blogengine:index']
+		self.assertEquals(index['wall_ms']['count'], 2)
+		self.assertEquals(index['template_ms']['buckets'][0][1], 1)
+
+	def test_sql_timing_is_sampled(self):
+		with self.settings(BLOGENGINE_SQL_SAMPLE_RATE=0):
+			response = self.client.get('/')
+		self.assertFalse('db;' in response['Server-Timing'])
+		index = metrics.snapshot()['views']['blogengine:index']
+		self.assertEquals(index['wall_ms']['count'], 1)
+		self.assertFalse('sql_count' in index)
+
+		# The debug cursor goes back to how it was, even if the view fails
+		middleware = InstrumentationMiddleware()
+		request = RequestFactory().get('/')
+		debug_cursor = connection.use_debug_cursor
+		middleware.process_request(request)
+		self.assertTrue(connection.use_debug_cursor)
+		middleware.process_exception(request, ValueError())
+		self.assertEquals(connection.use_debug_cursor, debug_cursor)
+		middleware.process_response(request, HttpResponse())
+		self.assertEquals(connection.use_debug_cursor, debug_cursor)
+
+	def test_endpoint(self):
+		self.client.get('/')
+		self.assertEquals(self.client.get('/metrics/').status_code, 403)
+
+		self.client.login(username='bobsmith', password="password")
+		response = self.client.get('/metrics/')
+		self.assertEquals(response.status_code, 200)
+		self.assertEquals(json.loads(response.content)['views']['blogengine:index']['wall_ms']['count'], 1)
+
+		self.client.logout()
+		self.assertEquals(self.client.get('/metrics/?token=wrong').status_code, 403)
+		response = self.client.get('/metrics/?format=prometheus&token=sekrit')
+		self.assertEquals(response.status_code, 200)
+		self.assertTrue('blogengine_request_wall_ms_count{view="blogengine:index"} 1' in response.content)
+		self.assertTrue('blogengine_request_sql_count_bucket{view="blogengine:index",le="+Inf"}' in response.content)
+		self.assertTrue('blogengine_highlight_cache_lookups_total{outcome="misses"}' in response.content)
+
+
+class StaticAssetTest(TestCase):
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.root)
+
+	def test_minify(self):
+		self.assertEquals(minify_css("/*! licence */\na , b > c {\n\tcolor : red;\n\t/* note */\n}\n"),
+			"/*! licence */ a,b>c{color :red}")
+		self.assertEquals(minify_js("// comment\n/* block\n   comment */\nvar a = 1;\n\n    a++;\n"),
+			"var a = 1;\na++;")
+		self.assertEquals(minify_js("/* x */ var a = 1;\n/* one */ /* two\n*/ a++; // done\nvar s = '/*';\n"),
+			"var a = 1;\na++; // done\nvar s = '/*';")
+
+	def test_pipeline(self):
+		def bundle_tags():
+			return Template("{% load assets %}{% bundle 'css/site.css' %}").render(Context())
+
+		with self.settings(STATIC_ROOT=self.root, STATICFILES_DIRS=()):
+			# Individual files until collectstatic has built the bundle
+			self.assertTrue('/static/css/normalize.css' in bundle_tags())
+
+			call_command('collectstatic', interactive=False, verbosity=0)
+			tags = bundle_tags()
+			self.assertEquals(len(re.findall('<link', tags)), 1)
+			url = re.search(r'href="(/static/css/site\.[0-9a-f]{12}\.css)"', tags).group(1)
+			with open(os.path.join(self.root, url[len('/static/'):])) as bundle:
+				content = bundle.read()
+			self.assertTrue('.hll{background-color:#ffffcc}' in content)
+			self.assertTrue(re.search(r'url\("\.\./fonts/glyphicons-halflings-regular\.[0-9a-f]{12}\.woff"\)', content))
+
+			served = {}
+			def start_response(status, headers):
+				served['status'], served['headers'] = status, dict(headers)
+			app = PrecompressedStatic(lambda environ, start_response: ['app'])
+
+			body = ''.join(app({'PATH_INFO': url, 'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'}, start_response))
+			self.assertEquals(served['status'], '200 OK')
+			self.assertEquals(served['headers']['Content-Encoding'], 'gzip')
+			self.assertEquals(served['headers']['Cache-Control'], 'public, max-age=31536000, immutable')
+			self.assertEquals(gzip.GzipFile(fileobj=StringIO(body)).read(), content)
+
+			response = app({'PATH_INFO': url, 'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip;q=0'}, start_response)
+			body = ''.join(response)
+			self.assertFalse('Content-Encoding' in served['headers'])
+			self.assertEquals(body, content)
+			# The server closes the response, and with it the file
+			response.close()
+			self.assertTrue(response.filelike.closed)
+
+			app({'PATH_INFO': '/static/../manage.py', 'REQUEST_METHOD': 'GET'}, start_response)
+			self.assertEquals(served['status'], '404 Not Found')
+			self.assertEquals(app({'PATH_INFO': '/', 'REQUEST_METHOD': 'GET'}, start_response), ['app'])
+
+	def test_serves_uncollected_files(self):
+		served = {}
+		def start_response(status, headers):
+			served['status'], served['headers'] = status, dict(headers)
+		def get(path):
+			environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'SERVER_NAME': 'testserver', 'SERVER_PORT': '80',
+				'wsgi.input': StringIO(), 'wsgi.url_scheme': 'http'}
+			return ''.join(PrecompressedStatic(lambda environ, start_response: ['app'])(environ, start_response))
+		def original(name):
+			with open(os.path.join(settings.BASE_DIR, 'blogengine', 'static', 'css', name)) as static_file:
+				return static_file.read()
+		os.mkdir(os.path.join(self.root, 'css'))
+		with open(os.path.join(self.root, 'css', 'main.css'), 'w') as collected:
+			collected.write('/* collected */')
+
+		# Like the test client, keep the test's connection open across requests
+		signals.request_started.disconnect(close_old_connections)
+		signals.request_finished.disconnect(close_old_connections)
+		try:
+			with self.settings(STATIC_ROOT=self.root, DEBUG=False):
+				# Not collected yet
+				self.assertEquals(get('/static/css/normalize.css'), original('normalize.css'))
+				self.assertEquals(served['status'], '200 OK')
+				self.assertEquals(get('/static/css/main.css'), '/* collected */')
+
+			# While debugging, the originals win over collected copies
+			with self.settings(STATIC_ROOT=self.root, DEBUG=True):
+				self.assertEquals(get('/static/css/main.css'), original('main.css'))
+				self.assertEquals(served['status'], '200 OK')
+		finally:
+			signals.request_started.connect(close_old_connections)
+			signals.request_finished.connect(close_old_connections)
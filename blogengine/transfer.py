@@ -0,0 +1,324 @@
+"""
+Bulk import and export of posts with their categories and tags.
+
+Posts travel as records::
+
+	{"title": ..., "slug": ..., "pub_date": "2014-09-23T22:00:00+00:00",
+	 "text": ..., "site": "example.com",
+	 "category": {"name": ..., "slug": ..., "description": ...},
+	 "tags": [{"name": ..., "slug": ...}]}
+
+either one per line of a JSONL file or one per Markdown file in a directory,
+with everything but ``text`` in a front matter block (see
+``parse_front_matter()``).  Both directions stream in batches, so memory
+stays flat however many posts there are.
+
+``import_records()`` skips ``Model.save()`` and the signal receivers:
+categories and tags are matched by slug and created in bulk, new posts go
+in with ``bulk_create``, existing posts (by slug) are updated with one
+batched UPDATE and the tag links are written in batches.  The HTML and
+teasers of new or changed posts are left for ``render_posts`` (or rendered
+on first view).  The cached pages are invalidated at the end of the import,
+and ``rebuild_derived()`` then brings the search index, archive, counts and
+related posts up to date in one pass each.
+"""
+
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db import connection, reset_queries, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from blogengine import archive, related
+from blogengine.autocomplete import AUTOCOMPLETE_TAG
+from blogengine.cache import GLOBAL_TAG, bump
+from blogengine.markup import render_key
+from blogengine.models import Category, Post, Tag
+from blogengine.search import rebuild_index
+from blogengine.taxonomy import recount
+from blogengine.utils import iterate_by_pk
+
+# Kept under SQLite's limit of 999 parameters per query for the slug lookups
+BATCH_SIZE = 500
+
+FRONT_MATTER = '---'
+
+# Front matter keys, in the order they are written
+FRONT_MATTER_KEYS = ('title', 'slug', 'pub_date', 'site', 'category', 'tags')
+
+
+def batches(iterable, size):
+	iterator = iter(iterable)
+	while True:
+		batch = list(islice(iterator, size))
+		if not batch:
+			return
+		yield batch
+
+
+# Reading and writing records
+
+def parse_front_matter(content):
+	"""
+	Split a Markdown file into ``(metadata, text)``.  The file starts with a
+	``---`` line, then ``key: value`` lines up to the next ``---``.  Values
+	are JSON strings, lists or objects where they parse as such and plain
+	strings otherwise, so both ``title: "Hello"`` and ``title: Hello`` work;
+	a category may be given by name and tags as a list of names.
+	"""
+	lines = content.split('\n')
+	if not lines or lines[0].strip() != FRONT_MATTER:
+		return {}, content
+	metadata = {}
+	for number, line in enumerate(lines[1:], 1):
+		if line.strip() == FRONT_MATTER:
+			return metadata, '\n'.join(lines[number + 1:])
+		key, separator, value = line.partition(':')
+		if separator:
+			value = value.strip()
+			try:
+				parsed = json.loads(value)
+			except ValueError:
+				parsed = value
+			metadata[key.strip()] = parsed if isinstance(parsed, (basestring, list, dict)) else value
+	raise ValueError("Front matter is not closed by a '%s' line" % FRONT_MATTER)
+
+
+def format_front_matter(record):
+	lines = [FRONT_MATTER]
+	for key in FRONT_MATTER_KEYS:
+		if record.get(key) is not None:
+			lines.append(u'%s: %s' % (key, json.dumps(record[key], ensure_ascii=False)))
+	lines.append(FRONT_MATTER)
+	return u'\n'.join(lines) + u'\n' + record['text']
+
+
+def read_jsonl(path):
+	with open(path) as source:
+		for number, line in enumerate(source, 1):
+			if line.strip():
+				try:
+					yield json.loads(line)
+				except ValueError as e:
+					raise ValueError("%s, line %d: %s" % (path, number, e))
+
+
+def read_markdown(directory):
+	for name in sorted(os.listdir(directory)):
+		if name.endswith('.md'):
+			with open(os.path.join(directory, name)) as source:
+				metadata, text = parse_front_matter(source.read().decode('utf-8'))
+			metadata['text'] = text
+			# The file name stands in for a missing slug
+			metadata.setdefault('slug', name[:-len('.md')])
+			yield metadata
+
+
+def write_jsonl(records, path):
+	count = 0
+	with open(path, 'w') as output:
+		for record in records:
+			output.write(json.dumps(record, sort_keys=True) + '\n')
+			count += 1
+	return count
+
+
+def write_markdown(records, directory):
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+	count = 0
+	for record in records:
+		with open(os.path.join(directory, record['slug'] + '.md'), 'w') as output:
+			output.write(format_front_matter(record).encode('utf-8'))
+		count += 1
+	return count
+
+
+# Export
+
+def export_records(batch_size=BATCH_SIZE):
+	"""Yield every post as a record, oldest first."""
+	categories = dict((pk, {'name': name, 'slug': slug, 'description': description}) for pk, name, slug, description
+		in Category.objects.values_list('pk', 'name', 'slug', 'description'))
+	tags = dict((pk, {'name': name, 'slug': slug}) for pk, name, slug in Tag.objects.values_list('pk', 'name', 'slug'))
+	sites = dict(Site.objects.values_list('pk', 'domain'))
+
+	rows = iterate_by_pk(Post.objects.all(), ('pk', 'title', 'slug', 'pub_date', 'text', 'site', 'category'),
+		chunk_size=batch_size)
+	for batch in batches(rows, batch_size):
+		post_tags = {}
+		links = Post.tags.through.objects.filter(post__in=[row[0] for row in batch]).order_by('pk')
+		for post_id, tag_id in links.values_list('post_id', 'tag_id'):
+			post_tags.setdefault(post_id, []).append(tags[tag_id])
+		for pk, title, slug, pub_date, text, site_id, category_id in batch:
+			yield {
+				'title': title,
+				'slug': slug,
+				'pub_date': pub_date.isoformat(),
+				'text': text,
+				'site': sites[site_id],
+				'category': categories.get(category_id),
+				'tags': post_tags.get(pk, []),
+			}
+
+
+# Import
+
+REQUIRED_FIELDS = ('title', 'slug', 'pub_date', 'text')
+
+def _named(value, extra=()):
+	"""A category or tag given as a name or a dict, as a dict with a slug."""
+	if isinstance(value, basestring):
+		value = {'name': value}
+	value = dict(value)
+	value['name'] = value.get('name') or value.get('slug')
+	value['slug'] = value.get('slug') or slugify(unicode(value['name']))
+	for field in extra:
+		value.setdefault(field, '')
+	return value
+
+
+def _parse_date(value):
+	if not isinstance(value, basestring):
+		raise ValueError("pub_date must be an ISO 8601 string, not %r" % (value,))
+	date = parse_datetime(value)
+	if date is None:
+		raise ValueError("Invalid pub_date %r" % value)
+	if settings.USE_TZ and timezone.is_naive(date):
+		date = timezone.make_aware(date, timezone.get_default_timezone())
+	return date
+
+
+class Importer(object):
+	"""
+	Upserts batches of records.  Categories, tags and sites are resolved to
+	primary keys once per import and remembered, so each batch only looks
+	up the slugs it hasn't seen yet.
+	"""
+
+	def __init__(self):
+		self.category_ids = {}
+		self.tag_ids = {}
+		self.site_ids = dict(Site.objects.values_list('domain', 'pk'))
+		self.created = self.updated = 0
+
+	def upsert_named(self, model, items, ids, fields):
+		"""
+		Create the ``model`` rows of ``items`` (dicts by slug) that don't
+		exist yet and update the ``fields`` of those that differ, filling in
+		``ids`` by slug.
+		"""
+		new = dict((slug, item) for slug, item in items.items() if slug not in ids)
+		if not new:
+			return
+		for row in model.objects.filter(slug__in=list(new)).values('pk', 'slug', *fields):
+			item = new.pop(row['slug'])
+			ids[row['slug']] = row['pk']
+			changes = dict((field, item[field]) for field in fields if item[field] != row[field])
+			if changes:
+				model.objects.filter(pk=row['pk']).update(**changes)
+		model.objects.bulk_create([model(slug=slug, **dict((field, item[field]) for field in fields))
+			for slug, item in new.items()])
+		ids.update(model.objects.filter(slug__in=list(new)).values_list('slug', 'pk'))
+
+	def import_batch(self, records):
+		for record in records:
+			missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+			if missing:
+				raise ValueError("Record %r is missing %s" % (record.get('slug') or record.get('title'), ', '.join(missing)))
+		# The last record wins when a slug repeats
+		posts = dict((record['slug'], record) for record in records)
+		categories, tags = {}, {}
+		for record in posts.values():
+			if record.get('category'):
+				record['category'] = _named(record['category'], ('description',))
+				categories[record['category']['slug']] = record['category']
+			record['tags'] = [_named(tag) for tag in record.get('tags') or ()]
+			for tag in record['tags']:
+				tags[tag['slug']] = tag
+
+		with transaction.atomic():
+			self.upsert_named(Category, categories, self.category_ids, ('name', 'description'))
+			self.upsert_named(Tag, tags, self.tag_ids, ('name',))
+
+			existing = dict((slug, (pk, key)) for slug, pk, key
+				in Post.objects.filter(slug__in=list(posts)).values_list('slug', 'pk', 'text_html_key'))
+			now = timezone.now()
+			new, changed = [], []
+			for slug, record in posts.items():
+				fields = {
+					'title': record['title'],
+					'pub_date': _parse_date(record['pub_date']),
+					'text': record['text'],
+					'site_id': self.site_ids.get(record.get('site'), settings.SITE_ID),
+					'category_id': self.category_ids[record['category']['slug']] if record.get('category') else None,
+				}
+				if slug in existing:
+					pk, key = existing[slug]
+					fields['text_html_key'] = key if key == render_key(record['text']) else ''
+					changed.append((fields, pk))
+				else:
+					new.append(Post(slug=slug, **fields))
+			Post.objects.bulk_create(new)
+			self.update_posts(changed, now)
+
+			post_ids = dict(Post.objects.filter(slug__in=list(posts)).values_list('slug', 'pk'))
+			through = Post.tags.through
+			through.objects.filter(post__in=[pk for fields, pk in changed]).delete()
+			through.objects.bulk_create([through(post_id=post_ids[slug], tag_id=tag_id)
+				for slug, record in posts.items()
+				for tag_id in set(self.tag_ids[tag['slug']] for tag in record['tags'])])
+
+		self.created += len(new)
+		self.updated += len(changed)
+
+	def update_posts(self, changed, now):
+		"""Store ``(fields, pk)`` rows with one batched UPDATE."""
+		if not changed:
+			return
+		columns = ('title', 'pub_date', 'text', 'site_id', 'category_id', 'text_html_key')
+		quote = connection.ops.quote_name
+		sql = "UPDATE %s SET %s, %s = %%s WHERE %s = %%s" % (quote(Post._meta.db_table),
+			', '.join('%s = %%s' % quote(column) for column in columns), quote('updated_at'), quote(Post._meta.pk.column))
+		pub_date = Post._meta.get_field('pub_date')
+		rows = []
+		for fields, pk in changed:
+			fields['pub_date'] = pub_date.get_db_prep_save(fields['pub_date'], connection)
+			rows.append([fields[column] for column in columns] + [pub_date.get_db_prep_save(now, connection), pk])
+		connection.cursor().executemany(sql, rows)
+
+
+def import_records(records, batch_size=BATCH_SIZE, progress=None):
+	"""
+	Upsert ``records`` in batches.  ``progress(created, updated)`` is called
+	after each batch.  Returns ``(created, updated)``.  The cached pages are
+	invalidated, but other derived data is left stale; call
+	``rebuild_derived()`` afterwards.
+	"""
+	importer = Importer()
+	try:
+		for batch in batches(records, batch_size):
+			importer.import_batch(batch)
+			# With DEBUG on, every query of the import would be kept otherwise
+			reset_queries()
+			if progress:
+				progress(importer.created, importer.updated)
+	finally:
+		# Even a failed import may have written some batches
+		if importer.created or importer.updated:
+			bump([AUTOCOMPLETE_TAG, GLOBAL_TAG])
+	return importer.created, importer.updated
+
+
+def rebuild_derived():
+	"""Recompute everything the signal receivers would have kept up to date."""
+	rebuild_index()
+	archive.rebuild()
+	recount()
+	related.build()
+	bump([AUTOCOMPLETE_TAG, GLOBAL_TAG])
@@ -1,17 +1,47 @@
 from django.conf.urls import patterns, url
-from django.views.generic import ListView, DetailView
-from blogengine.models import Post, Category, Tag
-from blogengine.views import CategoryListView, TagListView, getSearchResults
+from blogengine.models import Category, Tag
+from blogengine.views import PostListView, PostDetailView, CategoryListView, TagListView, PostMonthArchiveView, getSearchResults, getAutocomplete, metricsView
+from blogengine.views import conditional_on
+from blogengine.pagination import POSTS_PER_PAGE
+from blogengine.feeds import serve_feed
+from blogengine.sitemaps import sitemap_index, sitemap_shard
+from blogengine.cache import cache_page_on, index_tags, post_page_tags, category_tags, tag_tags, archive_tags, search_tags
+
+# Every page is served from the response cache when possible, and otherwise
+# answers conditional GETs before rendering.
+index = cache_page_on(index_tags)(conditional_on(index_tags)(
+	PostListView.as_view(paginate_by=POSTS_PER_PAGE)))
+post = cache_page_on(post_page_tags)(conditional_on(post_page_tags)(
+	PostDetailView.as_view()))
+category = cache_page_on(category_tags)(conditional_on(category_tags)(
+	CategoryListView.as_view(paginate_by=POSTS_PER_PAGE, model=Category,)))
+tag = cache_page_on(tag_tags)(conditional_on(tag_tags)(
+	TagListView.as_view(paginate_by=POSTS_PER_PAGE, model=Tag,)))
+archive_month = cache_page_on(archive_tags)(conditional_on(archive_tags)(
+	PostMonthArchiveView.as_view(paginate_by=POSTS_PER_PAGE)))
+search = cache_page_on(search_tags)(getSearchResults)
 
 urlpatterns = patterns('',
 	# Index
-	url(r'^(?P<page>\d+)?/?$', ListView.as_view(model=Post, paginate_by=5), name='index'),
+	url(r'^(?P<page>\d+)?/?$', index, name='index'),
 	# Individual posts
-	url(r'^(?P<pub_date__year>\d{4})/(?P<pub_date__month>\d{1,2})/(?P<slug>[a-zA-Z0-9-]+)/?$', DetailView.as_view(model=Post,), name='post'),
+	url(r'^(?P<pub_date__year>\d{4})/(?P<pub_date__month>\d{1,2})/(?P<slug>[a-zA-Z0-9-]+)/?$', post, name='post'),
+	# Month archives
+	url(r'^(?P<year>\d{4})/(?P<month>\d{1,2})/(?:page/(?P<page>\d+)/)?$', archive_month, name='archive_month'),
 	# Categories
-	url(r'^category/(?P<slug>[a-zA-Z0-9-]+)/?$', CategoryListView.as_view(paginate_by=5, model=Category,), name='category'),
+	url(r'^category/(?P<slug>[a-zA-Z0-9-]+)(?:/page/(?P<page>\d+))?/?$', category, name='category'),
 	# Tags
-	url(r'^tag/(?P<slug>[a-zA-Z0-9-]+)/?$', TagListView.as_view(paginate_by=5, model=Tag,), name='tag'),
-	# Search
-	url(r'^search', getSearchResults, name='search'),
-)
\ No newline at end of file
+	url(r'^tag/(?P<slug>[a-zA-Z0-9-]+)(?:/page/(?P<page>\d+))?/?$', tag, name='tag'),
+	# Feeds
+	url(r'^feeds/(?P<format>rss|atom)/$', serve_feed, {'kind': 'site'}, name='feed'),
+	url(r'^category/(?P<slug>[a-zA-Z0-9-]+)/(?P<format>rss|atom)/$', serve_feed, {'kind': 'category'}, name='category_feed'),
+	url(r'^tag/(?P<slug>[a-zA-Z0-9-]+)/(?P<format>rss|atom)/$', serve_feed, {'kind': 'tag'}, name='tag_feed'),
+	# Sitemaps
+	url(r'^sitemap\.xml$', sitemap_index, name='sitemap'),
+	url(r'^sitemap-(?P<section>[a-z]+)-(?P<shard>\d+)\.xml$', sitemap_shard, name='sitemap_shard'),
+	# Request metrics
+	url(r'^metrics/$', metricsView, name='metrics'),
+	# Search; autocomplete must come first, as the search pattern is unanchored
+	url(r'^search/autocomplete/$', getAutocomplete, name='autocomplete'),
+	url(r'^search', search, name='search'),
+)
@@ -0,0 +1,18 @@
+def iterate_by_pk(queryset, fields, chunk_size=2000):
+	"""
+	Stream ``queryset.values_list(*fields)`` in primary key order, one
+	chunk at a time.  Unlike ``iterator()`` this keeps memory flat on
+	database drivers that fetch the whole result set up front.  The first
+	field must be the primary key.
+	"""
+	last_pk = None
+	while True:
+		chunk = queryset.order_by('pk')
+		if last_pk is not None:
+			chunk = chunk.filter(pk__gt=last_pk)
+		rows = list(chunk.values_list(*fields)[:chunk_size])
+		for row in rows:
+			yield row
+		if len(rows) < chunk_size:
+			return
+		last_pk = rows[-1][0]
@@ -1,57 +1,172 @@
-from django.shortcuts import get_object_or_404, render_to_response
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404, render
+from django.utils.crypto import constant_time_compare
 from django.core.paginator import Paginator, EmptyPage
-from django.db.models import Q
-from django.views.generic import ListView
-from django.views.generic.dates import MonthArchiveView
-from blogengine.models import Category, Post, Tag
+from django.views.decorators.http import condition
+from django.views.generic import DetailView, ListView
+from django.views.generic.dates import MonthArchiveView, _date_from_string
+from blogengine import metrics
+from blogengine.autocomplete import prefix_index
+from blogengine.models import Post
+from blogengine.related import related_posts
+from blogengine.search import search_post_ids
+from blogengine.taxonomy import summary
+from blogengine.pagination import KeysetPaginationMixin, POSTS_PER_PAGE
+from blogengine.cache import index_tags, category_tags, tag_tags, archive_tags, modified, page_versions
 from django.utils.encoding import force_unicode
+from django.utils.http import urlencode
 from django.utils.safestring import mark_safe
 
-import markdown2
+import hashlib
+import json
 
 # Create your views here.
-class CategoryListView(ListView):
+def page_validators(tags):
+	"""
+	ETag and Last-Modified for a page that depends on the cache ``tags``: a
+	hash of their versions, and when the newest of them was bumped.  Every
+	change to what the page shows bumps one of them, deletions included, so
+	answering needs no query.
+	"""
+	versions = page_versions(tags)
+	return hashlib.md5(':'.join(versions)).hexdigest(), modified(versions)
+
+def conditional_on(tags_for):
+	"""
+	Answer conditional GETs for a view from ``page_validators(tags_for(kwargs))``,
+	returning 304 before the view renders anything.
+	"""
+	def validators(request, *args, **kwargs):
+		if not hasattr(request, '_page_validators'):
+			request._page_validators = page_validators(tags_for(kwargs))
+		return request._page_validators
+
+	return condition(
+		etag_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[0],
+		last_modified_func=lambda request, *args, **kwargs: validators(request, *args, **kwargs)[1])
+
+class PostListView(KeysetPaginationMixin, ListView):
+	page_url_name = 'blogengine:index'
+
+	def get_page_tags(self):
+		return index_tags(self.kwargs)
+
 	def get_queryset(self):
-		slug = self.kwargs['slug']
-		try:
-			category = Category.objects.get(slug=slug)
-			return Post.objects.filter(category=category)
-		except Category.DoesNotExist:
-			return Post.objects.none()
-
-class TagListView(ListView):
+		return Post.on_site.for_listing()
+
+class CategoryListView(KeysetPaginationMixin, ListView):
+	page_url_name = 'blogengine:category'
+
+	def get_page_tags(self):
+		return category_tags(self.kwargs)
+
+	def get_post_count(self):
+		return summary()['category_counts'].get(self.kwargs['slug'], 0)
+
 	def get_queryset(self):
-		slug = self.kwargs['slug']
-		try:
-			tag = Tag.objects.get(slug=slug)
-			return tag.post_set.all()
-		except Tag.DoesNotExist:
-			return Post.objects.none()
+		# Filtered through the category join for_listing() makes anyway
+		return Post.on_site.filter(category__slug=self.kwargs['slug']).for_listing()
+
+class TagListView(KeysetPaginationMixin, ListView):
+	page_url_name = 'blogengine:tag'
+
+	def get_page_tags(self):
+		return tag_tags(self.kwargs)
+
+	def get_post_count(self):
+		return summary()['tag_counts'].get(self.kwargs['slug'], 0)
 
+	def get_queryset(self):
+		return Post.on_site.filter(tags__slug=self.kwargs['slug']).for_listing()
+
+class PostDetailView(DetailView):
+	def get_queryset(self):
+		return Post.on_site.with_taxonomy()
 
-class PostMonthArchiveView(MonthArchiveView):
-	queryset = Post.objects.all()
+	def get_context_data(self, **kwargs):
+		context = super(PostDetailView, self).get_context_data(**kwargs)
+		context['related_posts'] = related_posts(self.object)
+		return context
+
+
+class PostMonthArchiveView(KeysetPaginationMixin, MonthArchiveView):
 	date_field = 'pub_date'
+	month_format = '%m'
+	allow_future = True
 	make_object_list = True
+	template_name = 'blogengine/post_list.html'
+	page_url_name = 'blogengine:archive_month'
+
+	def get_page_tags(self):
+		return archive_tags(self.kwargs)
+
+	def get_queryset(self):
+		return Post.on_site.for_listing()
+
+	def get_month_range(self):
+		date = _date_from_string(self.get_year(), self.get_year_format(),
+			self.get_month(), self.get_month_format())
+		return date, self._make_date_lookup_arg(date), self._make_date_lookup_arg(self._get_next_month(date))
+
+	def get_dated_items(self):
+		# Unlike MonthArchiveView this skips the day list and the next and
+		# previous month lookups, which the templates don't use.  The month
+		# is a range over the indexed pub_date column rather than the year
+		# and month extracted from every row.
+		date, since, until = self.get_month_range()
+		posts = self.get_dated_queryset(pub_date__gte=since, pub_date__lt=until)
+		return None, posts, {'month': date}
 
 
 def getSearchResults(request):
 	query = request.GET.get('q', '')
 	page = request.GET.get('page', 1)
 
-	results = Post.objects.filter(Q(text__icontains=query) | Q(title__icontains=query))
-
-	pages = Paginator(results, 5)
+	pages = Paginator(search_post_ids(query), POSTS_PER_PAGE)
 
 	try:
 		returned_page = pages.page(page)
 	except EmptyPage:
 		returned_page = pages.page(pages.num_pages)
 
-	return render_to_response('blogengine/search_post_list.html',
+	# Only the posts on the requested page are loaded, in ranked order
+	posts = Post.on_site.for_listing().in_bulk(returned_page.object_list)
+	returned_page.object_list = [posts[pk] for pk in returned_page.object_list if pk in posts]
+
+	# Search results are ranked by relevance rather than date, so they are
+	# paged over the ranked id list instead of by key
+	if returned_page.has_next():
+		returned_page.next_url = '?' + urlencode({'q': query, 'page': returned_page.next_page_number()})
+	if returned_page.has_previous():
+		returned_page.previous_url = '?' + urlencode({'q': query, 'page': returned_page.previous_page_number()})
+
+	return render(request, 'blogengine/search_post_list.html',
 		{'page_obj': returned_page,
 		'object_list': returned_page.object_list,
 		'search': query})
 
 
-	
+def getAutocomplete(request):
+	"""Title and tag suggestions for the word prefix in ``?q=``, as JSON."""
+	query = request.GET.get('q', '')
+	return HttpResponse(json.dumps({'query': query, 'suggestions': prefix_index.lookup(query)}),
+		content_type='application/json')
+
+
+def metricsView(request):
+	"""
+	Request metrics from ``InstrumentationMiddleware`` as JSON, or in the
+	Prometheus text format with ``?format=prometheus``.  Open to staff, and to
+	scrapers passing ``BLOGENGINE_METRICS_TOKEN`` as ``?token=``.
+	"""
+	token = getattr(settings, 'BLOGENGINE_METRICS_TOKEN', None)
+	if not (request.user.is_staff or (token and constant_time_compare(request.GET.get('token', ''), token))):
+		return HttpResponseForbidden()
+
+	if request.GET.get('format') == 'prometheus':
+		response = HttpResponse(metrics.prometheus_text(), content_type='text/plain; version=0.0.4')
+	else:
+		response = HttpResponse(json.dumps(metrics.snapshot(), sort_keys=True), content_type='application/json')
+	response['Cache-Control'] = 'no-cache'
+	return response
@@ -0,0 +1,82 @@
+"""
+Start-up work done ahead of the first request.
+
+A new process pays on its first requests for importing markdown2 and the
+Pygments lexers, compiling the lexers' and URL patterns' regular
+expressions and parsing templates.  ``warm_up()`` does all of that up
+front.  Under gunicorn it runs once in the master process, from the
+``when_ready`` hook in ``gunicorn.conf.py``, and the workers forked from it
+share the result copy-on-write instead of each doing it again.
+
+The database backends are imported, but nothing is connected: a connection
+opened before the fork would be shared by every worker.
+
+Templates are only worth parsing up front when the cached template loader
+keeps them, which the settings turn on with ``DEBUG`` off.
+"""
+
+from django.conf import settings
+from django.core.urlresolvers import get_resolver
+from django.db import connections
+from django.template.loader import get_template
+
+from blogengine.markup import MARKDOWN_EXTRAS
+
+# Languages of fenced code blocks whose lexers are loaded up front
+LEXERS = ('python', 'pycon', 'html+django', 'bash', 'javascript', 'css', 'sql')
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+# Templates of the public pages
+TEMPLATES = (
+	'blogengine/post_list.html',
+	'blogengine/post_detail.html',
+	'blogengine/search_post_list.html',
+	'flatpages/default.html',
+)
+
+# Touches the block-level syntax, so markdown2 compiles the patterns it
+# only builds on first use
+SAMPLE = u"""# Heading
+
+A *paragraph* with a [link][home], `code` and <http://example.com/>.
+
+- a list
+- of items
+
+> A quote
+
+    indented code
+
+[home]: / "Home"
+"""
+
+
+def caches_templates():
+	"""Whether compiled templates are kept, rather than parsed on every use."""
+	return any(isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER for loader in settings.TEMPLATE_LOADERS)
+
+
+def warm_up():
+	"""Do the start-up work; returns notes on any steps that were skipped."""
+	from pygments import highlight
+	from pygments.formatters import HtmlFormatter
+	from pygments.lexers import get_lexer_by_name
+
+	from blogengine.renderers import CachedMarkdown
+
+	notes = []
+	# Imports every URLconf, and with them the views and the admin
+	get_resolver(None).reverse_dict
+	if caches_templates():
+		for name in TEMPLATES:
+			get_template(name)
+	else:
+		notes.append("Skipped parsing the templates: without the cached template loader, which the "
+			"settings only use with DEBUG off, they are parsed again on every use")
+	# A lexer compiles its patterns when first instantiated
+	for name in LEXERS:
+		highlight(u'', get_lexer_by_name(name), HtmlFormatter())
+	CachedMarkdown(extras=MARKDOWN_EXTRAS).convert(SAMPLE)
+	connections.all()
+	return notes
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/1.6/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
+import tempfile
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 
 
@@ -20,9 +21,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Set DJANGO_DEBUG=0 in production
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') != '0'
 
-TEMPLATE_DEBUG = True
+TEMPLATE_DEBUG = DEBUG
 
 ALLOWED_HOSTS = []
 
@@ -42,8 +44,11 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    'blogengine.middleware.InstrumentationMiddleware',
+    'blogengine.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -65,6 +70,40 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/1.7/topics/cache/
+
+# The blog's cache holds the versions that invalidate cached pages, feeds
+# and fragments, so every process serving the site has to share it: an edit
+# saved by one gunicorn worker, or a bump from a management command, must
+# reach the others.  Files in $BLOGENGINE_CACHE_DIR are shared by the
+# processes of one machine; with more than one, use memcached instead.
+# LocMemCache is per process, and only correct when a single process serves
+# the site.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('BLOGENGINE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'django_blog_cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Cache alias and lifetime of the blog's full-page cache
+BLOGENGINE_CACHE = 'default'
+BLOGENGINE_CACHE_TIMEOUT = 60 * 60
+
+# Per-view latency and query-count metrics, served at /metrics/ to staff or
+# to requests carrying BLOGENGINE_METRICS_TOKEN
+BLOGENGINE_INSTRUMENTATION = os.environ.get('BLOGENGINE_INSTRUMENTATION') == '1'
+BLOGENGINE_METRICS_TOKEN = os.environ.get('BLOGENGINE_METRICS_TOKEN')
+
+# Share of instrumented requests whose SQL is timed, which takes recording
+# every statement they run
+BLOGENGINE_SQL_SAMPLE_RATE = float(os.environ.get('BLOGENGINE_SQL_SAMPLE_RATE', '0.1'))
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
@@ -89,6 +128,23 @@ STATIC_URL = '/static/'
 # Template directory
 TEMPLATE_DIRS = [os.path.join(BASE_DIR, 'templates')]
 
+# Without DEBUG, each process parses a template once and keeps it compiled;
+# with it, edits show up on the next request
+TEMPLATE_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+if not DEBUG:
+    TEMPLATE_LOADERS = (
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    )
+
+from django.conf.global_settings import TEMPLATE_CONTEXT_PROCESSORS
+TEMPLATE_CONTEXT_PROCESSORS += (
+    'blogengine.context_processors.month_archives',
+    'blogengine.context_processors.taxonomy',
+)
+
 INSTALLED_APPS += ('django_jenkins',)
 JENKINS_TASKS = (
     # 'django_jenkins.tasks.run_pylint',
@@ -101,6 +157,20 @@ PROJECT_APPS =['blogengine']
 import dj_database_url
 DATABASES['default'] = dj_database_url.config(default="sqlite:///db.sqlite3")
 
+# Read replicas for the public pages, as space separated database URLs in
+# $REPLICA_DATABASE_URLS; see blogengine.replicas
+REPLICA_DATABASE_URLS = os.environ.get('REPLICA_DATABASE_URLS', '').split()
+BLOGENGINE_READ_REPLICAS = []
+for number, url in enumerate(REPLICA_DATABASE_URLS, 1):
+    DATABASES['replica%d' % number] = dj_database_url.parse(url)
+    BLOGENGINE_READ_REPLICAS.append('replica%d' % number)
+DATABASE_ROUTERS = ['blogengine.replicas.ReplicaRouter']
+
+# Seconds a client that wrote something reads from the primary, and before
+# a replica that couldn't be reached is tried again
+BLOGENGINE_PRIMARY_STICKY_SECONDS = 10
+BLOGENGINE_REPLICA_RETRY_SECONDS = 30
+
 # Honor the 'X-Forwarded-Proto' header for request.is_secure()
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
@@ -110,6 +180,9 @@ ALLOWED_HOSTS = ['*']
 # Static asset configuration
 STATIC_ROOT = 'staticfiles'
 
+# Bundle, minify, fingerprint and precompress assets at collectstatic time
+STATICFILES_STORAGE = 'blogengine.assets.BundledManifestStaticFilesStorage'
+
 STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
     )
@@ -0,0 +1,24 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=django_blog.test_settings
+"""
+
+import atexit
+import shutil
+
+from django_blog.settings import *
+
+# A cache of its own, so the suite never serves pages cached by the site or
+# by an earlier run.  The environment passes it on to the processes the
+# tests start.
+os.environ['BLOGENGINE_CACHE_DIR'] = CACHES['default']['LOCATION'] = tempfile.mkdtemp(prefix='django_blog_cache')
+atexit.register(shutil.rmtree, CACHES['default']['LOCATION'], True)
+
+# A second SQLite database stands in for a read replica; ReplicaTest copies
+# rows to it by hand to simulate replication
+if not REPLICA_DATABASE_URLS:
+    DATABASES['replica1'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+    }
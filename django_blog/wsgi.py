@@ -11,6 +11,13 @@ import os
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_blog.settings")
 
 from django.core.wsgi import get_wsgi_application
-from dj_static import Cling
+from blogengine.staticserve import PrecompressedStatic
 
-application = Cling(get_wsgi_application())
+application = PrecompressedStatic(get_wsgi_application())
+
+# Under gunicorn, gunicorn.conf.py warms up the master before it forks the
+# workers.  DJANGO_WARMUP=1 warms up whichever process imports this module,
+# for other servers.
+if os.environ.get('DJANGO_WARMUP') == '1':
+    from blogengine.warmup import warm_up
+    warm_up()
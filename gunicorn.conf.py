@@ -0,0 +1,19 @@
+"""
+gunicorn settings, read from the working directory the Procfile starts in.
+
+The application is loaded once in the master and warmed up there, before
+the workers are forked, so they share what blogengine.warmup sets up
+copy-on-write.
+"""
+
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master before the first worker is forked.  Unless the
+    # application was preloaded there, each worker starts cold anyway.
+    if server.cfg.preload_app:
+        from blogengine.warmup import warm_up
+        for note in warm_up():
+            server.log.info(note)
+        server.log.info("Warmed up the application")